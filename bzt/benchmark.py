@@ -0,0 +1,208 @@
+#! /usr/bin/env python
+"""
+Offline benchmark of results processing: synthetic samples are pushed through
+real ResultsReader -> ConsolidatingAggregator -> listener chain
+
+Copyright 2017 BlazeMeter Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+import logging
+import random
+import sys
+import time
+from optparse import OptionParser
+
+import psutil
+import yaml
+
+from bzt import TaurusConfigError
+from bzt.modules.aggregator import ConsolidatingAggregator, ResultsReader, AggregatorListener, DataPoint, KPISet
+from bzt.six import iteritems
+
+
+class SyntheticReader(ResultsReader):
+    """
+    Generates `rate` samples for every second on each read, samples are prepared
+    in advance so generation cost doesn't affect measurements
+    """
+
+    def __init__(self, labels=10, rate=1000, error_ratio=0.05, rt_mean=0.2, rt_sigma=0.5, seed=None):
+        super(SyntheticReader, self).__init__()
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.rate = rate
+        self.tstamp = 1
+        self.samples_count = 0
+        self.pool = self.__generate_pool(labels, error_ratio, rt_mean, rt_sigma, random.Random(seed))
+        self.pool_offset = 0
+
+    def __generate_pool(self, labels, error_ratio, rt_mean, rt_sigma, rnd):
+        pool = []
+        label_names = ["http://example.com/label-%s" % num for num in range(labels)]
+        for _ in range(self.rate * 10):
+            rtm = rnd.lognormvariate(-rt_sigma ** 2 / 2, rt_sigma) * rt_mean  # mean of distribution is rt_mean
+            cnn = rtm * rnd.random() / 10
+            ltc = rtm * rnd.random() / 2
+            if rnd.random() < error_ratio:
+                rcd, error = rnd.choice((("500", "Internal Server Error"), ("404", "Not Found")))
+            else:
+                rcd, error = "200", None
+            pool.append((rnd.choice(label_names), 1, rtm, cnn, ltc, rcd, error, '', rnd.randint(100, 10000)))
+        return pool
+
+    def _read(self, final_pass=False):
+        if final_pass:
+            return
+
+        tstamp = self.tstamp
+        self.tstamp += 1
+        start = self.pool_offset
+        self.pool_offset = (start + self.rate) % len(self.pool)
+        for num in range(start, start + self.rate):
+            self.samples_count += 1
+            yield (tstamp,) + self.pool[num % len(self.pool)]
+
+
+class ReportingListener(AggregatorListener):
+    """
+    Touches every cumulative KPISet like real reporters do
+    """
+
+    def __init__(self):
+        super(ReportingListener, self).__init__()
+        self.points = 0
+        self.percentiles_read = 0
+
+    def aggregated_second(self, data):
+        self.points += 1
+        for _, kpiset in iteritems(data[DataPoint.CUMULATIVE]):
+            self.percentiles_read += len(kpiset[KPISet.PERCENTILES])  # triggers lazy recalculation
+
+
+class AggregationBenchmark(object):
+    """
+    :type options: optparse.Values
+    """
+
+    def __init__(self, options, settings=None):
+        self.options = options
+        self.settings = settings or {}
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def run(self):
+        """
+        Run the benchmark
+
+        :return: dict of measured values
+        """
+        aggregator = ConsolidatingAggregator()
+        aggregator.settings.merge(self.settings)
+        aggregator.prepare()
+        listener = ReportingListener()
+        aggregator.add_listener(listener)
+
+        readers = []
+        for num in range(self.options.executors):
+            reader = SyntheticReader(self.options.labels, self.options.rate, self.options.errors,
+                                     self.options.rt_mean, self.options.rt_sigma, seed=num)
+            readers.append(reader)
+            aggregator.add_underling(reader)
+
+        process = psutil.Process()
+        peak_rss = process.memory_info().rss
+        ticks = []
+        start = time.time()
+        for _ in range(self.options.duration):
+            tick_start = time.time()
+            aggregator.check()
+            ticks.append(time.time() - tick_start)
+            peak_rss = max(peak_rss, process.memory_info().rss)
+
+        aggregator.shutdown()
+        post_process_start = time.time()
+        aggregator.post_process()
+        post_process = time.time() - post_process_start
+        elapsed = time.time() - start
+        peak_rss = max(peak_rss, process.memory_info().rss)
+
+        samples = sum(reader.samples_count for reader in readers)
+        ticks.sort()
+        return {
+            "samples": samples,
+            "datapoints": listener.points,
+            "elapsed": elapsed,
+            "samples_per_second": samples / elapsed if elapsed else 0.0,
+            "tick_avg": sum(ticks) / len(ticks) if ticks else 0.0,
+            "tick_p95": ticks[int(len(ticks) * 0.95)] if ticks else 0.0,
+            "tick_max": ticks[-1] if ticks else 0.0,
+            "post_process": post_process,
+            "peak_rss": peak_rss,
+        }
+
+
+def parse_settings(values):
+    """
+    :type values: list[str]
+    :rtype: dict
+    """
+    settings = {}
+    for value in values:
+        if '=' not in value:
+            raise TaurusConfigError("Consolidator setting must be in form name=value: %s" % value)
+        name, val = value.split('=', 1)
+        settings[name] = yaml.safe_load(val)
+    return settings
+
+
+def main():
+    usage = "Usage: python -m bzt.benchmark [options]"
+    parser = OptionParser(usage=usage, prog="bzt.benchmark")
+    parser.add_option('-d', '--duration', type='int', default=60,
+                      help="Count of seconds (aggregator ticks) to simulate")
+    parser.add_option('-r', '--rate', type='int', default=1000,
+                      help="Samples per second for each executor")
+    parser.add_option('-e', '--executors', type='int', default=1,
+                      help="Count of executors (results readers)")
+    parser.add_option('-l', '--labels', type='int', default=10,
+                      help="Count of distinct labels")
+    parser.add_option('--errors', type='float', default=0.05,
+                      help="Ratio of failed samples")
+    parser.add_option('--rt-mean', type='float', default=0.2, dest='rt_mean',
+                      help="Mean of log-normal response times distribution, in seconds")
+    parser.add_option('--rt-sigma', type='float', default=0.5, dest='rt_sigma',
+                      help="Sigma of log-normal response times distribution")
+    parser.add_option('-s', '--setting', action='append', default=[], dest='settings',
+                      help="Consolidator setting as name=value, e.g. rtimes-precision=3, can be repeated")
+    parser.add_option('-o', '--out', dest='file_name',
+                      help="Save results into JSON file")
+    options, _ = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    benchmark = AggregationBenchmark(options, parse_settings(options.settings))
+    results = benchmark.run()
+
+    sys.stdout.write("Samples:        %d in %d datapoints\n" % (results["samples"], results["datapoints"]))
+    sys.stdout.write("Throughput:     %.0f samples/s\n" % results["samples_per_second"])
+    sys.stdout.write("Tick latency:   avg %.4fs, p95 %.4fs, max %.4fs\n" % (
+        results["tick_avg"], results["tick_p95"], results["tick_max"]))
+    sys.stdout.write("Post-process:   %.4fs\n" % results["post_process"])
+    sys.stdout.write("Peak RSS:       %.1f MB\n" % (results["peak_rss"] / 1024.0 / 1024.0))
+
+    if options.file_name:
+        with open(options.file_name, 'w') as fds:
+            json.dump(results, fds, indent=True)
+
+
+if __name__ == "__main__":
+    main()
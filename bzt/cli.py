@@ -153,6 +153,10 @@ class CLI(object):
         :return: integer exit code
         """
         jmx_shorthands = []
+        profiler = RunProfiler(self.log) if self.options.profile else None
+        if profiler:
+            profiler.start()
+
         try:
             jmx_shorthands = self.__get_jmx_shorthands(configs)
             configs.extend(jmx_shorthands)
@@ -170,6 +174,10 @@ class CLI(object):
             except BaseException as exc:
                 self.handle_exception(exc)
 
+        if profiler:
+            profiler.stop()
+            profiler.save(self.engine)
+
         self.log.info("Artifacts dir: %s", self.engine.artifacts_dir)
 
         if self.exit_code:
@@ -261,6 +269,60 @@ class CLI(object):
             return []
 
 
+class RunProfiler(object):
+    """
+    Collects CPU profile of the whole run with cProfile and, where available,
+    memory allocations with tracemalloc, saves them into artifacts dir
+    """
+    TOP_LIMIT = 50
+
+    def __init__(self, parent_logger):
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.profile = None
+        self.tracemalloc = None
+        self.snapshot = None
+
+    def start(self):
+        import cProfile  # heavy imports are deferred to keep CLI startup fast
+        try:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            self.tracemalloc.start()
+        except ImportError:
+            self.log.debug("No tracemalloc available, memory allocations won't be traced")
+
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        if self.tracemalloc:
+            self.snapshot = self.tracemalloc.take_snapshot()
+            self.tracemalloc.stop()
+
+    def save(self, engine):
+        """
+        :type engine: Engine
+        """
+        import pstats
+
+        if not engine.artifacts_dir:
+            self.log.warning("No artifacts dir to save profiles into")
+            return
+
+        self.profile.dump_stats(os.path.join(engine.artifacts_dir, "profile.prof"))
+        with open(os.path.join(engine.artifacts_dir, "profile.txt"), 'w') as fds:
+            stats = pstats.Stats(self.profile, stream=fds)
+            stats.sort_stats("cumulative").print_stats(self.TOP_LIMIT)
+
+        if self.snapshot:
+            with open(os.path.join(engine.artifacts_dir, "tracemalloc.txt"), 'w') as fds:
+                for stat in self.snapshot.statistics("lineno")[:self.TOP_LIMIT]:
+                    fds.write("%s\n" % stat)
+
+        self.log.info("Profiles saved into %s", engine.artifacts_dir)
+
+
 class ConfigOverrider(object):
     def __init__(self, logger):
         """
@@ -417,6 +479,8 @@ def main():
                       help="Prints all logging messages to console")
     parser.add_option('-n', '--no-system-configs', action='store_true',
                       help="Skip system and user config files")
+    parser.add_option('--profile', action='store_true',
+                      help="Profile CPU and memory usage of the run, save profiles into artifacts dir")
 
     parsed_options, parsed_configs = parser.parse_args()
 
@@ -18,27 +18,35 @@ limitations under the License.
 import copy
 import datetime
 import hashlib
+import heapq
 import json
 import logging
 import os
 import shutil
+import stat
 import sys
+import tempfile
 import time
 import traceback
 from abc import abstractmethod
-from collections import namedtuple, defaultdict
-from distutils.version import LooseVersion
+from collections import namedtuple, defaultdict, OrderedDict
 from json import encoder
 
 import yaml
 from yaml.representer import SafeRepresenter
 
+try:
+    from yaml import CLoader as YAMLLoader  # libyaml based, many times faster
+except ImportError:
+    from yaml import Loader as YAMLLoader
+
 import bzt
 from bzt import ManualShutdown, get_configs_dir, TaurusConfigError, TaurusInternalException
 from bzt.six import build_opener, install_opener, urlopen, numeric_types, iteritems
 from bzt.six import string_types, text_type, PY2, UserDict, parse, ProxyHandler, reraise
 from bzt.utils import PIPE, shell_exec, get_full_path, ExceptionalDownloader, get_uniq_name
 from bzt.utils import load_class, to_json, BetterDict, ensure_is_dict, dehumanize_time
+from bzt.utils import ComplexEncoder, BackgroundFileWriter, is_windows, TimingHistogram
 
 SETTINGS = "settings"
 
@@ -74,6 +82,7 @@ class Engine(object):
         self.check_interval = 1
         self.stopping_reason = None
         self.engine_loop_utilization = 0
+        self.timings = ModuleTimings()
         self.prepared = []
         self.started = []
         self.default_cwd = None
@@ -115,7 +124,7 @@ class Engine(object):
             self.__prepare_services()
             self.__prepare_provisioning()
             self.__prepare_reporters()
-            self.config.dump()
+            self.config.dump(background=True)
 
         except BaseException as exc:
             self.stopping_reason = exc
@@ -126,8 +135,8 @@ class Engine(object):
         for module in modules:
             self.log.debug("Startup %s", module)
             self.started.append(module)
-            module.startup()
-        self.config.dump()
+            self.timings.call(module, "startup")
+        self.config.dump(background=True)
 
     def run(self):
         """
@@ -157,34 +166,46 @@ class Engine(object):
         if exc_info:
             reraise(exc_info)
 
-    def _check_modules_list(self):
-        finished = False
-        modules = [self.provisioning, self.aggregator] + self.services + self.reporters
-        for module in modules:
-            if module in self.started:
-                self.log.debug("Checking %s", module)
-                finished |= module.check()
-        return finished
-
     def _wait(self):
         """
-        Wait modules for finish
+        Wait modules for finish. Each module is checked on its own interval,
+        loop sleeps until the nearest due check
         :return:
         """
-        prev = time.time()
+        schedule = CheckSchedule(self.log, self.timings)
+        modules = [self.provisioning, self.aggregator] + self.services + self.reporters
+        for module in modules:
+            if module in self.started:
+                schedule.add(module, self.__get_check_interval(module), self.__get_check_priority(module))
+
+        while True:
+            start = time.time()
+            if schedule.check_due(start):
+                break
 
-        while not self._check_modules_list():
             now = time.time()
-            diff = now - prev
-            delay = self.check_interval - diff
+            diff = now - start
+            delay = schedule.next_due() - now
+            self.timings.add(self, "loop", diff)
             self.engine_loop_utilization = diff / self.check_interval
             self.log.debug("Iteration took %.3f sec, sleeping for %.3f sec...", diff, delay)
             if delay > 0:
                 time.sleep(delay)
-            prev = time.time()
             if self.interrupted:
                 raise ManualShutdown()
-        self.config.dump()
+        self.config.dump(background=True)
+
+    def __get_check_interval(self, module):
+        interval = getattr(module, "check_interval", None)
+        if "check-interval" in module.settings:
+            interval = module.settings["check-interval"]
+        return self.check_interval if interval is None else dehumanize_time(interval)
+
+    @staticmethod
+    def __get_check_priority(module):
+        if "check-priority" in module.settings:
+            return int(module.settings["check-priority"])
+        return getattr(module, "check_priority", 0)
 
     def _shutdown(self):
         """
@@ -197,13 +218,13 @@ class Engine(object):
         for module in modules:
             try:
                 if module in self.started:
-                    module.shutdown()
+                    self.timings.call(module, "shutdown")
             except BaseException as exc:
                 self.log.debug("%s:\n%s", exc, traceback.format_exc())
                 if not exc_info:
                     exc_info = sys.exc_info()
 
-        self.config.dump()
+        self.config.dump(background=True)
         if exc_info:
             reraise(exc_info)
 
@@ -218,7 +239,7 @@ class Engine(object):
         for module in modules:
             if module in self.prepared:
                 try:
-                    module.post_process()
+                    self.timings.call(module, "post_process")
                 except BaseException as exc:
                     if isinstance(exc, KeyboardInterrupt):
                         self.log.debug("post_process: %s", exc)
@@ -228,11 +249,19 @@ class Engine(object):
                         self.stopping_reason = exc
                     if not exc_info:
                         exc_info = sys.exc_info()
+        self.__dump_timings()
         self.config.dump()
 
         if exc_info:
             reraise(exc_info)
 
+    def __dump_timings(self):
+        if not self.artifacts_dir:
+            return
+
+        with open(os.path.join(self.artifacts_dir, ModuleTimings.ARTIFACT), 'w') as fds:
+            fds.write(to_json(self.timings.to_dict()))
+
     def create_artifact(self, prefix, suffix):
         """
         Create new artifact in artifacts dir with given prefix and suffix
@@ -360,6 +389,7 @@ class Engine(object):
         assert isinstance(instance, EngineModule)
         instance.log = self.log.getChild(alias)
         instance.engine = self
+        self.timings.aliases[instance] = alias
         settings = self.config.get("modules")
         instance.settings = settings.get(alias)
         return instance
@@ -417,7 +447,7 @@ class Engine(object):
             base_configs.append(user_file)
         else:
             self.log.info("No personal config: %s", user_file)
-        self.config.load(base_configs)
+        self.config.load(base_configs, persistent_cache=True)
 
     def _load_user_configs(self, user_configs):
         """
@@ -442,7 +472,7 @@ class Engine(object):
             raise TaurusConfigError(msg)
         self.provisioning = self.instantiate_module(cls)
         self.prepared.append(self.provisioning)
-        self.provisioning.prepare()
+        self.timings.call(self.provisioning, "prepare")
 
     def __prepare_reporters(self):
         """
@@ -461,7 +491,7 @@ class Engine(object):
         # prepare reporters
         for module in self.reporters:
             self.prepared.append(module)
-            module.prepare()
+            self.timings.call(module, "prepare")
 
     def __prepare_services(self):
         """
@@ -479,7 +509,7 @@ class Engine(object):
 
         for module in self.services:
             self.prepared.append(module)
-            module.prepare()
+            self.timings.call(module, "prepare")
 
     def __prepare_aggregator(self):
         """
@@ -493,7 +523,7 @@ class Engine(object):
         else:
             self.aggregator = self.instantiate_module(cls)
         self.prepared.append(self.aggregator)
-        self.aggregator.prepare()
+        self.timings.call(self.aggregator, "prepare")
 
     def _set_up_proxy(self):
         proxy_settings = self.config.get("settings").get("proxy")
@@ -526,6 +556,8 @@ class Engine(object):
                 self.log.debug("Result: %s", resp)
 
                 data = json.loads(resp)
+                from distutils.version import LooseVersion  # slow to import, needed only here
+
                 mine = LooseVersion(bzt.VERSION)
                 latest = LooseVersion(data['latest'])
                 if mine < latest or data['needsUpgrade']:
@@ -551,19 +583,26 @@ class Configuration(BetterDict):
         super(Configuration, self).__init__()
         self.log = logging.getLogger('')
         self.dump_filename = None
+        self.dump_hashes = {}
+        self.dump_writer = None
 
-    def load(self, configs, callback=None):
+    def load(self, configs, callback=None, persistent_cache=False):
         """
         Load and merge JSON/YAML files into current dict
 
         :type callback: callable
         :type configs: list[str]
+        :param persistent_cache: keep parsed files in on-disk cache, for rarely changed configs
         """
         self.log.debug("Configs: %s", configs)
+        cache = ParsedConfigCache(ParsedConfigCache.default_directory() if persistent_cache else None, self.log)
         for config_file in configs:
             try:
-                config = self.__read_file(config_file)
-            except IOError as exc:
+                config = cache.get(config_file)
+                if config is None:
+                    config = self.__read_file(config_file)
+                    cache.put(config_file, config)
+            except (IOError, OSError) as exc:
                 raise TaurusConfigError("Error when reading config file '%s': %s" % (config_file, exc))
 
             self.merge(config)
@@ -585,7 +624,7 @@ class Configuration(BetterDict):
 
             if first_line.startswith('---'):
                 self.log.debug("Reading %s as YAML", filename)
-                return yaml.load(fds)
+                return yaml.load(fds, Loader=YAMLLoader)
             elif first_line.strip().startswith('{'):
                 self.log.debug("Reading %s as JSON", filename)
                 return json.loads(fds.read())
@@ -608,37 +647,89 @@ class Configuration(BetterDict):
         :type fmt: str
         :raise TaurusInternalException:
         """
-        if fmt == self.JSON:
-            fds.write(to_json(self))
-        elif fmt == self.YAML:
-            yml = yaml.dump(self, default_flow_style=False, explicit_start=True, canonical=False, allow_unicode=True)
-            fds.write(yml)
+        fds.write(self.__format(self, fmt))
+
+    @classmethod
+    def __format(cls, data, fmt):
+        if fmt == cls.JSON:
+            text = to_json(data)
+        elif fmt == cls.YAML:
+            text = yaml.dump(data, default_flow_style=False, explicit_start=True, canonical=False, allow_unicode=True)
         else:
             raise TaurusInternalException("Unknown dump format: %s" % fmt)
-        fds.write("\n")
+        return text + "\n"
 
-    def dump(self, filename=None, fmt=None):
+    def dump(self, filename=None, fmt=None, background=False):
         """
         Dump current state of dict into file. If no filename or format
-        specified, defaults are used
+        specified, defaults are used. Default dump is skipped when config
+        hasn't changed since previous one, with `background` it's written
+        by separate thread.
 
         :type filename: str or NoneType
         :type fmt: str or NoneType
+        :type background: bool
         """
         if not filename:
-            filename = self.dump_filename
+            self.__dump_default(background)
+            return
+
+        if not fmt:
+            self.dump(filename + ".yml", self.YAML)
+            self.dump(filename + ".json", self.JSON)
+            return
+
+        acopy = copy.deepcopy(self)
+        BetterDict.traverse(acopy, self.masq_sensitive)
+        with open(filename, "w") as fhd:
+            self.log.debug("Dumping %s config into %s", fmt, filename)
+            acopy.write(fhd, fmt)
+
+    def __dump_default(self, background):
+        if not self.dump_filename:
+            return
+
+        if not self.dump_writer:
+            self.dump_writer = BackgroundFileWriter(self.log)
+
+        # config is copied here, writer thread formats and compares the copy that nothing else changes
+        self.log.debug("Dumping config into %s", self.dump_filename)
+        snapshot = {"data": self.__masked_copy()}
+        self.dump_writer.write(self.dump_filename + ".yml", lambda: self.__dump_text(snapshot, self.YAML))
+        self.dump_writer.write(self.dump_filename + ".json", lambda: self.__dump_text(snapshot, self.JSON))
+
+        if not background:
+            self.dump_writer.flush()
 
-        if filename:
-            if not fmt:
-                self.dump(filename + ".yml", self.YAML)
-                self.dump(filename + ".json", self.JSON)
-                return
+    def __dump_text(self, snapshot, fmt):
+        """
+        Text of default dump in given format, both formats share JSON text and its hash made
+        by the first of them. None is returned if that file already has the same content.
 
-            acopy = copy.deepcopy(self)
-            BetterDict.traverse(acopy, self.masq_sensitive)
-            with open(filename, "w") as fhd:
-                self.log.debug("Dumping %s config into %s", fmt, filename)
-                acopy.write(fhd, fmt)
+        :type snapshot: dict
+        :type fmt: str
+        :rtype: str
+        """
+        if "hash" not in snapshot:
+            snapshot[self.JSON] = self.__format(snapshot["data"], self.JSON)
+            snapshot["hash"] = hashlib.sha1(snapshot[self.JSON].encode("utf-8")).hexdigest()
+
+        if self.dump_hashes.get(fmt) == snapshot["hash"]:
+            self.log.debug("Config hasn't changed since last %s dump", fmt)
+            return None
+
+        self.dump_hashes[fmt] = snapshot["hash"]
+        return snapshot[fmt] if fmt in snapshot else self.__format(snapshot["data"], fmt)
+
+    def __masked_copy(self):
+        """
+        Copy of config with sensitive values masked
+
+        :rtype: dict
+        """
+        acopy = copy.deepcopy(dict(self))
+        BetterDict.traverse(acopy, self.masq_sensitive)
+        return acopy
 
     @staticmethod
     def masq_sensitive(value, key, container):
@@ -660,6 +751,242 @@ if PY2:
 encoder.FLOAT_REPR = lambda o: format(o, '.3g')
 
 
+class CheckSchedule(object):
+    """
+    Queue of modules ordered by time of their next check. Modules due at the same
+    time are checked in order of priority (lower first), then in order of adding.
+    Next check is planned from the time it was due, so modules with the same interval
+    are checked on the same ticks. Module that fell behind is planned from current tick.
+    When any module wants to finish, the rest of them get final check on the same tick.
+    """
+    TICK_PRECISION = 0.001  # modules due that close to each other are checked together
+
+    def __init__(self, parent_logger, timings=None):
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.timings = timings
+        self.queue = []
+        self.counter = 0
+
+    def add(self, module, interval, priority=0, due=0):
+        """
+        :type module: EngineModule
+        :type interval: float
+        :type priority: int
+        :param due: time of first check, module is checked immediately by default
+        """
+        self.log.debug("Checking %s every %s sec with priority %s", module, interval, priority)
+        heapq.heappush(self.queue, (due, priority, self.counter, interval, module))
+        self.counter += 1
+
+    def next_due(self):
+        """
+        :rtype: float
+        """
+        return self.queue[0][0] if self.queue else time.time()
+
+    def check_due(self, now):
+        """
+        Check all modules that are due by `now`, or all modules if any of them wants to finish
+
+        :return: True if any of checked modules wants to finish
+        """
+        due = self.__pop(lambda item: item[0] <= now + self.TICK_PRECISION)
+        finished = self.__check(due, now)
+        if finished:
+            self.log.debug("Final check of modules")
+            checked = set(item[2] for item in due)
+            rest = self.__pop(lambda _: True)
+            for item in rest:
+                if item[2] in checked:
+                    heapq.heappush(self.queue, item)
+            self.__check([item for item in rest if item[2] not in checked], now)
+        return finished
+
+    def __pop(self, condition):
+        items = []
+        while self.queue and condition(self.queue[0]):
+            items.append(heapq.heappop(self.queue))
+        items.sort(key=lambda item: item[1:3])
+        return items
+
+    def __check(self, items, now):
+        finished = False
+        for due, priority, index, interval, module in items:
+            self.log.debug("Checking %s", module)
+            start = time.time()
+            try:
+                finished |= module.check()
+            finally:
+                if self.timings:
+                    self.timings.add(module, "check", time.time() - start)
+                next_due = due + interval
+                if next_due <= now:  # fell behind or checked first time, plan from current tick
+                    next_due = now + interval
+                heapq.heappush(self.queue, (next_due, priority, index, interval, module))
+        return finished
+
+
+class ModuleTimings(object):
+    """
+    Histograms of time spent by engine modules in each phase of their lifecycle.
+    Modules are labeled with aliases they were instantiated with.
+    """
+    ARTIFACT = "engine-timings.json"
+
+    def __init__(self):
+        self.aliases = {}
+        self.labels = {}
+        self.histograms = OrderedDict()
+
+    def call(self, module, phase):
+        """
+        Call module's phase method, measuring its duration
+        """
+        start = time.time()
+        try:
+            return getattr(module, phase)()
+        finally:
+            self.add(module, phase, time.time() - start)
+
+    def add(self, module, phase, duration):
+        key = (self.get_label(module), phase)
+        if key not in self.histograms:
+            self.histograms[key] = TimingHistogram()
+        self.histograms[key].add(duration)
+
+    def get_label(self, module):
+        if module not in self.labels:
+            label = self.aliases.get(module, "engine" if isinstance(module, Engine) else module.__class__.__name__)
+            used = set(self.labels.values())
+            if label in used:
+                label += "-%s" % len([x for x in used if x == label or x.startswith(label + "-")])
+            self.labels[module] = label
+        return self.labels[module]
+
+    def get(self, label, phase):
+        """
+        :rtype: TimingHistogram
+        """
+        return self.histograms.get((label, phase), None)
+
+    def to_dict(self):
+        result = OrderedDict()
+        for (label, phase), histogram in iteritems(self.histograms):
+            result.setdefault(label, OrderedDict())[phase] = histogram.to_dict()
+        return result
+
+
+class ParsedConfigCache(object):
+    """
+    Parsed config files kept as JSON, which is much faster to load than YAML.
+    Entries are keyed by file path, size and modification time, so changed file is just parsed again.
+    Entries live in memory of the process and, if directory is set, on disk. Disk cache is private
+    to user and keeps up to MAX_FILES most recently used entries.
+    """
+    MAX_FILES = 64
+    UNCACHEABLE = ""
+    memory = {}
+
+    def __init__(self, directory, parent_logger):
+        self.directory = directory
+        self.log = parent_logger.getChild(self.__class__.__name__)
+
+    @staticmethod
+    def default_directory():
+        """
+        :rtype: str
+        """
+        user = os.getuid() if hasattr(os, "getuid") else os.path.basename(os.path.expanduser("~"))
+        return os.path.join(tempfile.gettempdir(), "bzt-configs-cache-%s" % user)
+
+    def __is_private(self):
+        """
+        Directory can be trusted if it's not writable by other users
+        """
+        if not os.path.isdir(self.directory):
+            return False
+        if not hasattr(os, "getuid"):
+            return True
+        dir_stat = os.stat(self.directory)
+        return dir_stat.st_uid == os.getuid() and not dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    @staticmethod
+    def __key(filename):
+        fstat = os.stat(filename)
+        data = "%s|%s|%r" % (os.path.realpath(filename), fstat.st_size, fstat.st_mtime)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def get(self, filename):
+        """
+        :return: parsed content of file, or None if it isn't cached
+        """
+        key = self.__key(filename)
+        text = self.memory.get(key, None)
+        if text is None and self.directory and self.__is_private():
+            cache_file = os.path.join(self.directory, key + ".json")
+            if os.path.isfile(cache_file):
+                with open(cache_file) as fds:
+                    text = fds.read()
+                os.utime(cache_file, None)  # mark as recently used
+                self.memory[key] = text
+
+        if not text:
+            return None
+
+        self.log.debug("Using parsed %s from cache", filename)
+        return json.loads(text)
+
+    def put(self, filename, config):
+        """
+        Store parsed content, unless it can't be represented with JSON exactly
+        """
+        key = self.__key(filename)
+        try:
+            text = json.dumps(config)
+        except (TypeError, ValueError):
+            text = self.UNCACHEABLE
+        if text and json.loads(text) != config:  # e.g. non-string keys or dates
+            text = self.UNCACHEABLE
+
+        self.memory[key] = text
+        if text and self.directory:
+            try:
+                self.__save(key, text)
+            except (IOError, OSError) as exc:
+                self.log.debug("Failed to store parsed %s in cache: %s", filename, exc)
+
+    def __save(self, key, text):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        if not self.__is_private():
+            self.log.debug("Not storing parsed configs in directory writable by others: %s", self.directory)
+            return
+
+        fds, tmp_name = tempfile.mkstemp(".json", key, self.directory)
+        with os.fdopen(fds, 'w') as tmp_file:
+            tmp_file.write(text)
+        cache_file = os.path.join(self.directory, key + ".json")
+        if is_windows() and os.path.exists(cache_file):  # windows can't rename over existing file
+            os.remove(cache_file)
+        os.rename(tmp_name, cache_file)
+        self.__evict()
+
+    def __evict(self):
+        """
+        Remove least recently used entries beyond MAX_FILES
+        """
+        entries = []
+        for fname in os.listdir(self.directory):
+            if fname.endswith(".json"):
+                path = os.path.join(self.directory, fname)
+                entries.append((os.path.getmtime(path), path))
+
+        entries.sort(reverse=True)
+        for _, path in entries[self.MAX_FILES:]:
+            self.log.debug("Removing parsed config from cache: %s", path)
+            os.remove(path)
+
+
 class EngineModule(object):
     """
     Base class for any BZT engine module
@@ -675,6 +1002,8 @@ class EngineModule(object):
         self.parameters = BetterDict()
         self.delay = None
         self.start_time = None
+        self.check_interval = None  # seconds between checks, engine-wide check-interval if None
+        self.check_priority = 0  # modules due at the same time are checked in order of priority
 
     def prepare(self):
         """
@@ -38,6 +38,179 @@ class JMX(object):
     TEST_PLAN_SEL = "jmeterTestPlan>hashTree>hashTree"
     THR_GROUP_SEL = TEST_PLAN_SEL + ">hashTree[type=tg]"
 
+    STREAM_FIELDS = ["timeStamp", "elapsed", "label", "responseCode", "responseMessage", "threadName", "success",
+                     "bytes", "grpThreads", "allThreads", "Latency", "Connect", "Hostname"]
+    STREAM_SCRIPT = r"""
+// samplers only queue lines, background thread writes them into socket and flushes when queue is drained,
+// it closes socket and forgets the queue when test ends, so next test on the same JVM opens new stream
+def key = "bzt.kpi.stream." + args[1]
+def queue = props.get(key)
+if (queue == null) {
+    synchronized (props) {
+        queue = props.get(key)
+        if (queue == null) {
+            queue = new java.util.concurrent.LinkedBlockingQueue()
+            def socket = new java.net.Socket(args[0], args[1] as int)
+            def out = new java.io.BufferedWriter(new java.io.OutputStreamWriter(socket.getOutputStream(), "UTF-8"),
+                                                 64 * 1024)
+            out.write(args[2] + "\n")  // per-run token authenticates the stream
+            def drain = { first ->
+                synchronized (out) {
+                    def line = first
+                    while (line != null) {
+                        out.write(line)
+                        line = queue.poll()
+                    }
+                    out.flush()
+                }
+            }
+            // listener gets no testEnded() call, but JMeter resets test start time right after notifying of it
+            def started = org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+            def writer = new Thread({
+                try {
+                    while (org.apache.jmeter.threads.JMeterContextService.getTestStartTime() == started) {
+                        drain(queue.poll(1, java.util.concurrent.TimeUnit.SECONDS))
+                    }
+                    props.remove(key)
+                    drain(queue.poll())
+                } catch (Exception exc) {
+                    log.warn("Failed to send results stream: " + exc)
+                } finally {
+                    try {
+                        out.close()
+                    } finally {
+                        socket.close()
+                    }
+                }
+            } as Runnable, "bzt-kpi-stream")
+            writer.setDaemon(true)
+            writer.start()
+            props.put(key, queue)
+        }
+    }
+}
+
+def res = sampleEvent.getResult()
+def msg = res.getResponseMessage()
+if (!res.isSuccessful()) {
+    def failed = res.getAssertionResults().find { it.isFailure() || it.isError() }
+    if (failed != null) {
+        msg = failed.getFailureMessage()
+    }
+}
+
+def clean = { value -> value == null ? "" : value.toString().replaceAll("[\t\r\n]", " ") }
+def line = [res.getTimeStamp(), res.getTime(), clean(res.getSampleLabel()), clean(res.getResponseCode()), clean(msg),
+            clean(res.getThreadName()), res.isSuccessful(), res.getBytes(), res.getGroupThreads(),
+            res.getAllThreads(), res.getLatency(), res.getConnectTime(), clean(sampleEvent.getHostname())].join("\t")
+queue.offer(line + "\n")
+"""
+
+    BINARY_SCRIPT = r"""
+// parameters are "local|remote <path>", path may contain spaces
+// background thread writes queued samples and closes file when test ends
+def remote = args[0] == "remote"
+def path = Parameters.substring(Parameters.indexOf(" ") + 1)
+def key = "bzt.kpi.binary." + path
+def queue = props.get(key)
+if (queue == null) {
+    synchronized (props) {
+        queue = props.get(key)
+        if (queue == null) {
+            queue = new java.util.concurrent.LinkedBlockingQueue()
+            def out = new java.io.BufferedOutputStream(new java.io.FileOutputStream(path), 256 * 1024)
+            out.write("BZTKPI01".getBytes("US-ASCII"))
+            def strings = new HashMap()
+            def record = java.nio.ByteBuffer.allocate(61).order(java.nio.ByteOrder.LITTLE_ENDIAN)
+            def stringId = { value ->
+                if (value == null) {
+                    return -1
+                }
+                def id = strings.get(value)
+                if (id == null) {
+                    id = strings.size()
+                    strings.put(value, id)
+                    def data = value.getBytes("UTF-8")
+                    def head = java.nio.ByteBuffer.allocate(5).order(java.nio.ByteOrder.LITTLE_ENDIAN)
+                    head.put((byte) 83).putInt(data.length)  // 'S'
+                    out.write(head.array())
+                    out.write(data)
+                }
+                return id
+            }
+            def write = { sample ->
+                def ids = [stringId(sample[1]), stringId(sample[6]), stringId(sample[7]), stringId(sample[8])]
+                record.clear()
+                record.put((byte) 82)  // 'R'
+                record.putLong(sample[0]).putInt(ids[0]).putInt(sample[2])
+                record.putDouble(sample[3]).putDouble(sample[4]).putDouble(sample[5])
+                record.putInt(ids[1]).putInt(ids[2]).putInt(ids[3]).putLong(sample[9])
+                out.write(record.array())
+            }
+            def drain = { first ->
+                synchronized (out) {
+                    def sample = first
+                    while (sample != null) {
+                        write(sample)
+                        sample = queue.poll()
+                    }
+                    out.flush()
+                }
+            }
+            // listener gets no testEnded() call, but JMeter resets test start time right after notifying of it
+            def started = org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+            def writer = new Thread({
+                try {
+                    while (org.apache.jmeter.threads.JMeterContextService.getTestStartTime() == started) {
+                        drain(queue.poll(1, java.util.concurrent.TimeUnit.SECONDS))
+                    }
+                    props.remove(key)
+                    drain(queue.poll())
+                } catch (Exception exc) {
+                    log.warn("Failed to write binary results: " + exc)
+                } finally {
+                    out.close()
+                }
+            } as Runnable, "bzt-kpi-binary")
+            writer.setDaemon(true)
+            writer.start()
+            props.put(key, queue)
+        }
+    }
+}
+
+def res = sampleEvent.getResult()
+def msg = null
+if (!res.isSuccessful()) {
+    msg = res.getResponseMessage()
+    def failed = res.getAssertionResults().find { it.isFailure() || it.isError() }
+    if (failed != null) {
+        msg = failed.getFailureMessage()
+    }
+    msg = msg == null ? "" : msg
+}
+
+def rcd = res.getResponseCode()
+if (rcd != null && rcd.endsWith("Exception")) {
+    rcd = rcd.substring(rcd.lastIndexOf(".") + 1)
+}
+
+def trname = ""
+if (remote) {
+    def thread = res.getThreadName()
+    trname = sampleEvent.getHostname() + thread.substring(0, Math.max(thread.lastIndexOf("-"), 0))
+}
+
+double cnn = res.getConnectTime() / 1000.0
+double ltc = res.getLatency() / 1000.0
+if (cnn < ltc) {
+    ltc -= cnn
+}
+queue.offer([(long) (res.getTimeStamp() / 1000), res.getSampleLabel(),
+             (int) (remote ? res.getGroupThreads() : res.getAllThreads()), (double) (res.getTime() / 1000.0),
+             cnn, ltc, rcd, msg, trname, (long) res.getBytes()] as Object[])
+"""
+
     def __init__(self, original=None, test_plan_name="BZT Generated Test Plan"):
         self.log = logging.getLogger(self.__class__.__name__)
         if original:
@@ -206,6 +379,46 @@ class JMX(object):
 
         return JMX.__jtl_writer(filename, "KPI Writer", flags)
 
+    @staticmethod
+    def new_stream_listener(host, port, token):
+        """
+        Generates JSR223 listener that sends KPI data of every sample
+        into TCP socket as tab-separated line, see JMX.STREAM_FIELDS.
+        Stream starts with token line that server checks before reading it.
+
+        :type host: str
+        :type port: int
+        :type token: str
+        :return:
+        """
+        listener = etree.Element("JSR223Listener", guiclass="TestBeanGUI",
+                                 testclass="JSR223Listener", testname="KPI Stream Writer")
+        listener.append(JMX._string_prop("cacheKey", "bzt-kpi-stream"))
+        listener.append(JMX._string_prop("filename", ""))
+        listener.append(JMX._string_prop("parameters", "%s %s %s" % (host, port, token)))
+        listener.append(JMX._string_prop("script", JMX.STREAM_SCRIPT))
+        listener.append(JMX._string_prop("scriptLanguage", "groovy"))
+        return listener
+
+    @staticmethod
+    def new_binary_listener(filename, is_remote):
+        """
+        Generates JSR223 listener that writes KPI data of every sample
+        into binary results file, see bzt.modules.binresults
+
+        :type filename: str
+        :type is_remote: bool
+        :return:
+        """
+        listener = etree.Element("JSR223Listener", guiclass="TestBeanGUI",
+                                 testclass="JSR223Listener", testname="KPI Binary Writer")
+        listener.append(JMX._string_prop("cacheKey", "bzt-kpi-binary"))
+        listener.append(JMX._string_prop("filename", ""))
+        listener.append(JMX._string_prop("parameters", "%s %s" % ("remote" if is_remote else "local", filename)))
+        listener.append(JMX._string_prop("script", JMX.BINARY_SCRIPT))
+        listener.append(JMX._string_prop("scriptLanguage", "groovy"))
+        return listener
+
     @staticmethod
     def new_xml_listener(filename, is_full, user_flags):
         """
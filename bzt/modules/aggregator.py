@@ -18,14 +18,16 @@ limitations under the License.
 import copy
 import logging
 import math
+import multiprocessing
 import operator
 import re
 from abc import abstractmethod
-from collections import Counter
+from array import array
+from collections import Counter, OrderedDict, defaultdict, deque
 
 from bzt import TaurusInternalException, TaurusConfigError
 from bzt.engine import Aggregator
-from bzt.six import iteritems
+from bzt.six import iteritems, PY2
 from bzt.utils import BetterDict, dehumanize_time
 
 
@@ -35,6 +37,7 @@ class KPISet(BetterDict):
     capable of merging other KPISet's into it to compose cumulative results
     """
     ERRORS = "errors"
+    OTHER_ERRORS = "other_errors"
     SAMPLE_COUNT = "throughput"
     CONCURRENCY = "concurrency"
     SUCCESSES = "succ"
@@ -50,13 +53,18 @@ class KPISet(BetterDict):
     ERRTYPE_ERROR = 0
     ERRTYPE_ASSERT = 1
 
-    def __init__(self, perc_levels=(), rt_dist_maxlen=None):
+    def __init__(self, perc_levels=(), rt_dist_maxlen=None, rt_precision=None, errors_maxlen=None):
         super(KPISet, self).__init__()
         self.sum_rt = 0
         self.sum_lt = 0
         self.sum_cn = 0
         self.perc_levels = perc_levels
         self.rtimes_len = rt_dist_maxlen
+        self.rtimes_precision = rt_precision  # significant digits of log-bucketed rt histogram
+        self.errors_len = errors_maxlen  # distinct errors limit, the rest is counted as other errors
+        self._errors_index = (None, {})  # indexed errors list and its index
+        self._sorted_rtimes = []  # rt keys order known from last recalculation
+        self._recalc_needed = True
         # scalars
         self.get(self.SAMPLE_COUNT, 0)
         self.get(self.CONCURRENCY, 0)
@@ -67,6 +75,7 @@ class KPISet(BetterDict):
         self.get(self.AVG_LATENCY, 0)
         self.get(self.AVG_CONN_TIME, 0)
         self.get(self.BYTE_COUNT, 0)
+        self.get(self.OTHER_ERRORS, 0)
         # vectors
         self.get(self.ERRORS, [])
         self.get(self.RESP_TIMES, Counter())
@@ -75,15 +84,30 @@ class KPISet(BetterDict):
         self._concurrencies = BetterDict()  # NOTE: shouldn't it be Counter?
 
     def __deepcopy__(self, memo):
-        mycopy = KPISet(self.perc_levels)
+        mycopy = KPISet(self.perc_levels, self.rtimes_len, self.rtimes_precision, self.errors_len)
         mycopy.sum_rt = self.sum_rt
         mycopy.sum_lt = self.sum_lt
         mycopy.sum_cn = self.sum_cn
-        mycopy.rtimes_len = self.rtimes_len
+        mycopy._sorted_rtimes = self._sorted_rtimes[:]
+        mycopy._recalc_needed = self._recalc_needed
         for key, val in iteritems(self):
             mycopy[key] = copy.deepcopy(val, memo)
         return mycopy
 
+    @staticmethod
+    def rt_bucket(r_time, precision):
+        """
+        Round response time to HDR-style logarithmic bucket, keeping
+        `precision` significant digits. Relative error is bounded by 0.5 * 10^(1-precision).
+
+        :type r_time: float
+        :type precision: int
+        :rtype: float
+        """
+        if not r_time or r_time < 0:
+            return r_time
+        return round(r_time, precision - 1 - int(math.floor(math.log10(r_time))))
+
     @staticmethod
     def error_item_skel(error, ret_c, cnt, errtype, urls):
         """
@@ -111,6 +135,7 @@ class KPISet(BetterDict):
         """
         # TODO: introduce a flag to not count failed in resp times? or offer it always?
         cnc, r_time, con_time, latency, r_code, error, trname, byte_count = sample
+        self._recalc_needed = True
         self[self.SAMPLE_COUNT] += 1
         if cnc:
             self._concurrencies[trname] = cnc
@@ -128,39 +153,99 @@ class KPISet(BetterDict):
             self[self.FAILURES] += 1
 
             item = self.error_item_skel(error, r_code, 1, KPISet.ERRTYPE_ERROR, Counter())
-            self.inc_list(self[self.ERRORS], ("msg", error), item)
+            self.inc_error(item, is_copy=False)
         else:
             self[self.SUCCESSES] += 1
 
-        self[self.RESP_TIMES][r_time] += 1
+        if self.rtimes_precision:
+            self[self.RESP_TIMES][self.rt_bucket(r_time, self.rtimes_precision)] += 1
+        else:
+            self[self.RESP_TIMES][r_time] += 1
 
         if byte_count is not None:
             self[self.BYTE_COUNT] += byte_count
             # TODO: max/min rt? there is percentiles...
             # TODO: throughput if interval is not 1s
 
+    def add_columns(self, columns, indexes):
+        """
+        Add batch of samples from columnar buffer, equivalent of add_sample for each of them
+
+        :type columns: SampleColumns
+        :type indexes: list[int]
+        """
+        self._recalc_needed = True
+        self[self.SAMPLE_COUNT] += len(indexes)
+
+        concurrencies, trnames = columns.concurrencies, columns.trnames
+        self._concurrencies.update((trnames[idx], concurrencies[idx]) for idx in indexes if concurrencies[idx])
+
+        rc_ids, r_codes = columns.rc_ids, columns.r_codes
+        timed = [idx for idx in indexes if rc_ids[idx] >= 0]
+        if timed:
+            self[self.RESP_CODES].update(r_codes[rc_ids[idx]] for idx in timed)
+            self.sum_cn += sum(columns.con_times[idx] for idx in timed)
+            self.sum_lt += sum(columns.latencies[idx] for idx in timed)
+            self.sum_rt += sum(columns.r_times[idx] for idx in timed)
+
+        errors = columns.errors
+        failed = 0
+        for idx in indexes:
+            if errors[idx] is not None:
+                failed += 1
+                r_code = r_codes[rc_ids[idx]] if rc_ids[idx] >= 0 else None
+                item = self.error_item_skel(errors[idx], r_code, 1, KPISet.ERRTYPE_ERROR, Counter())
+                self.inc_error(item, is_copy=False)
+        self[self.FAILURES] += failed
+        self[self.SUCCESSES] += len(indexes) - failed
+
+        r_times = columns.r_times
+        if self.rtimes_precision:
+            self[self.RESP_TIMES].update(self.rt_bucket(r_times[idx], self.rtimes_precision) for idx in indexes)
+        else:
+            self[self.RESP_TIMES].update(r_times[idx] for idx in indexes)
+
+        self[self.BYTE_COUNT] += sum(columns.byte_counts[idx] for idx in indexes)
+
     @staticmethod
-    def inc_list(values, selector, value):
+    def error_key(item):
         """
-        Increment list item, based on selector criteria
+        Errors are aggregated by message, response code and type
 
-        :param values: list to update
-        :param selector: tuple of 2 values, field name and value to match
-        :param value: dict to put into list
-        :type values: list[dict]
-        :type selector: tuple
-        :type value: dict
+        :type item: dict
+        :rtype: tuple
         """
-        found = False
-        for item in values:
-            if item[selector[0]] == selector[1]:
-                item['cnt'] += value['cnt']
-                item['urls'] += value['urls']
-                found = True
-                break
+        return item['msg'], item['rc'], item['type']
+
+    def inc_error(self, value, is_copy=True):
+        """
+        Add error item into errors list, incrementing existing item with same key.
+        Takes O(1) thanks to index, which is rebuilt if errors list was replaced.
+        If there is `errors_len` distinct errors already, new ones are counted as other errors.
 
-        if not found:
-            values.append(copy.deepcopy(value))
+        :param value: error item, see error_item_skel()
+        :param is_copy: put copy of value into list, if no such error yet
+        :type value: dict
+        """
+        errors, index = self._errors_index
+        if errors is not self[self.ERRORS]:
+            if not isinstance(self[self.ERRORS], list):
+                self[self.ERRORS] = list(self[self.ERRORS])
+            errors = self[self.ERRORS]
+            index = {self.error_key(item): item for item in errors}
+            self._errors_index = (errors, index)
+
+        key = self.error_key(value)
+        item = index.get(key)
+        if item is not None:
+            item['cnt'] += value['cnt']
+            item['urls'] += value['urls']
+        elif self.errors_len is not None and len(index) >= self.errors_len:
+            self[self.OTHER_ERRORS] += value['cnt']
+        else:
+            item = copy.deepcopy(value) if is_copy else value
+            index[key] = item
+            errors.append(item)
 
     def recalculate(self):
         """
@@ -176,22 +261,47 @@ class KPISet(BetterDict):
         if len(self._concurrencies):
             self[self.CONCURRENCY] = sum(self._concurrencies.values())
 
-        perc, stdev = self.__perc_and_stdev(self[self.RESP_TIMES], self.perc_levels, self[self.AVG_RESP_TIME])
+        perc, stdev = self.__perc_and_stdev(self.__sorted_rtimes(), self.perc_levels, self[self.AVG_RESP_TIME])
         for level, val in perc:
             self[self.PERCENTILES][str(float(level))] = val
 
         self[self.STDEV_RESP_TIME] = stdev
+        self._recalc_needed = False
 
         return self
 
+    def recalculate_if_needed(self):
+        """
+        Recalculate only if samples or other KPISets were added since last recalculation
+        """
+        if self._recalc_needed:
+            self.recalculate()
+        return self
+
+    def __sorted_rtimes(self):
+        """
+        Response times and their counts, sorted by response time. Order of times known
+        from previous call is reused, so only new times are sorted into it.
+
+        :rtype: list[(float, int)]
+        """
+        times = self[self.RESP_TIMES]
+        keys = [key for key in self._sorted_rtimes if key in times]
+        if len(keys) < len(times):
+            keys.extend(sorted(set(times).difference(keys)))
+            keys.sort()  # two sorted runs now, timsort merges them in linear time
+        self._sorted_rtimes = keys
+        return [(key, times[key]) for key in keys]
+
     def compact_times(self):
-        if not self.rtimes_len:
+        if not self.rtimes_len or self.rtimes_precision:  # histogram mode has fixed size already
             return
 
         times = self[KPISet.RESP_TIMES]
         redundant_cnt = len(times) - self.rtimes_len
         if redundant_cnt > 0:
             logging.debug("Compacting %s response timing into %s", len(times), self.rtimes_len)
+            self._recalc_needed = True
 
         while redundant_cnt > 0:
             keys = sorted(times.keys())
@@ -228,7 +338,8 @@ class KPISet(BetterDict):
         :type src: KPISet
         :return:
         """
-        src.recalculate()
+        src.recalculate_if_needed()
+        self._recalc_needed = True
 
         self.sum_cn += src.sum_cn
         self.sum_lt += src.sum_lt
@@ -244,7 +355,11 @@ class KPISet(BetterDict):
 
         if src[self.RESP_TIMES]:
             # using raw times to calculate percentiles
-            self[self.RESP_TIMES].update(src[self.RESP_TIMES])
+            if not self.rtimes_precision or self.rtimes_precision == src.rtimes_precision:
+                self[self.RESP_TIMES].update(src[self.RESP_TIMES])
+            else:
+                for r_time, count in iteritems(src[self.RESP_TIMES]):
+                    self[self.RESP_TIMES][self.rt_bucket(r_time, self.rtimes_precision)] += count
             self.compact_times()
         elif not self[self.PERCENTILES]:
             # using existing percentiles
@@ -254,7 +369,8 @@ class KPISet(BetterDict):
         self[self.RESP_CODES].update(src[self.RESP_CODES])
 
         for src_item in src[self.ERRORS]:
-            self.inc_list(self[self.ERRORS], ('msg', src_item['msg']), src_item)
+            self.inc_error(src_item)
+        self[self.OTHER_ERRORS] += src.get(self.OTHER_ERRORS, 0)
 
     @staticmethod
     def from_dict(obj):
@@ -275,27 +391,50 @@ class KPISet(BetterDict):
             error['urls'] = Counter(error['urls'])
         return inst
 
+    def to_compact(self):
+        """
+        Compact picklable form of KPISet, to pass it between processes
+
+        :rtype: tuple
+        """
+        return dict(self), (self.sum_rt, self.sum_lt, self.sum_cn), dict(self._concurrencies), self._sorted_rtimes, \
+            self._recalc_needed
+
+    def fill_compact(self, compact):
+        """
+        Load KPIs from compact form made by to_compact(), settings of this KPISet are kept
+
+        :type compact: tuple
+        :rtype: KPISet
+        """
+        values, sums, concurrencies, sorted_rtimes, recalc_needed = compact
+        self.update(values)
+        self.sum_rt, self.sum_lt, self.sum_cn = sums
+        self._concurrencies.update(concurrencies)
+        self._sorted_rtimes = sorted_rtimes
+        self._recalc_needed = recalc_needed
+        return self
+
     @staticmethod
-    def __perc_and_stdev(cnts_dict, percentiles_to_calc=(), avg=0):
+    def __perc_and_stdev(cnts, percentiles_to_calc=(), avg=0):
         """
         from http://stackoverflow.com/questions/25070086/percentiles-from-counts-of-values
         Returns [(percentile, value)] with nearest rank percentiles.
         Percentile 0: <min_value>, 100: <max_value>.
-        cnts_dict: { <value>: <count> }
+        cnts: [(<value>, <count>)], sorted by value
         percentiles_to_calc: iterable for percentiles to calculate; 0 <= ~ <= 100
 
         upd: added stdev calc to have it in single-pass for mans of efficiency
 
         :type percentiles_to_calc: list(float)
-        :type cnts_dict: collections.Counter
+        :type cnts: list[(float, int)]
         """
         assert all(0 <= percentile <= 100 for percentile in percentiles_to_calc)
         percentiles = []
-        if not cnts_dict:
+        if not cnts:
             return percentiles, 0
 
-        num = sum(cnts_dict.values())
-        cnts = sorted(cnts_dict.items())
+        num = sum(cnt for _, cnt in cnts)
         curr_cnts_pos = 0  # current position in cnts
         curr_pos = cnts[0][1]  # sum of freqs up to current_cnts_pos
 
@@ -321,6 +460,163 @@ class KPISet(BetterDict):
         return percentiles, stdev
 
 
+class SampleColumns(object):
+    """
+    Columnar storage for samples of a single second: numeric values are kept
+    in typed arrays, labels and response codes are interned into integer ids
+    """
+
+    def __init__(self):
+        self.labels = []
+        self.r_codes = []
+        self._label_ids = {}
+        self._rc_ids = {}
+        self.label_ids = array('i')
+        self.rc_ids = array('i')  # -1 means no response code
+        self.r_times = array('d')
+        self.con_times = array('d')
+        self.latencies = array('d')
+        self.byte_counts = array('l' if PY2 else 'q')  # python 2 has no 'q' typecode
+        self.concurrencies = []
+        self.errors = []
+        self.trnames = []
+
+    def __len__(self):
+        return len(self.label_ids)
+
+    def extend(self, samples):
+        """
+        Add batch of samples into columns, same tuple format as used in list buffer
+
+        :type samples: list[tuple]
+        """
+        if not samples:
+            return
+
+        labels, concurrencies, r_times, con_times, latencies, r_codes, errors, trnames, byte_counts = zip(*samples)
+
+        label_ids = self._label_ids
+        for label in OrderedDict.fromkeys(labels):
+            if label not in label_ids:
+                label_ids[label] = len(self.labels)
+                self.labels.append(label)
+        self.label_ids.extend([label_ids[label] for label in labels])
+
+        rc_ids = self._rc_ids
+        for r_code in OrderedDict.fromkeys(r_codes):
+            if r_code is not None and r_code not in rc_ids:
+                rc_ids[r_code] = len(self.r_codes)
+                self.r_codes.append(r_code)
+        self.rc_ids.extend([-1 if r_code is None else rc_ids[r_code] for r_code in r_codes])
+
+        self.r_times.extend(r_times)
+        self.con_times.extend([con_time or 0 for con_time in con_times])
+        self.latencies.extend([latency or 0 for latency in latencies])
+        self.byte_counts.extend([int(byte_count or 0) for byte_count in byte_counts])
+        self.concurrencies.extend(concurrencies)
+        self.errors.extend(errors)
+        self.trnames.extend(trnames)
+
+    def add(self, label, concurrency, r_time, con_time, latency, r_code, error, trname, byte_count):
+        """
+        Add single sample, for readers that parse samples straight into columns
+        """
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        self.label_ids.append(label_id)
+
+        if r_code is None:
+            rc_id = -1
+        else:
+            rc_id = self._rc_ids.get(r_code)
+            if rc_id is None:
+                rc_id = self._rc_ids[r_code] = len(self.r_codes)
+                self.r_codes.append(r_code)
+        self.rc_ids.append(rc_id)
+
+        self.r_times.append(r_time)
+        self.con_times.append(con_time or 0)
+        self.latencies.append(latency or 0)
+        self.byte_counts.append(int(byte_count or 0))
+        self.concurrencies.append(concurrency)
+        self.errors.append(error)
+        self.trnames.append(trname)
+
+    def label_groups(self):
+        """
+        Group sample indexes by label
+
+        :rtype: list[(str, list[int])]
+        """
+        groups = [[] for _ in self.labels]
+        for idx, label_id in enumerate(self.label_ids):
+            groups[label_id].append(idx)
+        return list(zip(self.labels, groups))
+
+
+class TopLabels(object):
+    """
+    Streaming top-K labels tracker. Up to `size` heaviest labels are tracked
+    with exact sample counts, counts of the rest are estimated with count-min sketch.
+    Tail label replaces the lightest tracked one once its estimated count exceeds it.
+
+    :type size: int
+    """
+
+    def __init__(self, size, sketch_width=1024, sketch_depth=4):
+        self.size = size
+        self.counts = {}
+        self.sketch = [array('L', [0] * sketch_width) for _ in range(sketch_depth)]
+
+    def __sketch_add(self, label, count):
+        """
+        Add count to label in sketch, return estimated total count of label
+
+        :rtype: int
+        """
+        estimate = None
+        for row_num, row in enumerate(self.sketch):
+            idx = hash((row_num, label)) % len(row)
+            row[idx] += count
+            estimate = row[idx] if estimate is None else min(estimate, row[idx])
+        return estimate
+
+    def update(self, label_counts):
+        """
+        Count samples of labels, promote heavy tail labels into tracked ones
+
+        :param label_counts: sample count for each label
+        :type label_counts: dict
+        :return: labels that were tracked before and got demoted
+        :rtype: list
+        """
+        demoted = []
+        lightest = None
+        for label, count in iteritems(label_counts):
+            if label in self.counts:
+                self.counts[label] += count
+                if label == lightest:
+                    lightest = None
+            elif len(self.counts) < self.size:
+                self.counts[label] = count
+            else:
+                estimate = self.__sketch_add(label, count)
+                if lightest is None:
+                    lightest = min(self.counts, key=self.counts.get)
+                if estimate > self.counts[lightest]:
+                    self.__sketch_add(lightest, self.counts.pop(lightest))
+                    demoted.append(lightest)
+                    self.counts[label] = estimate
+                    lightest = None
+
+        return demoted
+
+    def __contains__(self, label):
+        return label in self.counts
+
+
 class DataPoint(BetterDict):
     """
     Represents an aggregate data poing
@@ -341,6 +637,7 @@ class DataPoint(BetterDict):
         :type perc_levels: list[float]
         """
         super(DataPoint, self).__init__()
+        self._recalc_needed = False
         self.perc_levels = perc_levels
         self[self.SOURCE_ID] = None
         self[self.TIMESTAMP] = ts
@@ -354,6 +651,16 @@ class DataPoint(BetterDict):
             new[key] = copy.deepcopy(self[key], memo)
         return new
 
+    def __getitem__(self, key):
+        if self._recalc_needed:
+            self.recalculate()
+        return super(DataPoint, self).__getitem__(key)
+
+    def get(self, key, default=defaultdict):
+        if self._recalc_needed:
+            self.recalculate()
+        return super(DataPoint, self).get(key, default)
+
     def __merge_kpis(self, src, dst, sid):
         """
         :param src: KPISet
@@ -362,47 +669,56 @@ class DataPoint(BetterDict):
         :return:
         """
         for label, val in iteritems(src):
-            dest = dst.get(label, KPISet(self.perc_levels))
             if not isinstance(val, KPISet):
                 val = KPISet.from_dict(val)
                 val.perc_levels = self.perc_levels
+            dest = dst.get(label, KPISet(self.perc_levels, val.rtimes_len, val.rtimes_precision, val.errors_len))
             dest.merge_kpis(val, sid)
 
     def recalculate(self):
         """
-        Recalculate all KPISet's
+        Recalculate KPISet's changed since their last recalculation
         """
+        self._recalc_needed = False
         for val in self[self.CURRENT].values():
-            val.recalculate()
+            val.recalculate_if_needed()
 
         for val in self[self.CUMULATIVE].values():
-            val.recalculate()
+            val.recalculate_if_needed()
 
-    def merge_point(self, src):
+    def merge_point(self, src, cumulative=True):
         """
 
+        Merge other point into this one, KPISets are recalculated lazily, on first read of this point
+
         :type src: DataPoint
+        :param cumulative: merge cumulative KPISets too, not needed if cumulative is built from current
+        :type cumulative: bool
         """
-        if self[self.TIMESTAMP] != src[self.TIMESTAMP]:
+        own = super(DataPoint, self).__getitem__  # don't trigger recalculation while merging
+        if own(self.TIMESTAMP) != src[self.TIMESTAMP]:
             msg = "Cannot merge different timestamps (%s and %s)"
-            raise TaurusInternalException(msg % (self[self.TIMESTAMP], src[self.TIMESTAMP]))
+            raise TaurusInternalException(msg % (own(self.TIMESTAMP), src[self.TIMESTAMP]))
 
-        self[DataPoint.SUBRESULTS].append(src)
+        own(DataPoint.SUBRESULTS).append(src)
 
-        self.__merge_kpis(src[self.CURRENT], self[self.CURRENT], src[DataPoint.SOURCE_ID])
-        self.__merge_kpis(src[self.CUMULATIVE], self[self.CUMULATIVE], src[DataPoint.SOURCE_ID])
+        self.__merge_kpis(src[self.CURRENT], own(self.CURRENT), src[DataPoint.SOURCE_ID])
+        if cumulative:
+            self.__merge_kpis(src[self.CUMULATIVE], own(self.CUMULATIVE), src[DataPoint.SOURCE_ID])
 
-        self.recalculate()
+        self._recalc_needed = True
 
 
 class ResultsProvider(object):
     """
     :type listeners: list[AggregatorListener]
     """
+    OTHER_LABEL = "[other]"
 
     def __init__(self):
         super(ResultsProvider, self).__init__()
         self.cumulative = BetterDict()
+        self._cumulative_snapshot = BetterDict()
         self.track_percentiles = []
         self.listeners = []
         self.buffer_len = 2
@@ -411,6 +727,10 @@ class ResultsProvider(object):
         self.buffer_multiplier = 2
         self.buffer_scale_idx = None
         self.rtimes_len = None
+        self.rtimes_precision = None
+        self.errors_len = None
+        self.max_labels = None
+        self.top_labels = None
 
     def add_listener(self, listener):
         """
@@ -420,16 +740,66 @@ class ResultsProvider(object):
         """
         self.listeners.append(listener)
 
+    def __new_cumulative(self):
+        """
+        :rtype: KPISet
+        """
+        return KPISet(self.track_percentiles, self.rtimes_len, self.rtimes_precision, self.errors_len)
+
+    def __fold_labels(self, current):
+        """
+        Fold labels out of top `max_labels` into OTHER_LABEL, both in current and cumulative
+
+        :param current: KPISets of current datapoint
+        :return: labels demoted from cumulative
+        :rtype: list
+        """
+        if self.top_labels is None:
+            self.top_labels = TopLabels(self.max_labels)
+
+        label_counts = OrderedDict((label, kpiset[KPISet.SAMPLE_COUNT]) for label, kpiset in iteritems(current)
+                                   if label not in ('', self.OTHER_LABEL))
+        demoted = self.top_labels.update(label_counts)
+        for label in demoted:
+            logging.debug("Folding label into %s: %s", self.OTHER_LABEL, label)
+            if label in self.cumulative:
+                self.cumulative.get(self.OTHER_LABEL, self.__new_cumulative()).merge_kpis(self.cumulative.pop(label))
+
+        for label in label_counts:
+            if label not in self.top_labels:
+                other = current.get(self.OTHER_LABEL, KPISet(self.track_percentiles, rt_precision=self.rtimes_precision,
+                                                             errors_maxlen=self.errors_len))
+                other.merge_kpis(current.pop(label))
+
+        return demoted
+
     def __merge_to_cumulative(self, current):
         """
-        Merge current KPISet to cumulative
+        Merge current KPISet to cumulative, return immutable snapshot of cumulative results.
+        Snapshot shares copies of labels not changed by current KPISet with previous snapshot.
+
         :param current: KPISet
+        :rtype: BetterDict
         """
+        demoted = self.__fold_labels(current) if self.max_labels else []
+
+        snapshot = BetterDict()
+        snapshot.update(self._cumulative_snapshot)
+        for label in demoted:
+            snapshot.pop(label, None)
+
+        if demoted and self.OTHER_LABEL in self.cumulative and self.OTHER_LABEL not in current:
+            snapshot[self.OTHER_LABEL] = copy.deepcopy(self.cumulative[self.OTHER_LABEL].recalculate())
+
         for label, data in iteritems(current):
-            cumul = self.cumulative.get(label, KPISet(self.track_percentiles, self.rtimes_len))
+            cumul = self.cumulative.get(label, self.__new_cumulative())
             cumul.merge_kpis(data)
             cumul.compact_times()
             cumul.recalculate()
+            snapshot[label] = copy.deepcopy(cumul)
+
+        self._cumulative_snapshot = snapshot
+        return snapshot
 
     def datapoints(self, final_pass=False):
         """
@@ -439,8 +809,7 @@ class ResultsProvider(object):
         """
         for datapoint in self._calculate_datapoints(final_pass):
             current = datapoint[DataPoint.CURRENT]
-            self.__merge_to_cumulative(current)
-            datapoint[DataPoint.CUMULATIVE] = copy.deepcopy(self.cumulative)
+            datapoint[DataPoint.CUMULATIVE] = self.__merge_to_cumulative(current)
             datapoint.recalculate()
 
             for listener in self.listeners:
@@ -466,6 +835,7 @@ class ResultsReader(ResultsProvider):
         # (re.compile(r"\b[0-9a-fA-F]{32}\b"), "U"), # implied by previous, maybe prev is too wide
         (re.compile(r"\b\d{2,}\b"), "N")
     ]
+    GENERALIZED_CACHE_SIZE = 10000
 
     def __init__(self, perc_levels=()):
         super(ResultsReader, self).__init__()
@@ -473,8 +843,12 @@ class ResultsReader(ResultsProvider):
         self.ignored_labels = []
         self.log = logging.getLogger(self.__class__.__name__)
         self.buffer = {}
+        self.columnar_buffer = False
+        self.__generalized_labels = {}
         self.min_timestamp = 0
         self.track_percentiles = perc_levels
+        self.aggregation_pool = None
+        self.__dispatched = deque()
 
     def __process_readers(self, final_pass=False):
         """
@@ -482,6 +856,9 @@ class ResultsReader(ResultsProvider):
         :param final_pass: True if in post-process stage
         :return:
         """
+        if self.columnar_buffer and self._read_columns(final_pass):
+            return
+
         for result in self._read(final_pass):
             if result is None:
                 self.log.debug("No data from reader")
@@ -491,6 +868,12 @@ class ResultsReader(ResultsProvider):
 
                 if label in self.ignored_labels:
                     continue
+
+                if self.columnar_buffer:
+                    self._sample_columns(t_stamp).add(label, conc, r_time, con_time, latency, r_code, error,
+                                                      trname, byte_count)
+                    continue
+
                 if t_stamp < self.min_timestamp:
                     self.log.debug("Putting sample %s into %s", t_stamp, self.min_timestamp)
                     t_stamp = self.min_timestamp
@@ -501,6 +884,30 @@ class ResultsReader(ResultsProvider):
             else:
                 raise TaurusInternalException("Unsupported results from %s reader: %s" % (self, result))
 
+    def _read_columns(self, final_pass=False):
+        """
+        Read samples straight into columnar buffer with _sample_columns(), skipping ignored labels.
+        Readers that can do it without building tuple per sample override this method.
+
+        :type final_pass: bool
+        :return: False if samples have to be taken from _read()
+        """
+        return False
+
+    def _sample_columns(self, t_stamp):
+        """
+        Columnar buffer of that second, samples of seconds already aggregated go to the earliest one that isn't
+
+        :type t_stamp: int
+        :rtype: SampleColumns
+        """
+        if t_stamp < self.min_timestamp:
+            t_stamp = self.min_timestamp
+        columns = self.buffer.get(t_stamp)
+        if columns is None:
+            columns = self.buffer[t_stamp] = SampleColumns()
+        return columns
+
     def __aggregate_current(self, datapoint, samples):
         """
         :param datapoint: DataPoint
@@ -508,6 +915,10 @@ class ResultsReader(ResultsProvider):
         :return:
         """
         current = datapoint[DataPoint.CURRENT]
+        if isinstance(samples, SampleColumns):
+            self.__aggregate_columns(current, samples)
+            samples = []
+
         for sample in samples:
             label, r_time, concur, con_time, latency, r_code, error, trname, byte_count = sample
             if label == '':
@@ -519,16 +930,37 @@ class ResultsReader(ResultsProvider):
             if label in current:
                 label = current[label]
             else:
-                label = current.get(label, KPISet(self.track_percentiles))
+                label = current.get(label, self.__new_kpiset())
 
             # empty means overall
             label.add_sample((r_time, concur, con_time, latency, r_code, error, trname, byte_count))
-        overall = KPISet(self.track_percentiles)
+        overall = self.__new_kpiset()
         for label in current.values():
             overall.merge_kpis(label, datapoint[DataPoint.SOURCE_ID])
         current[''] = overall
         return current
 
+    def __new_kpiset(self):
+        """
+        :rtype: KPISet
+        """
+        return KPISet(self.track_percentiles, rt_precision=self.rtimes_precision, errors_maxlen=self.errors_len)
+
+    def __aggregate_columns(self, current, columns):
+        """
+        :type current: BetterDict
+        :type columns: SampleColumns
+        """
+        for label, indexes in columns.label_groups():
+            if label == '':
+                label = '[empty]'
+
+            if self.generalize_labels:
+                label = self.__generalize_label(label)
+
+            kpiset = current.get(label, self.__new_kpiset())
+            kpiset.add_columns(columns, indexes)
+
     def _calculate_datapoints(self, final_pass=False):
         """
         A generator to read available datapoints
@@ -536,6 +968,49 @@ class ResultsReader(ResultsProvider):
         :type final_pass: bool
         :rtype: DataPoint
         """
+        if self.aggregation_pool is None:
+            for timestamp, samples in self.__ready_seconds(final_pass):
+                yield self._aggregate_second(timestamp, samples)
+            return
+
+        if not self.__dispatched:
+            self.dispatch_seconds(final_pass)
+
+        while self.__dispatched:
+            timestamp, result = self.__dispatched.popleft()
+            datapoint = self.__get_new_datapoint(timestamp)
+            current = datapoint[DataPoint.CURRENT]
+            for label, compact in iteritems(result.get()):
+                current[label] = self.__new_kpiset().fill_compact(compact)
+            yield datapoint
+
+    def dispatch_seconds(self, final_pass=False):
+        """
+        Read available samples and send complete seconds to aggregation pool,
+        their datapoints are taken in order by next _calculate_datapoints() call
+
+        :type final_pass: bool
+        """
+        settings = (tuple(self.track_percentiles), self.rtimes_precision, self.errors_len, self.generalize_labels)
+        for timestamp, samples in self.__ready_seconds(final_pass):
+            result = self.aggregation_pool.apply_async(aggregate_second, (settings, timestamp, samples))
+            self.__dispatched.append((timestamp, result))
+
+    def _aggregate_second(self, timestamp, samples):
+        """
+        :rtype: DataPoint
+        """
+        datapoint = self.__get_new_datapoint(timestamp)
+        self.__aggregate_current(datapoint, samples)
+        return datapoint
+
+    def __ready_seconds(self, final_pass=False):
+        """
+        Read available samples, pop complete seconds from buffer
+
+        :type final_pass: bool
+        :rtype: list[(int, list)]
+        """
         self.__process_readers(final_pass)
 
         self.log.debug("Buffer len: %s", len(self.buffer))
@@ -557,10 +1032,7 @@ class ResultsReader(ResultsProvider):
             timestamp = timestamps.pop(0)
             self.min_timestamp = timestamp + 1
             self.log.debug("Aggregating: %s", timestamp)
-            samples = self.buffer.pop(timestamp)
-            datapoint = self.__get_new_datapoint(timestamp)
-            self.__aggregate_current(datapoint, samples)
-            yield datapoint
+            yield timestamp, self.buffer.pop(timestamp)
 
             if not timestamps:
                 break
@@ -585,10 +1057,49 @@ class ResultsReader(ResultsProvider):
         yield
 
     def __generalize_label(self, label):
-        for regexp, replacement in self.label_generalize_regexps:
-            label = regexp.sub(replacement, label)
+        generalized = self.__generalized_labels.get(label)
+        if generalized is None:
+            if len(self.__generalized_labels) >= self.GENERALIZED_CACHE_SIZE:
+                self.__generalized_labels.clear()
+
+            generalized = label
+            for regexp, replacement in self.label_generalize_regexps:
+                generalized = regexp.sub(replacement, generalized)
+            self.__generalized_labels[label] = generalized
+
+        return generalized
+
+
+class _SecondAggregator(ResultsReader):
+    """
+    Reader-less aggregator of samples, used by aggregation pool workers
+    """
+
+    def _read(self, final_pass=False):
+        return []
+
 
-        return label
+_worker_aggregators = {}
+
+
+def aggregate_second(settings, timestamp, samples):
+    """
+    Aggregate samples of single second in aggregation pool worker
+
+    :param settings: percentiles, rt precision, errors limit and labels generalization of reader
+    :type settings: tuple
+    :type timestamp: int
+    :return: compact KPISets by label
+    :rtype: dict
+    """
+    if settings not in _worker_aggregators:  # keep generalized labels cache between seconds
+        aggregator = _SecondAggregator(list(settings[0]))
+        aggregator.rtimes_precision, aggregator.errors_len, aggregator.generalize_labels = settings[1:]
+        _worker_aggregators[settings] = aggregator
+
+    datapoint = _worker_aggregators[settings]._aggregate_second(timestamp, samples)
+    datapoint.recalculate()
+    return {label: kpiset.to_compact() for label, kpiset in iteritems(datapoint[DataPoint.CURRENT])}
 
 
 class ConsolidatingAggregator(Aggregator, ResultsProvider):
@@ -602,10 +1113,13 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
         Aggregator.__init__(self, is_functional=False)
         ResultsProvider.__init__(self)
         self.generalize_labels = False
+        self.columnar_buffer = False
         self.ignored_labels = []
         self.underlings = []
         self.buffer = BetterDict()
         self.rtimes_len = 1000
+        self.parallel_aggregation = False
+        self.__pool = None
 
     def prepare(self):
         """
@@ -622,6 +1136,8 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
 
         self.ignored_labels = self.settings.get("ignore-labels", self.ignored_labels)
         self.generalize_labels = self.settings.get("generalize-labels", self.generalize_labels)
+        self.columnar_buffer = self.settings.get("columnar-buffer", self.columnar_buffer)
+        self.parallel_aggregation = self.settings.get("parallel-aggregation", self.parallel_aggregation)
 
         self.min_buffer_len = dehumanize_time(self.settings.get("min-buffer-len", self.min_buffer_len))
 
@@ -650,6 +1166,11 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
         debug_str = 'Buffer scaling setup: percentile %s from %s selected'
         self.log.debug(debug_str, self.buffer_scale_idx, self.track_percentiles)
         self.rtimes_len = self.settings.get("rtimes-len", self.rtimes_len)
+        self.rtimes_precision = self.settings.get("rtimes-precision", self.rtimes_precision)
+        if self.rtimes_precision is not None and not (0 < int(self.rtimes_precision) < 16):
+            raise TaurusConfigError("Wrong 'rtimes-precision' value: %s" % self.rtimes_precision)
+        self.errors_len = self.settings.get("errors-len", self.errors_len)
+        self.max_labels = self.settings.get("max-labels", self.max_labels)
 
     def add_underling(self, underling):
         """
@@ -661,11 +1182,15 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
         if isinstance(underling, ResultsReader):
             underling.ignored_labels = self.ignored_labels
             underling.generalize_labels = self.generalize_labels
+            underling.columnar_buffer = self.columnar_buffer
             underling.min_buffer_len = self.min_buffer_len
             underling.max_buffer_len = self.max_buffer_len
             underling.buffer_multiplier = self.buffer_multiplier
             underling.buffer_scale_idx = self.buffer_scale_idx
             underling.rtimes_len = self.rtimes_len
+            underling.rtimes_precision = self.rtimes_precision
+            underling.errors_len = self.errors_len
+            underling.max_labels = self.max_labels
 
         self.underlings.append(underling)
 
@@ -684,10 +1209,37 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
         Process all remaining aggregate data
         """
         super(ConsolidatingAggregator, self).post_process()
-        for point in self.datapoints(True):
-            self.log.debug("Processed datapoint: %s/%s", point[DataPoint.TIMESTAMP], point[DataPoint.SOURCE_ID])
+        try:
+            for point in self.datapoints(True):
+                self.log.debug("Processed datapoint: %s/%s", point[DataPoint.TIMESTAMP], point[DataPoint.SOURCE_ID])
+        finally:
+            if self.__pool:
+                self.__pool.close()
+                self.__pool.join()
+                self.__pool = None
+                for underling in self.underlings:
+                    if isinstance(underling, ResultsReader):
+                        underling.aggregation_pool = None
+
+    def __get_pool(self):
+        """
+        :rtype: multiprocessing.pool.Pool
+        """
+        if not self.__pool:
+            workers = None if self.parallel_aggregation is True else int(self.parallel_aggregation)
+            self.log.debug("Starting aggregation pool of %s processes", workers or multiprocessing.cpu_count())
+            self.__pool = multiprocessing.Pool(workers)
+        return self.__pool
 
     def _process_underlings(self, final_pass):
+        if self.parallel_aggregation:
+            # send seconds of all readers to pool first, so they are aggregated simultaneously
+            pool = self.__get_pool()
+            for underling in self.underlings:
+                if isinstance(underling, ResultsReader):
+                    underling.aggregation_pool = pool
+                    underling.dispatch_seconds(final_pass)
+
         for underling in self.underlings:
             for data in underling.datapoints(final_pass):
                 tstamp = data[DataPoint.TIMESTAMP]
@@ -718,8 +1270,8 @@ class ConsolidatingAggregator(Aggregator, ResultsProvider):
             point = DataPoint(tstamp, self.track_percentiles)
             for subresult in points_to_consolidate:
                 self.log.debug("Merging %s", subresult[DataPoint.TIMESTAMP])
-                point.merge_point(subresult)
-            point.recalculate()
+                # cumulative of consolidated point is a snapshot of own merged currents, see datapoints()
+                point.merge_point(subresult, cumulative=False)
             yield point
 
 
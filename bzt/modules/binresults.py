@@ -0,0 +1,220 @@
+"""
+Compact binary format for results samples
+
+Copyright 2017 BlazeMeter Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import logging
+import mmap
+import os
+import struct
+import sys
+from optparse import OptionParser
+
+from bzt import TaurusInternalException
+from bzt.modules.jmeter import JTLReader
+from bzt.utils import get_full_path
+
+MAGIC = b"BZTKPI01"
+
+STRING_RECORD = b"S"
+SAMPLE_RECORD = b"R"
+
+# kind, length; followed by utf-8 encoded bytes
+STRING = struct.Struct("<cI")
+# kind, timestamp, label, concurrency, rt, cnn, lat, rc, error, trname, bytes
+SAMPLE = struct.Struct("<cqiidddiiiq")
+
+NONE_ID = -1
+
+
+class BinaryResultsWriter(object):
+    """
+    Writes samples as fixed-width records, strings (labels, codes, errors)
+    are written once and then referenced by their sequential ids
+
+    :type filename: str
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.fds = None
+        self.strings = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __open_fds(self):
+        self.fds = open(self.filename, 'wb')
+        self.fds.write(MAGIC)
+
+    def __string_id(self, value):
+        if value is None:
+            return NONE_ID
+
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+            data = value.encode('utf-8')
+            self.fds.write(STRING.pack(STRING_RECORD, len(data)))
+            self.fds.write(data)
+
+        return self.strings[value]
+
+    def add(self, sample):
+        """
+        :param sample: tuple of (timestamp, label, concurrency, rt, cnn, lat, rc, error, trname, byte_count)
+        """
+        if not self.fds:
+            self.__open_fds()
+
+        tstmp, label, concur, rtm, cnn, ltc, rcd, error, trname, byte_count = sample
+        record = SAMPLE.pack(SAMPLE_RECORD, tstmp, self.__string_id(label), concur or 0,
+                             rtm, -1.0 if cnn is None else cnn, ltc,
+                             self.__string_id(rcd), self.__string_id(error), self.__string_id(trname),
+                             -1 if byte_count is None else byte_count)
+        self.fds.write(record)
+
+    def flush(self):
+        if self.fds:
+            self.fds.flush()
+
+    def close(self):
+        if self.fds:
+            self.fds.close()
+            self.fds = None
+
+
+class BinaryResultsReader(JTLReader):
+    """
+    Reads binary results file through memory map, decoding records in place.
+    File may grow while it's being read, incomplete records are left for the next pass.
+    Errors are taken from errors JTL the same way as JTLReader does.
+    """
+
+    def __init__(self, filename, parent_logger, errors_filename=None):
+        super(BinaryResultsReader, self).__init__(None, parent_logger, errors_filename)
+        self.csvreader = None
+        self.filename = filename
+        self.offset = 0
+        self.strings = []
+
+    def __map_file(self):
+        if not os.path.isfile(self.filename):
+            self.log.debug("File not appeared yet: %s", self.filename)
+            return None
+
+        size = os.path.getsize(self.filename)
+        if size <= self.offset or size < len(MAGIC):
+            return None
+
+        with open(self.filename, 'rb') as fds:
+            mapped = mmap.mmap(fds.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if not self.offset:
+            if mapped[:len(MAGIC)] != MAGIC:
+                mapped.close()
+                raise TaurusInternalException("Not a binary results file: %s" % self.filename)
+            self.offset = len(MAGIC)
+
+        return mapped
+
+    def _read(self, final_pass=False):
+        if self.errors_reader:
+            self.errors_reader.read_file(final_pass)
+
+        mapped = self.__map_file()
+        if mapped is None:
+            return
+
+        strings = self.strings
+        unpack = SAMPLE.unpack_from
+        sample_size = SAMPLE.size
+        size = len(mapped)
+        offset = self.offset
+        try:
+            while offset < size:
+                kind = mapped[offset:offset + 1]
+                if kind == SAMPLE_RECORD:
+                    if offset + sample_size > size:
+                        break
+
+                    _, tstmp, label, concur, rtm, cnn, ltc, rcd, error, trname, byte_count = unpack(mapped, offset)
+                    offset += sample_size
+                    self.read_records += 1
+                    yield (tstmp, strings[label], concur, rtm, None if cnn < 0 else cnn, ltc,
+                           None if rcd == NONE_ID else strings[rcd],
+                           None if error == NONE_ID else strings[error],
+                           None if trname == NONE_ID else strings[trname],
+                           None if byte_count < 0 else byte_count)
+                elif kind == STRING_RECORD:
+                    if offset + STRING.size > size:
+                        break
+
+                    _, length = STRING.unpack_from(mapped, offset)
+                    end = offset + STRING.size + length
+                    if end > size:
+                        break
+
+                    strings.append(mapped[offset + STRING.size:end].decode('utf-8'))
+                    offset = end
+                else:
+                    raise TaurusInternalException("Malformed record at %s in %s" % (offset, self.filename))
+        finally:
+            self.offset = offset
+            mapped.close()
+
+        self.log.debug("Read binary results up to offset %s, %s records total", self.offset, self.read_records)
+
+
+def convert_jtl(jtl_filename, bin_filename, parent_logger, errors_filename=None):
+    """
+    Convert CSV JTL into binary results file
+
+    :return: number of samples written
+    """
+    reader = JTLReader(jtl_filename, parent_logger, errors_filename)
+    with BinaryResultsWriter(bin_filename) as writer:
+        for sample in reader._read(True):
+            writer.add(sample)
+
+    return reader.read_records
+
+
+def main():
+    usage = "Usage: jtl2bin [options] [input JTL file]"
+    parser = OptionParser(usage=usage, prog="jtl2bin")
+    parser.add_option('-o', '--out', dest="file_name",
+                      help="Set output binary file name, by default input file name + .bin extension is used")
+    parser.add_option('-q', '--quiet', action='store_true', default=False, dest='quiet',
+                      help="Do not display any log messages")
+    options, args = parser.parse_args()
+
+    if len(args) != 1:
+        parser.print_usage()
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.WARNING if options.quiet else logging.INFO)
+    log = logging.getLogger("jtl2bin")
+
+    jtl_filename = get_full_path(args[0])
+    bin_filename = get_full_path(options.file_name or jtl_filename + ".bin")
+    count = convert_jtl(jtl_filename, bin_filename, log)
+    log.info("Converted %s samples into %s", count, bin_filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -99,6 +99,7 @@ class BlazeMeterUploader(Reporter, AggregatorListener, MonitoringListener):
         self.client.data_address = self.settings.get("data-address", self.client.data_address)
         self.client.timeout = dehumanize_time(self.settings.get("timeout", self.client.timeout))
         self.send_interval = dehumanize_time(self.settings.get("send-interval", self.send_interval))
+        self.check_interval = self.send_interval  # nothing to do between dispatches
         self.send_monitoring = self.settings.get("send-monitoring", self.send_monitoring)
         self.send_custom_metrics = self.settings.get("send-custom-metrics", self.send_custom_metrics)
         self.send_custom_tables = self.settings.get("send-custom-tables", self.send_custom_tables)
@@ -1307,9 +1308,10 @@ class BlazeMeterClient(object):
             for dpoint in data_buffer:
                 time_stamp = dpoint[DataPoint.TIMESTAMP]
                 for label, kpi_set in iteritems(dpoint[DataPoint.CURRENT]):
-                    exc = TaurusInternalException('Cumulative KPISet non-consistent')
-                    report_item = report_items.get(label, exc)
-                    report_item['intervals'].append(self.__get_interval(kpi_set, time_stamp))
+                    if label not in report_items:  # label could be folded by aggregator's 'max-labels'
+                        self.log.debug("No cumulative KPISet for label, skipping interval: %s", label)
+                        continue
+                    report_items[label]['intervals'].append(self.__get_interval(kpi_set, time_stamp))
 
         report_items = [report_items[key] for key in sorted(report_items.keys())]  # convert dict to list
         data = {"labels": report_items, "sourceID": id(self)}
@@ -1370,7 +1372,7 @@ class BlazeMeterClient(object):
             "assertionsNotCounted": 0,  # not used
             "failedEmbeddedResources": [],  # not used
             "failedEmbeddedResourcesSpilloverCount": 0,  # not used
-            "otherErrorsCount": 0,  # not used
+            "otherErrorsCount": cumul.get(KPISet.OTHER_ERRORS, 0),  # errors over distinct errors limit
             "errors": [],  # list of errors, fill later
             "assertions": [],  # list of assertions, fill later
             "percentileHistogram": [],  # not used
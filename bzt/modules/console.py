@@ -15,6 +15,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import copy
+import logging
 import math
 import re
 import sys
@@ -27,7 +28,7 @@ from itertools import groupby, islice, chain
 from logging import StreamHandler
 
 from urwid import LineBox, ListBox, RIGHT, CENTER, BOTTOM, CLIP, GIVEN, ProgressBar
-from urwid import Text, Pile, WEIGHT, Filler, Columns, Widget, CanvasCombine
+from urwid import Text, Pile, WEIGHT, Filler, Columns, Widget, CanvasCombine, BaseScreen
 from urwid.decoration import Padding
 from urwid.font import Thin6x6Font
 from urwid.graphics import BigText
@@ -39,8 +40,46 @@ from bzt import TaurusInternalException
 from bzt.engine import Reporter
 from bzt.modules.aggregator import DataPoint, KPISet, AggregatorListener, ResultsProvider
 from bzt.modules.provisioning import Local
-from bzt.six import StringIO, numeric_types
-from bzt.utils import humanize_time, is_windows, DummyScreen
+from bzt.six import StringIO, numeric_types, iteritems
+from bzt.utils import humanize_time, is_windows
+
+
+class DummyScreen(BaseScreen):
+    """
+    Null-object for Screen on non-tty output
+    """
+
+    def __init__(self, rows=120, cols=40):
+        super(DummyScreen, self).__init__()
+        self.size = (rows, cols)
+        self.ansi_escape = re.compile(r'\x1b[^m]*m')
+
+    def get_cols_rows(self):
+        """
+        Dummy cols and rows
+
+        :return:
+        """
+        return self.size
+
+    def draw_screen(self, size, canvas):
+        """
+
+        :param size:
+        :type canvas: urwid.Canvas
+        """
+        data = ""
+        for char in canvas.content():
+            line = ""
+            for part in char:
+                if isinstance(part[2], str):
+                    line += part[2]
+                else:
+                    line += part[2].decode()
+            data += "%s│\n" % line
+        data = self.ansi_escape.sub('', data)
+        logging.info("Screen %sx%s chars:\n%s", size[0], size[1], data)
+
 
 try:
     from bzt.modules.screen import GUIScreen
@@ -71,6 +110,7 @@ class ConsoleStatusReporter(Reporter, AggregatorListener):
         self.disabled = False
         self.console = None
         self.executor_widgets = []
+        self.timings_widget = None
         self.screen = DummyScreen(self.screen_size[0], self.screen_size[1])
 
     def _get_screen(self):
@@ -134,6 +174,10 @@ class ConsoleStatusReporter(Reporter, AggregatorListener):
                 if isinstance(widget, ExecutorWidget):
                     self.executor_widgets.append(widget)
 
+        if self.settings.get("engine-timings", False):
+            self.timings_widget = EngineTimingsWidget(self.engine.timings)
+            widgets.append(self.timings_widget)
+
         self.console = TaurusConsole(widgets)
         self.screen.register_palette(self.console.palette)
 
@@ -150,6 +194,8 @@ class ConsoleStatusReporter(Reporter, AggregatorListener):
         self.__start_screen()
         for widget in self.executor_widgets:
             widget.update()
+        if self.timings_widget:
+            self.timings_widget.update()
         self.__update_screen()
         return False
 
@@ -1016,6 +1062,10 @@ class DetailedErrorString(ListBox):
 
                 self.body.append(
                     Text(("stat-txt", err_template.format(err_count, err_description)), wrap=CLIP))
+
+            other_count = overall.get('').get(KPISet.OTHER_ERRORS, 0)
+            if other_count:
+                self.body.append(Text(("stat-txt", err_template.format(other_count, "other errors")), wrap=CLIP))
         else:
             self.body.append(Text(("stat-txt", "No failures occured")))
 
@@ -1197,3 +1247,33 @@ class ExecutorWidget(Pile, PrioritizedWidget):
                     self.progress.set_text("Waiting...")
 
         self._invalidate()
+
+
+class EngineTimingsWidget(Pile, PrioritizedWidget):
+    """
+    Shows engine modules that spent most time in checks
+
+    :type timings: bzt.engine.ModuleTimings
+    """
+
+    def __init__(self, timings, limit=5):
+        self.timings = timings
+        self.limit = limit
+        self.display = Text("")
+        super(EngineTimingsWidget, self).__init__([self.display])
+        PrioritizedWidget.__init__(self, priority=30)
+
+    def update(self):
+        checks = [(label, histogram) for (label, phase), histogram in iteritems(self.timings.histograms)
+                  if phase in ("check", "loop")]
+        checks.sort(key=lambda item: item[1].total, reverse=True)
+
+        text = [('stat-hdr', " Engine Timings \n")]
+        if checks:
+            maxwidth = max(len(label) for label, _ in checks[:self.limit])
+            for label, histogram in checks[:self.limit]:
+                values = (' ' * (maxwidth - len(label)), label, histogram.average() * 1000, histogram.max * 1000)
+                text.append(('stat-txt', "  %s%s: %.1f avg, %.1f max ms\n" % values))
+
+        self.display.set_text(text)
+        self._invalidate()
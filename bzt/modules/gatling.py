@@ -27,6 +27,7 @@ from bzt.modules.console import WidgetProvider, ExecutorWidget
 from bzt.modules.services import HavingInstallableTools
 from bzt.utils import BetterDict, TclLibrary, EXE_SUFFIX, dehumanize_time, get_full_path
 from bzt.utils import unzip, shell_exec, RequiredTool, JavaVM, shutdown_process, ensure_is_dict, is_windows
+from bzt.utils import get_file_follower, get_jvm_settings, get_jvm_args
 
 
 class GatlingScriptBuilder(object):
@@ -177,6 +178,7 @@ class GatlingExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstal
         self.dir_prefix = ''
         self.launcher = None
         self.jar_list = ''
+        self.jvm_args = []
 
     def __build_launcher(self):
         modified_launcher = self.engine.create_artifact('gatling-launcher', EXE_SUFFIX)
@@ -251,11 +253,24 @@ class GatlingExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstal
             msg += "to run Gatling tool (%s)" % self.execution.get('scenario')
             raise TaurusConfigError(msg)
 
+        self.__set_jvm_args()
+
         self.dir_prefix = 'gatling-%s' % id(self)
         self.reader = DataLogReader(self.engine.artifacts_dir, self.log, self.dir_prefix)
         if isinstance(self.engine.aggregator, ConsolidatingAggregator):
             self.engine.aggregator.add_underling(self.reader)
 
+    def __set_jvm_args(self):
+        heap_size = self.settings.get("memory-xmx", None)
+        if heap_size == "auto":
+            jvm_settings = get_jvm_settings(self.get_load().concurrency,
+                                            len(self.get_scenario().get("requests", [])), self.log)
+            jvm_settings["gc"] = None  # launcher chooses collector itself, another one would conflict
+            self.execution["jvm-settings"] = jvm_settings
+            self.jvm_args = get_jvm_args(jvm_settings)
+        elif heap_size is not None:
+            self.jvm_args = ["-Xmx%s" % heap_size]
+
     def __generate_script(self):
         simulation = "TaurusSimulation_%s" % id(self)
         file_name = self.engine.create_artifact(simulation, ".scala")
@@ -295,6 +310,8 @@ class GatlingExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstal
 
         java_opts = env.get('JAVA_OPTS', '') + ' ' + self.settings.get('java-opts', '')
         java_opts += ' ' + self.__get_params_for_scala()
+        if self.jvm_args:
+            java_opts += ' ' + ' '.join(self.jvm_args)
 
         env.merge({"JAVA_OPTS": java_opts, "NO_PAUSE": "TRUE"})
 
@@ -451,6 +468,7 @@ class DataLogReader(ResultsReader):
         self.offset = 0
         self.dir_prefix = dir_prefix
         self.guessed_gatling_version = None
+        self.follower = get_file_follower()
 
     def _extract_log_gatling_21(self, fields):
         """
@@ -569,10 +587,14 @@ class DataLogReader(ResultsReader):
             self.log.debug("No data to start reading yet")
             yield None
 
+        if not last_pass and not self.follower.get_new_range(self.filename, self.offset, self.__reset):
+            return
+
         self.log.debug("Reading gatling results")
         self.fds.seek(self.offset)  # without this we have a stuck reads on Mac
         if last_pass:
             lines = self.fds.readlines()  # unlimited
+            self.follower.unfollow(self.filename)
         else:
             lines = self.fds.readlines(1024 * 1024)  # 1MB limit to read
         self.offset = self.fds.tell()
@@ -596,6 +618,12 @@ class DataLogReader(ResultsReader):
             bytes_count = None
             yield t_stamp, label, self.concurrency, r_time, con_time, latency, r_code, error, '', bytes_count
 
+    def __reset(self):
+        self.fds.close()
+        self.fds = None
+        self.offset = 0
+        self.partial_buffer = ""
+
     def __open_fds(self):
         """
         open gatling simulation.log
@@ -27,7 +27,7 @@ from bzt.modules.services import HavingInstallableTools
 from bzt.six import iteritems
 from bzt import TaurusConfigError, ToolError
 from bzt.utils import shell_exec, MirrorsManager, dehumanize_time, get_full_path, PythonGenerator
-from bzt.utils import unzip, RequiredTool, JavaVM, shutdown_process, TclLibrary
+from bzt.utils import unzip, RequiredTool, JavaVM, shutdown_process, TclLibrary, get_file_follower
 
 
 class GrinderExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstallableTools):
@@ -274,6 +274,7 @@ class DataLogReader(ResultsReader):
         self.start_time = 0
         self.end_time = 0
         self.concurrency = 0
+        self.follower = get_file_follower()
 
     def _read(self, last_pass=False):
         """
@@ -285,10 +286,14 @@ class DataLogReader(ResultsReader):
             self.log.debug("No data to start reading yet")
             yield None
 
+        if not last_pass and not self.follower.get_new_range(self.filename, self.offset, self.__reset):
+            return
+
         self.log.debug("Reading grinder results...")
         self.fds.seek(self.offset)  # without this we have a stuck reads on Mac
         if last_pass:
             lines = self.fds.readlines()  # unlimited
+            self.follower.unfollow(self.filename)
         else:
             lines = self.fds.readlines(1024 * 1024)  # 1MB limit to read
         self.offset = self.fds.tell()
@@ -313,6 +318,12 @@ class DataLogReader(ResultsReader):
             yield int(t_stamp), label, self.concurrency, r_time, con_time, \
                     latency, r_code, error_msg, source_id, bytes_count
 
+    def __reset(self):
+        self.fds.close()
+        self.fds = None
+        self.offset = 0
+        self.partial_buffer = ""
+
     def __split(self, line):
         if not line.endswith("\n"):
             self.partial_buffer += line
@@ -15,34 +15,44 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import copy
 import csv
+import errno
 import fnmatch
+import hashlib
+import hmac
 import json
 import mimetypes
+import multiprocessing
 import os
 import re
+import shutil
 import socket
 import subprocess
 import tempfile
 import time
 import traceback
-from collections import Counter, namedtuple
+import uuid
+from collections import Counter, namedtuple, OrderedDict
 from distutils.version import LooseVersion
 from math import ceil
+from multiprocessing.pool import ThreadPool
+from xml.sax.saxutils import escape as xml_escape
 
 from cssselect import GenericTranslator
 
-from bzt import TaurusConfigError, ToolError, TaurusInternalException, TaurusNetworkError
-from bzt.engine import ScenarioExecutor, Scenario, FileLister, Request, HTTPRequest
+from bzt import TaurusConfigError, ToolError, TaurusInternalException, TaurusNetworkError, VERSION
+from bzt.engine import ScenarioExecutor, Scenario, FileLister, Request, HTTPRequest, Service
 from bzt.jmx import JMX
 from bzt.modules.aggregator import ConsolidatingAggregator, ResultsReader, DataPoint, KPISet
 from bzt.modules.console import WidgetProvider, ExecutorWidget
 from bzt.modules.functional import FunctionalAggregator, FunctionalResultsReader, FunctionalSample
 from bzt.modules.services import HavingInstallableTools
-from bzt.six import iteritems, string_types, StringIO, etree, binary_type, parse, unicode_decode
-from bzt.utils import get_full_path, EXE_SUFFIX, MirrorsManager, ExceptionalDownloader, get_uniq_name
-from bzt.utils import shell_exec, ensure_is_dict, dehumanize_time, BetterDict, guess_csv_dialect
-from bzt.utils import unzip, RequiredTool, JavaVM, shutdown_process, ProgressBarContext, TclLibrary
+from bzt.six import iteritems, string_types, etree, binary_type, parse, unicode_decode
+from bzt.utils import get_full_path, EXE_SUFFIX, MirrorsManager, get_uniq_name
+from bzt.utils import shell_exec, ensure_is_dict, dehumanize_time, BetterDict, guess_csv_dialect, ComplexEncoder
+from bzt.utils import unzip, RequiredTool, JavaVM, shutdown_process, TclLibrary
+from bzt.utils import get_file_follower, get_jvm_settings, get_jvm_args, DownloadCache, download_file
 
 
 class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstallableTools):
@@ -70,6 +80,7 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         self.properties_file = None
         self.sys_properties_file = None
         self.kpi_jtl = None
+        self.kpi_bin = None
         self.log_jtl = None
         self.process = None
         self.end_time = None
@@ -78,6 +89,15 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         self.management_port = None
         self._env = {}
         self.resource_files_collector = None
+        self.results_stream = None
+        self.shards = []
+        self.engine_readers = []
+        self.plan_cache = None
+        self.plan_key = None
+        self.warm_pool = None
+        self.warm_server = None
+        self.warm_jvm_args = []
+        self.jvm_settings = None
 
     def prepare(self):
         """
@@ -88,11 +108,19 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
 
         :raise TaurusConfigError:
         """
-        self.jmeter_log = self.engine.create_artifact("jmeter", ".log")
-        self._set_remote_port()
         self.install_required_tools()
         self.distributed_servers = self.execution.get('distributed', self.distributed_servers)
+        if self.settings.get("warm-worker", False):
+            if self.distributed_servers or self.settings.get("gui", False):
+                self.log.warning("Warm worker isn't used in distributed or GUI mode")
+            else:
+                max_runs = int(self.settings.get("warm-worker-runs", WarmJMeterPool.MAX_RUNS))
+                self.warm_pool = WarmJMeterPool.get(self.engine, self.settings.get("path"), self.log, max_runs)
+
         scenario = self.get_scenario()
+        self.plan_cache = self.__get_plan_cache()
+        if self.plan_cache:
+            self.plan_key = self.__get_plan_key(scenario)
 
         is_jmx_generated = False
 
@@ -105,23 +133,186 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
             raise TaurusConfigError("You must specify either a JMX file or list of requests to run JMeter")
 
         load = self.get_load()
+        instances = self.__get_local_instances(load)
 
-        modified = self.__get_modified_jmx(self.original_jmx, load)
-        self.modified_jmx = self.__save_modified_jmx(modified, self.original_jmx, is_jmx_generated)
+        self.__prepare_instance(self.__get_shard_load(load, 0, instances), instances, is_jmx_generated)
+        for num in range(1, instances):
+            shard = JMeterExecutor()
+            shard.engine = self.engine
+            shard.settings = self.settings
+            shard.execution = self.execution
+            shard.log = self.log.getChild("shard-%s" % num)
+            shard.distributed_servers = self.distributed_servers
+            shard.original_jmx = self.original_jmx
+            shard.plan_cache = self.plan_cache
+            shard.plan_key = self.plan_key
+            shard.__prepare_instance(self.__get_shard_load(load, num, instances), instances, is_jmx_generated)
+            self.shards.append(shard)
+
+        if self.jvm_settings:  # shards keep their own settings
+            self.execution["jvm-settings"] = self.jvm_settings
+
+        if self.warm_pool:
+            self.warm_pool.attach(self, self.__starts_immediately())
+
+    def __starts_immediately(self):
+        """
+        Whether execution is started together with the run, so warm server must be ready for it
+        """
+        if self.engine.provisioning.settings.get("sequential", False) and self.warm_pool.users:
+            return False
+        return not dehumanize_time(self.execution.get("delay", 0)) and not self.execution.get("start-at", 0)
+
+    def __runs_remotely(self):
+        return bool(self.distributed_servers or self.warm_pool)
 
-        self.__set_jmeter_properties(scenario)
+    def __prepare_instance(self, load, instances, is_jmx_generated):
+        """
+        Prepare files and results reader for single JMeter process out of `instances` local ones
+        """
+        self.jmeter_log = self.engine.create_artifact("jmeter", ".log")
+        self._set_remote_port()
+
+        self.__create_result_files()
+        self.__prepare_modified_jmx(load, is_jmx_generated)
+
+        self.__set_jmeter_properties(self.get_scenario())
         self.__set_system_properties()
-        self.__set_jvm_properties()
+        self.__set_jvm_properties(load, instances)
 
-        if isinstance(self.engine.aggregator, ConsolidatingAggregator):
+        if isinstance(self.engine.aggregator, ConsolidatingAggregator) and self.kpi_bin:
+            from bzt.modules.binresults import BinaryResultsReader  # it depends on this module
+            self.reader = BinaryResultsReader(self.kpi_bin, self.log, self.log_jtl)
+            self.engine.aggregator.add_underling(self.reader)
+        elif isinstance(self.engine.aggregator, ConsolidatingAggregator):
             self.reader = JTLReader(self.kpi_jtl, self.log, self.log_jtl)
-            self.reader.is_distributed = len(self.distributed_servers) > 0
+            self.reader.is_distributed = self.__runs_remotely()
+            if self.results_stream:
+                self.reader.csvreader = self.results_stream
             self.engine.aggregator.add_underling(self.reader)
+            if self.results_stream:
+                self.__add_engine_readers()
         elif isinstance(self.engine.aggregator, FunctionalAggregator):
             self.reader = FuncJTLReader(self.log_jtl, self.log)
-            self.reader.is_distributed = len(self.distributed_servers) > 0
+            self.reader.is_distributed = self.__runs_remotely()
             self.engine.aggregator.add_underling(self.reader)
 
+    def __add_engine_readers(self):
+        """
+        Every remote engine streams its results through own connection,
+        read each of them independently so their concurrency is summed by consolidator
+        """
+        for num in range(1, len(self.distributed_servers)):
+            reader = JTLReader(None, self.log.getChild("engine-%s" % num), None)
+            reader.is_distributed = True
+            reader.errors_elsewhere = bool(self.log_jtl)
+            reader.csvreader = StreamedCSVReader(self.log, server=self.results_stream.server)
+            self.engine.aggregator.add_underling(reader)
+            self.engine_readers.append(reader)
+
+    def __get_plan_cache(self):
+        cache_dir = self.settings.get("plan-cache", False)
+        if not cache_dir:
+            return None
+
+        if cache_dir is True:
+            cache_dir = "~/.bzt/jmeter-plans"
+        return PlanCache(get_full_path(cache_dir), self.log)
+
+    def __get_plan_key(self, scenario):
+        """
+        Hash of everything but load and original script that affects modified JMX,
+        taken before preparation fills in defaults
+        """
+        settings = dict((key, val) for key, val in iteritems(self.settings)
+                        if key not in ("properties", "system-properties"))
+        return PlanCache.key(VERSION, os.getcwd(), self.engine.is_functional_mode(),
+                             scenario.data, self.execution, settings)
+
+    def __get_plan_substitutions(self):
+        """
+        Run-specific values embedded into modified JMX, they're replaced with placeholders in cache
+        """
+        values = []
+        if self.kpi_jtl:
+            values.append(("@@BZT_KPI_JTL@@", self.kpi_jtl))
+        if self.kpi_bin:
+            values.append(("@@BZT_KPI_BIN@@", self.kpi_bin))
+        if self.log_jtl:
+            values.append(("@@BZT_LOG_JTL@@", self.log_jtl))
+        if self.results_stream:
+            stream = self.results_stream
+            values.append(("@@BZT_KPI_STREAM@@", "%s %s %s" % (stream.host, stream.port, stream.token)))
+        return [(placeholder.encode('utf-8'), xml_escape(value).encode('utf-8')) for placeholder, value in values]
+
+    def __prepare_modified_jmx(self, load, is_jmx_generated):
+        key = None
+        if self.plan_cache:
+            with open(self.original_jmx, 'rb') as fds:
+                script_hash = hashlib.sha1(fds.read()).hexdigest()
+            key = PlanCache.key(self.plan_key, script_hash, load)
+            cached = self.plan_cache.get(key, ".jmx")
+            if cached is not None:
+                self.log.debug("Using cached modified JMX for load: %s", load)
+                for placeholder, value in self.__get_plan_substitutions():
+                    cached = cached.replace(placeholder, value)
+                self.modified_jmx = self.__get_modified_jmx_name(self.original_jmx, is_jmx_generated)
+                with open(self.modified_jmx, 'wb') as fds:
+                    fds.write(cached)
+                return
+
+        modified = self.__get_modified_jmx(self.original_jmx, load)
+        self.modified_jmx = self.__get_modified_jmx_name(self.original_jmx, is_jmx_generated)
+        modified.save(self.modified_jmx)
+
+        if key:
+            with open(self.modified_jmx, 'rb') as fds:
+                data = fds.read()
+            for placeholder, value in self.__get_plan_substitutions():
+                data = data.replace(value, placeholder)
+            self.plan_cache.put(key, ".jmx", data)
+
+    def __get_local_instances(self, load):
+        """
+        Count of JMeter processes to split the load between
+        """
+        instances = self.execution.get("local-instances", 1)
+        if instances == "auto":
+            instances = multiprocessing.cpu_count()
+        elif not isinstance(instances, int) or instances < 1:
+            raise TaurusConfigError("Invalid local-instances value: %s" % instances)
+
+        if instances > 1:
+            if self.__runs_remotely() or self.settings.get("gui", False):
+                self.log.warning("Running single JMeter instance because of distributed, warm worker or GUI mode")
+                return 1
+
+            if not load.concurrency:
+                self.log.warning("Concurrency must be set to split the load between local instances")
+                return 1
+
+            if instances > load.concurrency:
+                self.log.debug("Reducing local instances to concurrency: %s", load.concurrency)
+                instances = load.concurrency
+
+            self.log.info("Splitting the load between %s local JMeter instances", instances)
+
+        return instances
+
+    @staticmethod
+    def __get_shard_load(load, num, instances):
+        """
+        Part of load for instance number `num`, remainders go to first instances
+        """
+        if instances == 1:
+            return load
+
+        def share(value):
+            return value // instances + (1 if num < value % instances else 0)
+
+        return load._replace(concurrency=share(load.concurrency),
+                             throughput=share(load.throughput) if load.throughput else load.throughput)
+
     def __set_system_properties(self):
         sys_props = self.settings.get("system-properties")
         if sys_props:
@@ -130,14 +321,30 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
             JMeterExecutor.__write_props_to_file(sys_props_file, sys_props)
             self.sys_properties_file = sys_props_file
 
-    def __set_jvm_properties(self):
+    def __set_jvm_properties(self, load, instances):
         heap_size = self.settings.get("memory-xmx", None)
-        if heap_size is not None:
-            self.log.debug("Setting JVM heap size to %s", heap_size)
-            jvm_args = os.environ.get("JVM_ARGS", "")
-            if jvm_args:
-                jvm_args += ' '
-            self._env["JVM_ARGS"] = jvm_args + "-Xmx%s" % heap_size
+        if heap_size == "auto":
+            concurrency = 0 if self.__runs_remotely() else load.concurrency  # remote engines run the threads
+            self.jvm_settings = get_jvm_settings(concurrency, self.__get_samplers_count(), self.log, instances)
+            heap_args = get_jvm_args(self.jvm_settings)
+            if self.warm_pool:
+                server_settings = get_jvm_settings(load.concurrency, self.__get_samplers_count(), self.log)
+                self.warm_jvm_args = get_jvm_args(server_settings)
+        elif heap_size is not None:
+            heap_args = ["-Xmx%s" % heap_size]
+            self.warm_jvm_args = heap_args
+        else:
+            return
+
+        self.log.debug("Setting JVM heap args: %s", heap_args)
+        jvm_args = os.environ.get("JVM_ARGS", "")
+        if jvm_args:
+            jvm_args += ' '
+        self._env["JVM_ARGS"] = jvm_args + ' '.join(heap_args)
+
+    def __get_samplers_count(self):
+        with open(self.original_jmx, 'rb') as fds:
+            return len(re.findall(br'testclass="[\w.]*Sampler[\w.]*"', fds.read()))
 
     def __set_jmeter_properties(self, scenario):
         props = self.settings.get("properties")
@@ -148,6 +355,8 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         props_local.update({"jmeterengine.nongui.maxport": self.management_port})
         props_local.update({"jmeter.save.saveservice.timestamp_format": "ms"})
         props_local.update({"sampleresult.default.encoding": "UTF-8"})
+        if self.warm_pool:
+            props_local.update({"server.rmi.ssl.disable": "true"})
         props.merge(props_local)
         user_cp = self.engine.artifacts_dir
         if 'user.classpath' in props:
@@ -179,6 +388,12 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         if self.distributed_servers and not self.settings.get("gui", False):
             cmdline += ['-R%s' % ','.join(self.distributed_servers)]
 
+        if self.warm_pool:
+            self.warm_server = self.warm_pool.take(self)
+            cmdline += ['-R%s' % self.warm_server.address]
+            if self.properties_file:  # server is shared, so plan properties are sent with the plan
+                cmdline += ["-G%s" % os.path.abspath(self.properties_file)]
+
         self.start_time = time.time()
         try:
             # FIXME: muting stderr and stdout is bad
@@ -186,6 +401,9 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         except BaseException as exc:
             ToolError("%s\nFailed to start JMeter: %s" % (cmdline, exc))
 
+        for shard in self.shards:
+            shard.startup()
+
     def check(self):
         """
         Checks if JMeter is still running. Also checks if resulting JTL contains
@@ -194,12 +412,17 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         :return: bool
         :raise ToolError:
         """
+        shards_finished = True
+        for shard in self.shards:
+            shards_finished = shard.check() and shards_finished
+
         self.retcode = self.process.poll()
         if self.retcode is not None:
+            self.__release_warm_server()
             if self.retcode != 0:
                 raise ToolError("JMeter exited with non-zero code: %s" % self.retcode)
 
-            return True
+            return shards_finished
         return False
 
     def shutdown(self):
@@ -214,39 +437,56 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
             if not self.settings.get("gui", False):
                 udp_sock = socket.socket(type=socket.SOCK_DGRAM)
 
-                self.log.info("Sending Shutdown command to JMeter on port %d...", self.management_port)
-                udp_sock.sendto(b"Shutdown", ("localhost", self.management_port))
+                self.__send_command(udp_sock, b"Shutdown")
                 if self._process_stopped(max_attempts):
                     self.log.debug("JMeter stopped on Shutdown command")
                     return
 
-                self.log.info("Sending StopTestNow command to JMeter on port %d...", self.management_port)
-                udp_sock.sendto(b"StopTestNow", ("localhost", self.management_port))
+                self.__send_command(udp_sock, b"StopTestNow")
                 if self._process_stopped(max_attempts):
                     self.log.debug("JMeter stopped on StopTestNow command")
                     return
         finally:
             if not self._process_stopped(1):
-                self.log.warning("JMeter process is still alive, killing it")
-                shutdown_process(self.process, self.log)
+                for instance in self.__running_instances():
+                    instance.log.warning("JMeter process is still alive, killing it")
+                    shutdown_process(instance.process, instance.log)
 
+        self.__release_warm_server()
         if self.start_time:
             self.end_time = time.time()
             self.log.debug("JMeter worked for %s seconds", self.end_time - self.start_time)
 
+    def __release_warm_server(self):
+        if self.warm_server:
+            self.warm_pool.give_back(self.warm_server)
+            self.warm_server = None
+
+    def __send_command(self, udp_sock, command):
+        for instance in self.__running_instances():
+            self.log.info("Sending %s command to JMeter on port %d...", command.decode(), instance.management_port)
+            udp_sock.sendto(command, ("localhost", instance.management_port))
+
+    def __running_instances(self):
+        return [instance for instance in [self] + self.shards
+                if instance.process and instance.process.poll() is None]
+
     def post_process(self):
         self.engine.existing_artifact(self.modified_jmx, True)
+        for shard in self.shards:
+            shard.post_process()
 
     def has_results(self):
-        if self.reader and self.reader.read_records:
-            return True
-        else:
-            return False
+        for instance in [self] + self.shards:
+            for reader in [instance.reader] + instance.engine_readers:
+                if reader and reader.read_records:
+                    return True
+        return False
 
     def _process_stopped(self, cycles):
         while cycles > 0:
             cycles -= 1
-            if self.process and self.process.poll() is None:
+            if self.__running_instances():
                 time.sleep(self.engine.check_interval)
             else:
                 return True
@@ -545,6 +785,34 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         jmx.append(JMeterScenarioBuilder.TEST_PLAN_SEL, lst)
         jmx.append(JMeterScenarioBuilder.TEST_PLAN_SEL, etree.Element("hashTree"))
 
+    def __create_result_files(self):
+        """
+        Create artifacts and results stream that result listeners will write into
+        """
+        if self.engine.is_functional_mode():
+            self.log_jtl = self.engine.create_artifact("trace", ".jtl")
+            return
+
+        transport = self.__get_results_transport()
+        if transport == "binary":
+            if self.distributed_servers:
+                raise TaurusConfigError("JMeter results-transport 'binary' isn't supported in distributed mode")
+            self.kpi_bin = self.engine.create_artifact("kpi", ".bin")
+        elif transport == "socket":
+            if self.distributed_servers:  # remote engines connect to it directly
+                server = KPIStreamServer(self.log, self.__get_results_host())
+                self.results_stream = StreamedCSVReader(self.log, server=server)
+            else:
+                self.results_stream = StreamedCSVReader(self.log)
+        else:
+            self.kpi_jtl = self.engine.create_artifact("kpi", ".jtl")
+
+        jtl_log_level = self.execution.get('write-xml-jtl', 'error')
+        if jtl_log_level == 'error':
+            self.log_jtl = self.engine.create_artifact("error", ".jtl")
+        elif jtl_log_level == 'full':
+            self.log_jtl = self.engine.create_artifact("trace", ".jtl")
+
     def __add_result_listeners(self, jmx):
         if self.engine.is_functional_mode():
             self.__add_trace_writer(jmx)
@@ -552,28 +820,54 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
             self.__add_result_writers(jmx)
 
     def __add_trace_writer(self, jmx):
-        self.log_jtl = self.engine.create_artifact("trace", ".jtl")
         flags = self.settings.get('xml-jtl-flags')
         log_lst = jmx.new_xml_listener(self.log_jtl, True, flags)
         self.__add_listener(log_lst, jmx)
 
     def __add_result_writers(self, jmx):
-        self.kpi_jtl = self.engine.create_artifact("kpi", ".jtl")
-        kpi_lst = jmx.new_kpi_listener(self.kpi_jtl)
-        self.__add_listener(kpi_lst, jmx)
+        if self.results_stream:
+            stream = self.results_stream
+            stream_lst = jmx.new_stream_listener(stream.host, stream.port, stream.token)
+            self.__add_listener(stream_lst, jmx)
+        elif self.kpi_bin:
+            bin_lst = jmx.new_binary_listener(self.kpi_bin, self.__runs_remotely())
+            self.__add_listener(bin_lst, jmx)
+        else:
+            kpi_lst = jmx.new_kpi_listener(self.kpi_jtl)
+            self.__add_listener(kpi_lst, jmx)
 
-        jtl_log_level = self.execution.get('write-xml-jtl', 'error')
+        if self.log_jtl:
+            flags = self.settings.get('xml-jtl-flags')
+            is_full = self.execution.get('write-xml-jtl', 'error') == 'full'
+            log_lst = jmx.new_xml_listener(self.log_jtl, is_full, flags)
+            self.__add_listener(log_lst, jmx)
 
-        flags = self.settings.get('xml-jtl-flags')
+    def __get_results_transport(self):
+        transport = self.settings.get("results-transport", "file")
+        if transport not in ("file", "socket", "binary"):
+            raise TaurusConfigError("Unsupported results-transport for JMeter: %s" % transport)
 
-        if jtl_log_level == 'error':
-            self.log_jtl = self.engine.create_artifact("error", ".jtl")
-            log_lst = jmx.new_xml_listener(self.log_jtl, False, flags)
-            self.__add_listener(log_lst, jmx)
-        elif jtl_log_level == 'full':
-            self.log_jtl = self.engine.create_artifact("trace", ".jtl")
-            log_lst = jmx.new_xml_listener(self.log_jtl, True, flags)
-            self.__add_listener(log_lst, jmx)
+        return transport
+
+    def __get_results_host(self):
+        """
+        Address of this host that remote engines can reach, taken from route to the first of them
+        """
+        host = self.settings.get("results-host", None)
+        if host:
+            return host
+
+        remote_host = self.distributed_servers[0].split(':')[0]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.connect((remote_host, 1099))  # no packets are sent for UDP
+            return sock.getsockname()[0]
+        except socket.error as exc:
+            host = socket.gethostname()
+            self.log.warning("Failed to detect results host (%s), using %s; set 'results-host' option", exc, host)
+            return host
+        finally:
+            sock.close()
 
     def __force_tran_parent_sample(self, jmx):
         scenario = self.get_scenario()
@@ -609,16 +903,14 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
 
         return jmx
 
-    def __save_modified_jmx(self, jmx, original_jmx_path, is_jmx_generated):
+    def __get_modified_jmx_name(self, original_jmx_path, is_jmx_generated):
         script_name, _ = os.path.splitext(os.path.basename(original_jmx_path))
         modified_script_name = "modified_" + script_name
         if is_jmx_generated:
-            filename = self.engine.create_artifact(modified_script_name, ".jmx")
+            return self.engine.create_artifact(modified_script_name, ".jmx")
         else:
             script_dir = get_full_path(original_jmx_path, step_up=1)
-            filename = get_uniq_name(script_dir, modified_script_name, ".jmx")
-        jmx.save(filename)
-        return filename
+            return get_uniq_name(script_dir, modified_script_name, ".jmx")
 
     def __jmx_from_requests(self):
         """
@@ -626,11 +918,41 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         :return:
         """
         filename = self.engine.create_artifact("requests", ".jmx")
+
+        key = None
+        if self.plan_cache:
+            key = PlanCache.key(self.plan_key, self.__get_resource_files_stats())
+            cached = self.plan_cache.get(key, ".jmx")
+            system_props = self.plan_cache.get(key, ".json")
+            if cached is not None and system_props is not None:
+                self.log.debug("Using cached JMX generated from requests")
+                with open(filename, 'wb') as fds:
+                    fds.write(cached)
+                self.settings.merge(json.loads(system_props.decode('utf-8')))
+                return filename
+
         jmx = JMeterScenarioBuilder(self)
         jmx.save(filename)
         self.settings.merge(jmx.system_props)
+
+        if key:
+            with open(filename, 'rb') as fds:
+                self.plan_cache.put(key, ".jmx", fds.read())
+            self.plan_cache.put(key, ".json", json.dumps(jmx.system_props, cls=ComplexEncoder).encode('utf-8'))
         return filename
 
+    def __get_resource_files_stats(self):
+        """
+        Size and modification time of files that generated JMX may embed, like request bodies
+        """
+        stats = []
+        for resource in self.res_files_from_scenario(self.get_scenario()):
+            path = self.engine.find_file(resource)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                stats.append((path, stat.st_size, stat.st_mtime))
+        return stats
+
     @staticmethod
     def __write_props_to_file(file_path, params):
         """
@@ -654,25 +976,20 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
             self.widget = ExecutorWidget(self, "JMeter: " + label.split('/')[1])
         return self.widget
 
-    def __modify_resources_paths_in_jmx(self, jmx, file_list):
+    def __modify_resources_paths_in_jmx(self, index, jmx, file_list):
         """
         Modify resource files paths in jmx etree
 
+        :param index: JMXResourceIndex
         :param jmx: JMX
         :param file_list: list
         :return:
         """
-        file_set = set(file_list)
-        missed_files = []
-        while file_set:
-            filename = file_set.pop()
-            file_path_elements = jmx.xpath('//stringProp[text()="%s"]' % filename)
-            if not file_path_elements:
-                missed_files.append(filename)
-            for file_path_element in file_path_elements:
-                basename = os.path.basename(filename)
-                self.log.debug("Replacing JMX path %s with %s", file_path_element.text, basename)
-                file_path_element.text = basename
+        missed_files = [filename for filename in set(file_list) if filename not in index]
+        replacements = dict((filename, os.path.basename(filename)) for filename in set(file_list))
+        for filename, basename in iteritems(replacements):
+            self.log.debug("Replacing JMX path %s with %s", filename, basename)
+        JMXResourceIndex.rewrite(jmx, replacements)
 
         if missed_files:
             self.log.warning("Files not found in JMX: %s", missed_files)
@@ -687,11 +1004,12 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
 
         self.original_jmx = self.get_script_path()
         if self.original_jmx:
-            jmx = JMX(self.original_jmx)
-            resource_files_from_jmx = JMeterExecutor.__get_resource_files_from_jmx(jmx)
+            index = JMXResourceIndex(self.original_jmx)
+            resource_files_from_jmx = index.get_resource_files()
             if resource_files_from_jmx:
                 self.execution.get('files', []).extend(resource_files_from_jmx)
-                self.__modify_resources_paths_in_jmx(jmx.tree, resource_files_from_jmx)
+                jmx = JMX(self.original_jmx)
+                self.__modify_resources_paths_in_jmx(index, jmx, resource_files_from_jmx)
                 script_name, script_ext = os.path.splitext(os.path.basename(self.original_jmx))
                 self.original_jmx = self.engine.create_artifact(script_name, script_ext)
                 jmx.save(self.original_jmx)
@@ -703,37 +1021,6 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
 
         return resource_files
 
-    @staticmethod
-    def __get_resource_files_from_jmx(jmx):
-        """
-        Get list of resource files paths from jmx scenario
-        :return: (file list)
-        """
-        resource_files = []
-        exclude_elements = ['kg.apc.jmeter.jmxmon.JMXMonCollector', 'JSR223Listener',
-                            'kg.apc.jmeter.vizualizers.CorrectedResultCollector',
-                            'kg.apc.jmeter.reporters.FlexibleFileWriter', 'BSFListener',
-                            'kg.apc.jmeter.dbmon.DbMonCollector', 'BeanShellListener', 'MailerResultCollector',
-                            'kg.apc.jmeter.perfmon.PerfMonCollector', 'ResultCollector',
-                            'kg.apc.jmeter.vizualizers.CompositeResultCollector',
-                            'kg.apc.jmeter.reporters.LoadosophiaUploader']
-        search_patterns = ["File.path", "filename", "BeanShellSampler.filename"]
-        for pattern in search_patterns:
-            resource_elements = jmx.tree.findall(".//stringProp[@name='%s']" % pattern)
-            for resource_element in resource_elements:
-                # check if none of parents are disabled
-                parent = resource_element.getparent()
-                parent_disabled = False
-                while parent is not None:  # ?
-                    if parent.get('enabled') == 'false' or parent.tag in exclude_elements:
-                        parent_disabled = True
-                        break
-                    parent = parent.getparent()
-
-                if resource_element.text and not parent_disabled:
-                    resource_files.append(resource_element.text)
-        return resource_files
-
     def res_files_from_scenario(self, scenario):
         files = []
         data_sources = scenario.data.get('data-sources')
@@ -811,7 +1098,10 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         download_link = self.settings.get("download-link", None)
         plugins = self.settings.get("plugins", [])
         proxy = self.engine.config.get('settings').get('proxy')
-        tool = JMeter(jmeter_path, self.log, jmeter_version, download_link, plugins, proxy)
+        download_cache = self.settings.get("download-cache", None)
+        cache_size = int(self.settings.get("download-cache-size", DownloadCache.MAX_SIZE // 1024 ** 2)) * 1024 ** 2
+        tool = JMeter(jmeter_path, self.log, jmeter_version, download_link, plugins, proxy, download_cache,
+                      cache_size)
 
         if self._need_to_install(tool):
             tool.install()
@@ -843,6 +1133,349 @@ class JMeterExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstall
         return True
 
 
+class WarmJMeterPool(Service):
+    """
+    Local jmeter-server processes kept alive through the whole run. Executions in warm mode
+    hand their test plans to idle server instead of starting JMeter engine of their own.
+    Pool is registered as service of the engine, so servers are stopped on engine shutdown
+    or post-process, whatever comes first. Server that ran `max_runs` plans is stopped when
+    released, to free memory, threads and properties left by them, next execution gets new one.
+
+    :type servers: list[WarmJMeterServer]
+    """
+    READY_TIMEOUT = 60
+    MAX_RUNS = 10
+
+    def __init__(self, jmeter_path, parent_logger, max_runs=MAX_RUNS):
+        super(WarmJMeterPool, self).__init__()
+        self.jmeter_path = jmeter_path
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.max_runs = max_runs
+        self.servers = []
+        self.users = 0
+        self.immediate_users = 0
+
+    @staticmethod
+    def get(engine, jmeter_path, parent_logger, max_runs=MAX_RUNS):
+        """
+        Pool of the engine for that JMeter installation, created on first request
+
+        :type engine: bzt.engine.Engine
+        :type max_runs: int
+        :rtype: WarmJMeterPool
+        """
+        for service in engine.services:
+            if isinstance(service, WarmJMeterPool) and service.jmeter_path == jmeter_path:
+                return service
+
+        pool = WarmJMeterPool(jmeter_path, parent_logger, max_runs)
+        pool.engine = engine
+        engine.services.append(pool)
+        engine.prepared.append(pool)
+        return pool
+
+    def attach(self, executor, immediate):
+        """
+        Register prepared executor, servers for executions that start with the run are launched right away
+
+        :type executor: JMeterExecutor
+        """
+        self.users += 1
+        if immediate:
+            self.immediate_users += 1
+            if len(self.servers) < self.immediate_users:
+                self.servers.append(self.__spawn(executor))
+
+    def take(self, executor):
+        """
+        Get idle server for executor, launching new one if there's none
+
+        :type executor: JMeterExecutor
+        :rtype: WarmJMeterServer
+        """
+        for server in self.servers[:]:
+            if not server.busy and not server.is_alive():
+                self.log.warning("Warm JMeter server on %s has died, see %s", server.address, server.stdout_file)
+                self.servers.remove(server)
+
+        idle = [server for server in self.servers if not server.busy]
+        if idle:
+            server = idle[0]
+            self.log.debug("Reusing warm JMeter server on %s", server.address)
+        else:
+            server = self.__spawn(executor)
+            self.servers.append(server)
+
+        server.busy = True
+        server.runs += 1
+        server.wait_ready(self.READY_TIMEOUT)
+        return server
+
+    def give_back(self, server):
+        """
+        Mark server idle, or stop it if it has run enough plans
+
+        :type server: WarmJMeterServer
+        """
+        server.busy = False
+        if self.max_runs and server.runs >= self.max_runs and server in self.servers:
+            self.log.debug("Warm JMeter server on %s ran %s plans, stopping it", server.address, server.runs)
+            server.stop()
+            self.servers.remove(server)
+
+    def shutdown(self):
+        self.__stop_servers()
+
+    def post_process(self):
+        self.__stop_servers()  # in case the run failed before startup
+
+    def __stop_servers(self):
+        for server in self.servers:
+            server.stop()
+        self.servers = []
+
+    def __spawn(self, executor):
+        server = WarmJMeterServer(self.jmeter_path, self.log)
+        server.start(executor)
+        return server
+
+
+class WarmJMeterServer(object):
+    """
+    Single jmeter-server process listening on loopback interface
+    """
+
+    def __init__(self, jmeter_path, parent_logger):
+        self.jmeter_path = jmeter_path
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.port = self.__get_free_port()
+        self.rmi_port = self.__get_free_port()
+        self.address = "127.0.0.1:%s" % self.port
+        self.process = None
+        self.stdout = None
+        self.stdout_file = None
+        self.busy = False
+        self.ready = False
+        self.runs = 0
+
+    @staticmethod
+    def __get_free_port():
+        sock = socket.socket()
+        try:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+        finally:
+            sock.close()
+
+    def start(self, executor):
+        """
+        Launch server with settings and environment of execution that needed it
+
+        :type executor: JMeterExecutor
+        """
+        self.stdout_file = executor.engine.create_artifact("jmeter-server", ".out")
+        cmdline = [self.jmeter_path, "-s",
+                   "-j", executor.engine.create_artifact("jmeter-server", ".log"),
+                   "-Djava.rmi.server.hostname=127.0.0.1",
+                   "-Jserver_port=%s" % self.port,
+                   "-Jserver.rmi.localport=%s" % self.rmi_port,
+                   "-Jserver.rmi.ssl.disable=true",
+                   "-Juser.classpath=%s" % executor.engine.artifacts_dir.replace(os.path.sep, "/")]
+        if executor.sys_properties_file:
+            cmdline += ["-S", os.path.abspath(executor.sys_properties_file)]
+
+        env = {}
+        if executor.warm_jvm_args:
+            jvm_args = os.environ.get("JVM_ARGS", "")
+            env["JVM_ARGS"] = (jvm_args + ' ' if jvm_args else '') + ' '.join(executor.warm_jvm_args)
+
+        self.log.info("Starting warm JMeter server on %s", self.address)
+        self.stdout = open(self.stdout_file, 'w')
+        try:
+            self.process = executor.execute(cmdline, stdout=self.stdout, stderr=subprocess.STDOUT, env=env)
+        except BaseException as exc:
+            self.stdout.close()
+            raise ToolError("Failed to start JMeter server: %s" % exc)
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def wait_ready(self, timeout):
+        """
+        Wait until server accepts connections on its registry port
+
+        :raise ToolError:
+        """
+        deadline = time.time() + timeout
+        while not self.ready:
+            if not self.is_alive():
+                raise ToolError("JMeter server exited with code %s, see %s" % (self.process.poll(), self.stdout_file))
+
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                self.ready = True
+            except socket.error:
+                if time.time() > deadline:
+                    raise ToolError("JMeter server didn't start in %s seconds" % timeout)
+                time.sleep(0.1)
+
+    def stop(self):
+        self.log.debug("Stopping warm JMeter server on %s", self.address)
+        if self.is_alive():
+            shutdown_process(self.process, self.log)
+        self.stdout.close()
+
+
+class PlanCache(object):
+    """
+    Content-addressed storage of generated and modified test plans,
+    entries are files named by hash of everything that affects their content.
+    Least recently used entries beyond MAX_FILES are removed when new one is stored.
+
+    :type directory: str
+    """
+    MAX_FILES = 256
+    ENTRY_NAME = re.compile(r"^[0-9a-f]{40}\.")  # temporary files have random part after key
+
+    def __init__(self, directory, parent_logger):
+        self.directory = directory
+        self.log = parent_logger.getChild(self.__class__.__name__)
+
+    @staticmethod
+    def key(*parts):
+        """
+        :return: hex digest of JSON representation of parts
+        """
+        data = json.dumps(parts, sort_keys=True, cls=ComplexEncoder)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def get(self, key, suffix):
+        """
+        :rtype: bytes
+        """
+        filename = os.path.join(self.directory, key + suffix)
+        if not os.path.isfile(filename):
+            self.log.debug("Cache miss: %s", filename)
+            return None
+
+        self.log.debug("Cache hit: %s", filename)
+        os.utime(filename, None)  # mark as recently used
+        with open(filename, 'rb') as fds:
+            return fds.read()
+
+    def put(self, key, suffix, data):
+        """
+        Write entry through temporary file, so concurrent runs never see it partially written
+
+        :type data: bytes
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        fds, tmp_name = tempfile.mkstemp(suffix, key, self.directory)
+        with os.fdopen(fds, 'wb') as tmp_file:
+            tmp_file.write(data)
+
+        filename = os.path.join(self.directory, key + suffix)
+        if os.path.exists(filename):  # windows can't rename over existing file
+            os.remove(tmp_name)
+        else:
+            os.rename(tmp_name, filename)
+        self.log.debug("Cached: %s", filename)
+        self.__evict()
+
+    def __evict(self):
+        """
+        Remove least recently used entries beyond MAX_FILES
+        """
+        entries = []
+        for fname in os.listdir(self.directory):
+            if self.ENTRY_NAME.match(fname):
+                path = os.path.join(self.directory, fname)
+                entries.append((os.path.getmtime(path), path))
+
+        entries.sort(reverse=True)
+        for _, path in entries[self.MAX_FILES:]:
+            self.log.debug("Removing test plan from cache: %s", path)
+            os.remove(path)
+
+
+class JMXResourceIndex(object):
+    """
+    Streaming index of JMX string properties: texts of all of them, to know which of them can be rewritten,
+    and enabled path-bearing ones, to collect resource files. File is read with iterparse and finished
+    elements are dropped, so only the path from root to current element is kept in memory.
+
+    :type filename: str
+    """
+    EXCLUDE_ELEMENTS = {'kg.apc.jmeter.jmxmon.JMXMonCollector', 'JSR223Listener',
+                        'kg.apc.jmeter.vizualizers.CorrectedResultCollector',
+                        'kg.apc.jmeter.reporters.FlexibleFileWriter', 'BSFListener',
+                        'kg.apc.jmeter.dbmon.DbMonCollector', 'BeanShellListener', 'MailerResultCollector',
+                        'kg.apc.jmeter.perfmon.PerfMonCollector', 'ResultCollector',
+                        'kg.apc.jmeter.vizualizers.CompositeResultCollector',
+                        'kg.apc.jmeter.reporters.LoadosophiaUploader'}
+    PATH_PROPS = ("File.path", "filename", "BeanShellSampler.filename")
+
+    def __init__(self, filename):
+        self.texts = set()
+        self.resources = dict((name, []) for name in self.PATH_PROPS)
+        self.__index(filename)
+
+    def __index(self, filename):
+        try:
+            for _, elem in etree.iterparse(filename, events=("end",), huge_tree=True):
+                if elem.tag == "stringProp" and elem.text:
+                    self.texts.add(elem.text)
+                    name = elem.get("name")
+                    if name in self.resources and self.__is_enabled(elem):
+                        self.resources[name].append(elem.text)
+
+                # ancestors of next elements aren't finished yet, so they keep attributes needed for checks
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        except etree.XMLSyntaxError as exc:
+            raise TaurusInternalException("XML parsing failed for file %s: %s" % (filename, exc))
+
+    def __is_enabled(self, elem):
+        for parent in elem.iterancestors():
+            if parent.get("enabled") == "false" or parent.tag in self.EXCLUDE_ELEMENTS:
+                return False
+        return True
+
+    def get_resource_files(self):
+        """
+        Paths from enabled path-bearing properties, grouped by property name
+
+        :rtype: list[str]
+        """
+        resource_files = []
+        for name in self.PATH_PROPS:
+            resource_files.extend(self.resources[name])
+        return resource_files
+
+    def __contains__(self, text):
+        return text in self.texts
+
+    @staticmethod
+    def rewrite(jmx, replacements):
+        """
+        Replace texts of string properties in loaded JMX, in single pass over them
+
+        :type jmx: JMX
+        :param replacements: new text by old one
+        :type replacements: dict
+        :return: replaced elements count
+        """
+        count = 0
+        for elem in jmx.tree.iter("stringProp"):
+            if elem.text in replacements:
+                elem.text = replacements[elem.text]
+                count += 1
+        return count
+
+
 class JTLReader(ResultsReader):
     """
     Class to read KPI JTL
@@ -852,6 +1485,7 @@ class JTLReader(ResultsReader):
     def __init__(self, filename, parent_logger, errors_filename):
         super(JTLReader, self).__init__()
         self.is_distributed = False
+        self.errors_elsewhere = False  # errors of read samples are reported by reader of errors JTL
         self.log = parent_logger.getChild(self.__class__.__name__)
         self.csvreader = IncrementalCSVReader(self.log, filename)
         self.read_records = 0
@@ -866,51 +1500,88 @@ class JTLReader(ResultsReader):
 
         :type last_pass: bool
         """
+        return self.__parse(last_pass, columnar=False)
+
+    def _read_columns(self, final_pass=False):
+        for _ in self.__parse(final_pass, columnar=True):
+            pass
+        return True
+
+    def __parse(self, last_pass, columnar):
+        """
+        Parse new rows of JTL, either yielding sample tuples or appending samples
+        straight into columnar buffer (then nothing is yielded)
+        """
         if self.errors_reader:
-            self.errors_reader.read_file()
+            self.errors_reader.read_file(last_pass)
 
+        columns = None
+        sample_columns = None
+        sample_tstmp = None
         for row in self.csvreader.read(last_pass):
-            label = unicode_decode(row["label"])
+            if columns is None:  # header is known since first row
+                columns = self.__resolve_columns()
+                c_tstmp, c_label, c_concur, c_thread, c_host, c_rtm, c_ltc, c_cnn, c_rcd, c_success, c_msg, c_bytes \
+                    = columns
+
+            label = unicode_decode(row[c_label])
+            concur = int(row[c_concur])
             if self.is_distributed:
-                concur = int(row["grpThreads"])
-                trname = row["Hostname"] + row["threadName"][:row["threadName"].rfind('-')]
+                thread_name = row[c_thread]
+                trname = row[c_host] + thread_name[:thread_name.rfind('-')]
             else:
-                concur = int(row["allThreads"])
                 trname = ''
 
-            rtm = int(row["elapsed"]) / 1000.0
-            ltc = int(row["Latency"]) / 1000.0
-            if "Connect" in row:
-                cnn = int(row["Connect"]) / 1000.0
+            rtm = int(row[c_rtm]) / 1000.0
+            ltc = int(row[c_ltc]) / 1000.0
+            if c_cnn is not None:
+                cnn = int(row[c_cnn]) / 1000.0
                 if cnn < ltc:  # this is generally bad idea...
                     ltc -= cnn  # fixing latency included into connect time
             else:
                 cnn = None
 
-            rcd = row["responseCode"]
+            rcd = row[c_rcd]
             if rcd.endswith('Exception'):
                 rcd = rcd.split('.')[-1]
 
-            if row["success"] != "true":
-                error = row["responseMessage"]
+            if row[c_success] != "true":
+                error = row[c_msg]
             else:
                 error = None
 
-            byte_count = int(row.get("bytes", 0))
+            byte_count = int(row[c_bytes]) if c_bytes is not None else 0
 
-            tstmp = int(int(row["timeStamp"]) / 1000)
+            tstmp = int(int(row[c_tstmp]) / 1000)
             self.read_records += 1
-            yield tstmp, label, concur, rtm, cnn, ltc, rcd, error, trname, byte_count
+            if not columnar:
+                yield tstmp, label, concur, rtm, cnn, ltc, rcd, error, trname, byte_count
+            elif label not in self.ignored_labels:
+                if tstmp != sample_tstmp:  # rows come mostly in time order
+                    sample_tstmp = tstmp
+                    sample_columns = self._sample_columns(tstmp)
+                sample_columns.add(label, concur, rtm, cnn, ltc, rcd, error, trname, byte_count)
+
+    def __resolve_columns(self):
+        idx = self.csvreader.indexes
+        concur_column = "grpThreads" if self.is_distributed else "allThreads"
+        return (idx["timeStamp"], idx["label"], idx[concur_column], idx.get("threadName"), idx.get("Hostname"),
+                idx["elapsed"], idx["Latency"], idx.get("Connect"), idx["responseCode"], idx["success"],
+                idx["responseMessage"], idx.get("bytes"))
 
     def _calculate_datapoints(self, final_pass=False):
         for point in super(JTLReader, self)._calculate_datapoints(final_pass):
             if self.errors_reader:
-                data = self.errors_reader.get_data(point[DataPoint.TIMESTAMP])
+                self.errors_reader.errors_len = self.errors_len
+                data = self.errors_reader.get_kpisets(point[DataPoint.TIMESTAMP])
                 for label, label_data in iteritems(point[DataPoint.CURRENT]):
-                    if label in data:
-                        label_data[KPISet.ERRORS] = data[label]
-                    else:
-                        label_data[KPISet.ERRORS] = {}
+                    errors = data.get(label, None)
+                    label_data[KPISet.ERRORS] = errors[KPISet.ERRORS] if errors else []
+                    label_data[KPISet.OTHER_ERRORS] = errors[KPISet.OTHER_ERRORS] if errors else 0
+            elif self.errors_elsewhere:
+                for label_data in point[DataPoint.CURRENT].values():
+                    label_data[KPISet.ERRORS] = []
+                    label_data[KPISet.OTHER_ERRORS] = 0
 
             yield point
 
@@ -1035,8 +1706,7 @@ class FuncJTLReader(FunctionalResultsReader):
 
         :rtype lxml.etree.Element
         """
-        assertions = [elem for elem in element.iterchildren() if elem.tag == "assertionResult"]
-        for assertion in assertions:
+        for assertion in element.iterchildren("assertionResult"):
             failed = assertion.find("failure")
             error = assertion.find("error")
             if failed.text == "true" or error.text == "true":
@@ -1046,19 +1716,21 @@ class FuncJTLReader(FunctionalResultsReader):
 
 class IncrementalCSVReader(object):
     """
-    JTL csv reader
+    JTL csv reader, yields rows as lists of strings,
+    column positions are available in `indexes` once header is read
     """
 
     def __init__(self, parent_logger, filename):
-        self.buffer = StringIO()
-        self.csv_reader = csv.DictReader(self.buffer, [])
         self.log = parent_logger.getChild(self.__class__.__name__)
+        self.dialect = None
+        self.header = []
         self.indexes = {}
         self.partial_buffer = ""
         self.offset = 0
         self.filename = filename
         self.fds = None
         self.read_speed = 1024 * 1024
+        self.follower = get_file_follower()
 
     def read(self, last_pass=False):
         """
@@ -1070,11 +1742,15 @@ class IncrementalCSVReader(object):
             self.log.debug("No data to start reading yet")
             return
 
+        if not last_pass and not self.follower.get_new_range(self.filename, self.offset, self.__reset):
+            return
+
         self.log.debug("Reading JTL: %s", self.filename)
         self.fds.seek(self.offset)  # without this we have stuck reads on Mac
 
         if last_pass:
             lines = self.fds.readlines()  # unlimited
+            self.follower.unfollow(self.filename)
         else:
             lines = self.fds.readlines(int(self.read_speed))
         self.offset = self.fds.tell()
@@ -1085,27 +1761,67 @@ class IncrementalCSVReader(object):
         elif bytes_read < self.read_speed / 2:
             self.read_speed = max(self.read_speed / 2, 1024 * 1024)
 
-        for line in lines:
-            if not line.endswith("\n"):
-                self.partial_buffer += line
+        if lines and self.partial_buffer:
+            lines[0] = self.partial_buffer + lines[0]
+            self.partial_buffer = ""
+
+        if lines and not lines[-1].endswith("\n"):
+            self.partial_buffer = lines.pop()
+
+        if lines and not self.header:
+            self.__read_header(lines.pop(0))
+
+        if not lines:
+            return
+
+        header_len = len(self.header)
+        for row in self.__split_lines(lines, last_pass):
+            if len(row) < header_len:
+                if row:
+                    self.log.debug("Skipping incomplete row: %s", row)
                 continue
+            yield row
 
-            line = "%s%s" % (self.partial_buffer, line)
-            self.partial_buffer = ""
+    def __read_header(self, line):
+        self.dialect = guess_csv_dialect(line)
+        self.header = line.strip().split(self.dialect.delimiter)
+        self.indexes = dict((name, idx) for idx, name in enumerate(self.header))
+        self.log.debug("Analyzed header line: %s", self.header)
 
-            if not self.csv_reader.fieldnames:
-                self.csv_reader.dialect = guess_csv_dialect(line)
-                self.csv_reader.fieldnames += line.strip().split(self.csv_reader.dialect.delimiter)
-                self.log.debug("Analyzed header line: %s", self.csv_reader.fieldnames)
+    def __split_lines(self, lines, last_pass):
+        """
+        Quoted values may contain delimiters and line breaks, such lines are parsed with csv module,
+        other lines are just split by delimiter. Row with unterminated quoted value is kept
+        in partial buffer until the rest of it is read.
+        """
+        delimiter = self.dialect.delimiter
+        quotechar = self.dialect.quotechar
+        quoted = []
+        for line in lines:
+            if quoted:
+                quoted.append(line)
+            elif quotechar and quotechar in line:
+                quoted = [line]
+            else:
+                yield line.rstrip("\r\n").split(delimiter)
                 continue
 
-            self.buffer.write(line)
+            if sum(chunk.count(quotechar) for chunk in quoted) % 2 == 0:  # all quotes are closed
+                for row in csv.reader(quoted, self.dialect):
+                    yield row
+                quoted = []
 
-        self.buffer.seek(0)
-        for row in self.csv_reader:
-            yield row
-        self.buffer.seek(0)
-        self.buffer.truncate(0)
+        if quoted and last_pass:
+            self.log.debug("Unterminated quoted value: %s", quoted)
+        elif quoted:
+            self.partial_buffer = "".join(quoted) + self.partial_buffer
+
+    def __reset(self):
+        self.fds.close()
+        self.fds = None
+        self.offset = 0
+        self.partial_buffer = ""
+        self.header = []
 
     def __open_fds(self):
         """
@@ -1134,6 +1850,176 @@ class IncrementalCSVReader(object):
             self.fds.close()
 
 
+class KPIStreamServer(object):
+    """
+    Listening socket for KPI streams of JMeter engines. Every engine opens single connection
+    and sends per-run token as its first line, connections without valid token are dropped.
+    Authenticated connections are spread evenly between attached readers, so with reader
+    per engine each of them reads its own engine.
+
+    :type readers: list[StreamedCSVReader]
+    """
+    AUTH_TIMEOUT = 30
+    MAX_TOKEN_LINE = 1024
+
+    def __init__(self, parent_logger, host="127.0.0.1"):
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind((host, 0))
+        self.server.listen(64)
+        self.server.setblocking(False)
+        self.host = host
+        self.port = self.server.getsockname()[1]
+        self.token = uuid.uuid4().hex
+        self.readers = []
+        self.pending = {}  # connection => (address, accept time, received part of token line)
+        self.log.debug("Listening for results stream on %s:%s", self.host, self.port)
+
+    def accept(self):
+        while self.server:
+            try:
+                conn, addr = self.server.accept()
+            except socket.error as exc:
+                if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+
+            conn.setblocking(False)
+            self.pending[conn] = (addr, time.time(), b"")
+
+        for conn in list(self.pending):
+            self.__authenticate(conn)
+
+    def __authenticate(self, conn):
+        addr, accepted, received = self.pending[conn]
+        try:
+            chunk = conn.recv(self.MAX_TOKEN_LINE)
+        except socket.error as exc:
+            if exc.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                self.__drop(conn, "connection failed: %s" % exc)
+            elif time.time() - accepted > self.AUTH_TIMEOUT:
+                self.__drop(conn, "no token received in %s seconds" % self.AUTH_TIMEOUT)
+            return
+
+        if not chunk:
+            self.__drop(conn, "connection closed before token")
+            return
+
+        received += chunk
+        if b"\n" not in received:
+            if len(received) > self.MAX_TOKEN_LINE:
+                self.__drop(conn, "token line is too long")
+            else:
+                self.pending[conn] = (addr, accepted, received)
+            return
+
+        token, rest = received.split(b"\n", 1)
+        if not hmac.compare_digest(token.strip(), self.token.encode('ascii')):
+            self.__drop(conn, "invalid token")
+            return
+
+        del self.pending[conn]
+        reader = min(self.readers, key=lambda rdr: rdr.accepted)
+        self.log.debug("Results stream connected from %s, passing it to reader #%s", addr, self.readers.index(reader))
+        reader.accepted += 1
+        reader.connections.append(conn)
+        if rest:
+            reader.partial_buffers[conn] = rest
+
+    def __drop(self, conn, reason):
+        addr = self.pending.pop(conn)[0]
+        self.log.warning("Dropping results stream connection from %s: %s", addr, reason)
+        conn.close()
+
+    def close(self):
+        for conn in self.pending:
+            conn.close()
+        self.pending = {}
+        if self.server:
+            self.server.close()
+            self.server = None
+
+
+class StreamedCSVReader(object):
+    """
+    Receives KPI lines streamed by JMeter's listener into local TCP socket,
+    has the same interface as IncrementalCSVReader
+
+    :type parent_logger: logging.Logger
+    :type server: KPIStreamServer
+    """
+
+    def __init__(self, parent_logger, host="127.0.0.1", server=None):
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.header = JMX.STREAM_FIELDS
+        self.indexes = dict((name, idx) for idx, name in enumerate(self.header))
+        self.server = server or KPIStreamServer(self.log, host)
+        self.server.readers.append(self)
+        self.host, self.port, self.token = self.server.host, self.server.port, self.server.token
+        self.accepted = 0
+        self.connections = []
+        self.partial_buffers = {}
+        self.read_size = 8 * 1024 * 1024
+
+    def read(self, last_pass=False):
+        """
+        read data from all connections, without blocking
+        yield csv row
+        :type last_pass: bool
+        """
+        self.server.accept()
+        for conn in self.connections[:]:
+            data = self.__receive(conn, last_pass)
+            if not data and conn not in self.partial_buffers:  # data after token may be received by server
+                continue
+
+            lines = (self.partial_buffers.pop(conn, b"") + data).split(b"\n")
+            if lines[-1]:
+                self.partial_buffers[conn] = lines[-1]
+
+            header_len = len(self.header)
+            for line in lines[:-1]:
+                row = line.decode('utf-8').split("\t")
+                if len(row) < header_len:
+                    self.log.debug("Skipping incomplete row: %s", row)
+                    continue
+                yield row
+
+        if last_pass:
+            self.close()
+
+    def __receive(self, conn, last_pass):
+        chunks = []
+        received = 0
+        while last_pass or received < self.read_size:
+            try:
+                chunk = conn.recv(1024 * 1024)
+            except socket.error as exc:
+                if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+
+            if not chunk:
+                self.log.debug("Results stream connection closed")
+                conn.close()
+                self.connections.remove(conn)
+                break
+
+            chunks.append(chunk)
+            received += len(chunk)
+
+        return b"".join(chunks)
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.server.close()
+
+    def __del__(self):
+        self.close()
+
+
 class JTLErrorsReader(object):
     """
     Reader for errors.jtl, which is in XML max-verbose format
@@ -1141,95 +2027,142 @@ class JTLErrorsReader(object):
     :type filename: str
     :type parent_logger: logging.Logger
     """
-    assertionMessage = GenericTranslator().css_to_xpath("assertionResult>failureMessage")
-    url_xpath = GenericTranslator().css_to_xpath("java\\.net\\.URL")
+    MIN_READ_SIZE = 1024 * 1024
+    MAX_READ_SIZE = 16 * 1024 * 1024
+    MAX_CALL_BYTES = 64 * 1024 * 1024  # limits of single read_file call, the rest is read on next calls
+    MAX_CALL_TIME = 0.5
 
     def __init__(self, filename, parent_logger):
-        # http://stackoverflow.com/questions/9809469/python-sax-to-lxml-for-80gb-xml/9814580#9814580
         super(JTLErrorsReader, self).__init__()
         self.log = parent_logger.getChild(self.__class__.__name__)
-        self.parser = etree.XMLPullParser(events=('end',))
-        # context = etree.iterparse(self.fds, events=('end',))
+        self.parser = etree.XMLPullParser(events=('end',), huge_tree=True)
         self.offset = 0
+        self.read_size = self.MIN_READ_SIZE
         self.filename = filename
         self.fds = None
         self.buffer = BetterDict()
         self.failed_processing = False
+        self.follower = get_file_follower()
+        self.errors_len = None
 
     def __del__(self):
         if self.fds:
             self.fds.close()
 
-    def read_file(self):
+    def read_file(self, last_pass=False):
         """
-        Read the next part of the file
+        Read next portion of the file, chunk size adapts to the speed of file growth.
+        Single call is limited by MAX_CALL_BYTES and MAX_CALL_TIME, except for last pass
+        that reads the file up to its end.
+
+        :type last_pass: bool
         """
+        self.__read_portion(last_pass)
+        if last_pass:
+            self.follower.unfollow(self.filename)
+
+    def __reset(self):
+        if self.fds:
+            self.fds.close()
+            self.fds = None
+        self.offset = 0
+        self.parser = etree.XMLPullParser(events=('end',), huge_tree=True)
 
+    def __read_portion(self, last_pass):
         if self.failed_processing:
             return
 
+        data_range = self.follower.get_new_range(self.filename, self.offset, self.__reset)
+        if data_range is None:
+            return
+
         if not self.fds:
-            if os.path.exists(self.filename) and os.path.getsize(self.filename):  # getsize check to not stuck on mac
-                self.log.debug("Opening %s", self.filename)
-                self.fds = open(self.filename, 'rb')
-            else:
+            if data_range.end is None:
                 self.log.debug("File not exists: %s", self.filename)
                 return
+            self.log.debug("Opening %s", self.filename)
+            self.fds = open(self.filename, 'rb')
 
         self.fds.seek(self.offset)
-        read = self.fds.read(1024 * 1024)
-        if read.strip():
-            try:
-                self.parser.feed(read)  # "Huge input lookup" error without capping :)
-            except etree.XMLSyntaxError as exc:
-                self.failed_processing = True
-                self.log.debug("Error reading errors.jtl: %s", traceback.format_exc())
-                self.log.warning("Failed to parse errors XML: %s", exc)
+        start_offset = self.offset
+        start_time = time.time()
+        while not self.failed_processing:
+            read = self.fds.read(self.read_size)
+            self.offset = self.fds.tell()
+            if read.strip():
+                try:
+                    self.parser.feed(read)
+                except etree.XMLSyntaxError as exc:
+                    self.failed_processing = True
+                    self.log.debug("Error reading errors.jtl: %s", traceback.format_exc())
+                    self.log.warning("Failed to parse errors XML: %s", exc)
 
-        self.offset = self.fds.tell()
-        for _action, elem in self.parser.read_events():
-            del _action
-            if elem.getparent() is not None and elem.getparent().tag == 'testResults':
-                if elem.get('s'):
-                    result = elem.get('s')
-                else:
-                    result = elem.xpath('success')[0].text
-                if result == 'false':
-                    if elem.items():
-                        self.__extract_standard(elem)
-                    else:
-                        self.__extract_nonstandard(elem)
+            self.__process_samples()
 
-                # cleanup processed from the memory
-                elem.clear()
-                while elem.getprevious() is not None:
-                    del elem.getparent()[0]
+            if len(read) < self.read_size:
+                if len(read) < self.read_size / 2:
+                    self.read_size = max(self.read_size // 2, self.MIN_READ_SIZE)
+                break
 
-    def get_data(self, max_ts):
+            self.read_size = min(self.read_size * 2, self.MAX_READ_SIZE)
+            self.log.debug("Errors JTL is growing fast, read size is %s now", self.read_size)
+
+            if not last_pass:
+                if self.offset - start_offset >= self.MAX_CALL_BYTES or time.time() - start_time >= self.MAX_CALL_TIME:
+                    self.log.debug("Read %s bytes of errors JTL, continuing on next call", self.offset - start_offset)
+                    break
+
+    def __process_samples(self):
+        for _, elem in self.parser.read_events():
+            parent = elem.getparent()
+            if parent is not None and parent.tag == 'testResults':
+                self.__process_sample(elem)
+                parent.remove(elem)  # cleanup processed from the memory
+
+    def __process_sample(self, elem):
+        result = elem.get('s')
+        if not result:
+            result = self.__get_child(elem, 'success')
+
+        if result == 'false':
+            if elem.items():
+                self.__extract_standard(elem)
+            else:
+                self.__extract_nonstandard(elem)
+
+    def get_kpisets(self, max_ts):
         """
-        Get accumulated errors data up to specified timestamp
+        Get accumulated errors up to specified timestamp as KPISets per label,
+        distinct errors beyond `errors_len` are counted as other errors
+
+        :rtype: dict[str,KPISet]
         """
-        result = BetterDict()
+        result = {}
         for t_stamp in sorted(self.buffer.keys()):
             if t_stamp > max_ts:
                 break
             labels = self.buffer.pop(t_stamp)
-            for label, label_data in iteritems(labels):
-                res = result.get(label, [])
-                for err_item in label_data:
-                    KPISet.inc_list(res, ('msg', err_item['msg']), err_item)
-
+            for label, label_errors in iteritems(labels):
+                if label not in result:
+                    result[label] = KPISet(errors_maxlen=self.errors_len)
+                for err_item in label_errors.values():
+                    result[label].inc_error(err_item, is_copy=False)
         return result
 
+    def get_data(self, max_ts):
+        """
+        Get accumulated errors data up to specified timestamp
+        """
+        errors = BetterDict()
+        for label, kpiset in iteritems(self.get_kpisets(max_ts)):
+            errors[label] = kpiset[KPISet.ERRORS]
+        return errors
+
     def __extract_standard(self, elem):
-        t_stamp = int(elem.get("ts")) / 1000
+        t_stamp = int(elem.get("ts")) // 1000
         label = elem.get("lb")
         r_code = elem.get("rc")
-        urls = elem.xpath(self.url_xpath)
-        if urls:
-            url = Counter({urls[0].text: 1})
-        else:
-            url = Counter()
+        url = self.__get_url(elem)
         errtype = KPISet.ERRTYPE_ERROR
 
         failed_assertion = self.__get_failed_assertion(elem)
@@ -1240,28 +2173,56 @@ class JTLErrorsReader(object):
         if message is None:
             message = elem.get('rm')
         err_item = KPISet.error_item_skel(message, r_code, 1, errtype, url)
-        KPISet.inc_list(self.buffer.get(t_stamp).get(label, []), ("msg", message), err_item)
-        KPISet.inc_list(self.buffer.get(t_stamp).get('', []), ("msg", message), err_item)
+        self.__add_error(t_stamp, label, err_item)
 
     def __extract_nonstandard(self, elem):
-        t_stamp = int(self.__get_child(elem, 'timeStamp')) / 1000  # NOTE: will it be sometimes EndTime?
+        t_stamp = int(self.__get_child(elem, 'timeStamp')) // 1000  # NOTE: will it be sometimes EndTime?
         label = self.__get_child(elem, "label")
         message = self.__get_child(elem, "responseMessage")
         r_code = self.__get_child(elem, "responseCode")
 
-        urls = elem.xpath(self.url_xpath)
-        if urls:
-            url = Counter({urls[0].text: 1})
-        else:
-            url = Counter()
+        url = self.__get_url(elem)
         errtype = KPISet.ERRTYPE_ERROR
-        massert = elem.xpath(self.assertionMessage)
-        if massert:
+        massert = self.__get_assertion_message_elem(elem)
+        if massert is not None:
             errtype = KPISet.ERRTYPE_ASSERT
-            message = massert[0].text
+            message = massert.text
         err_item = KPISet.error_item_skel(message, r_code, 1, errtype, url)
-        KPISet.inc_list(self.buffer.get(t_stamp).get(label, []), ("msg", message), err_item)
-        KPISet.inc_list(self.buffer.get(t_stamp).get('', []), ("msg", message), err_item)
+        self.__add_error(t_stamp, label, err_item)
+
+    def __add_error(self, t_stamp, label, err_item):
+        """
+        Errors are buffered as plain per-label dicts keyed like in KPISet,
+        KPISets are built only when datapoint is requested
+        """
+        if t_stamp not in self.buffer:
+            self.buffer[t_stamp] = {}
+        labels = self.buffer[t_stamp]
+
+        err_key = KPISet.error_key(err_item)
+        for label_key in (label, ''):
+            label_errors = labels.setdefault(label_key, OrderedDict())
+            item = label_errors.get(err_key)
+            if item is None:
+                label_errors[err_key] = err_item if label_key == label else copy.deepcopy(err_item)
+            else:
+                item['cnt'] += err_item['cnt']
+                item['urls'] += err_item['urls']
+
+    @staticmethod
+    def __get_url(elem):
+        url = next(elem.iter("java.net.URL"), None)
+        if url is not None:
+            return Counter({url.text: 1})
+        else:
+            return Counter()
+
+    @staticmethod
+    def __get_assertion_message_elem(elem):
+        for assertion in elem.iter("assertionResult"):
+            message = assertion.find("failureMessage")
+            if message is not None:
+                return message
 
     def get_failure_message(self, element):
         """
@@ -1278,8 +2239,7 @@ class JTLErrorsReader(object):
         r_code = element.get('rc')
         if r_code and r_code.startswith("2"):
             if element.get('s') == "false":
-                children = [elem for elem in element.iterchildren() if elem.tag == "httpSample"]
-                for child in children:
+                for child in element.iterchildren("httpSample"):
                     child_message = self.get_failure_message(child)
                     if child_message:
                         return child_message
@@ -1746,13 +2706,16 @@ class JMeter(RequiredTool):
     JMeter tool
     """
 
-    def __init__(self, tool_path, parent_logger, jmeter_version, jmeter_download_link, plugins, proxy):
+    def __init__(self, tool_path, parent_logger, jmeter_version, jmeter_download_link, plugins, proxy,
+                 download_cache=None, download_cache_size=DownloadCache.MAX_SIZE):
         super(JMeter, self).__init__("JMeter", tool_path, jmeter_download_link)
         self.log = parent_logger.getChild(self.__class__.__name__)
         self.version = jmeter_version
         self.mirror_manager = JMeterMirrorsManager(self.log, self.version)
         self.plugins = plugins
         self.proxy_settings = proxy
+        if download_cache:
+            self.download_cache = DownloadCache(download_cache, self.log, download_cache_size)
 
     def check_if_installed(self):
         self.log.debug("Trying jmeter: %s", self.tool_path)
@@ -1776,12 +2739,13 @@ class JMeter(RequiredTool):
             self.log.debug("JMeter check failed.")
             return False
 
-    def __install_jmeter(self, dest):
+    def __download_jmeter(self):
         if self.download_link:
-            jmeter_dist = self._download(use_link=True)
+            return self._download(use_link=True)
         else:
-            jmeter_dist = self._download()
+            return self._download()
 
+    def __install_jmeter(self, dest, jmeter_dist):
         try:
             self.log.info("Unzipping %s to %s", jmeter_dist, dest)
             unzip(jmeter_dist, dest, 'apache-jmeter-%s' % self.version)
@@ -1795,17 +2759,13 @@ class JMeter(RequiredTool):
         if not self.check_if_installed():
             raise ToolError("Unable to run %s after installation!" % self.tool_name)
 
-    def __download_additions(self, tools):
-        downloader = ExceptionalDownloader()
-        with ProgressBarContext() as pbar:
-            for tool in tools:
-                url = tool[0]
-                _file = os.path.basename(url)
-                self.log.info("Downloading %s from %s", _file, url)
-                try:
-                    downloader.get(url, tool[1], reporthook=pbar.download_callback)
-                except BaseException as exc:
-                    raise TaurusNetworkError("Error while downloading %s: %s" % (_file, exc))
+    def __download_addition(self, url):
+        _file = os.path.basename(url)
+        self.log.info("Downloading %s from %s", _file, url)
+        try:
+            return download_file([url], self.log, os.path.splitext(_file)[1], self.download_cache)
+        except BaseException as exc:
+            raise TaurusNetworkError("Error while downloading %s: %s" % (_file, exc))
 
     def __install_plugins_manager(self, plugins_manager_path):
         installer = "org.jmeterplugins.repository.PluginManagerCMDInstaller"
@@ -1868,8 +2828,17 @@ class JMeter(RequiredTool):
             [JMeterExecutor.CMDRUNNER, cmdrunner_path]]
         plugins_manager_cmd = os.path.join(dest, 'bin', 'PluginsManagerCMD' + EXE_SUFFIX)
 
-        self.__install_jmeter(dest)
-        self.__download_additions(direct_install_tools)
+        # JMeter distribution and additions are downloaded concurrently
+        pool = ThreadPool(1 + len(direct_install_tools))
+        try:
+            jmeter_dist = pool.apply_async(self.__download_jmeter)
+            additions = [pool.apply_async(self.__download_addition, (url,)) for url, _ in direct_install_tools]
+            self.__install_jmeter(dest, jmeter_dist.get())
+            for (_, path), addition in zip(direct_install_tools, additions):
+                shutil.move(addition.get(), path)
+        finally:
+            pool.terminate()
+
         self.__install_plugins_manager(plugins_manager_path)
         self.__install_plugins(plugins_manager_cmd)
 
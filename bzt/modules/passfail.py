@@ -18,6 +18,7 @@ limitations under the License.
 import fnmatch
 import logging
 import re
+import time
 from abc import abstractmethod
 from collections import OrderedDict
 
@@ -87,6 +88,9 @@ class PassFailStatus(Reporter, Service, AggregatorListener, WidgetProvider):
                 else:
                     if crit.is_triggered and not crit.stop and crit.fail:
                         raise AutomatedShutdown("%s" % crit)
+            elif isinstance(crit, EngineTimingsCriterion):
+                if crit.is_triggered and not crit.stop and crit.fail:
+                    raise AutomatedShutdown("%s" % crit)
 
     def check(self):
         """
@@ -393,6 +397,41 @@ class DataCriterion(FailCriterion):
         return res
 
 
+class EngineTimingsCriterion(FailCriterion):
+    """
+    Criterion for time spent by engine modules, subject is `<module alias>/<phase>`
+    (e.g. `console/check` or `engine/loop`), value is average duration of phase calls
+    made since previous second
+    """
+
+    def __init__(self, config, owner):
+        super(EngineTimingsCriterion, self).__init__(config, owner)
+        self.last_tstmp = None
+        self.last_count = 0
+        self.last_total = 0.0
+
+    def check(self):
+        tstmp = int(time.time())
+        if tstmp != self.last_tstmp:
+            self.last_tstmp = tstmp
+            histogram = self.get_value(self.owner.engine.timings)
+            if histogram is not None and histogram.count > self.last_count:
+                value = (histogram.total - self.last_total) / (histogram.count - self.last_count)
+                self.last_count = histogram.count
+                self.last_total = histogram.total
+                self.process_criteria_logic(tstmp, value)
+
+        return super(EngineTimingsCriterion, self).check()
+
+    def _get_field_functor(self, subject, percentage):
+        if '/' not in subject:
+            raise TaurusConfigError("Wrong syntax for engine timings criteria subject: %s" % subject)
+        if percentage:
+            raise TaurusConfigError("Percentage threshold is not applicable for %s" % subject)
+        label, phase = subject.rsplit('/', 1)
+        return lambda timings: timings.get(label, phase)
+
+
 class PassFailWidget(Pile, PrioritizedWidget):
     """
     Represents console widget for pass/fail criteria visualisation
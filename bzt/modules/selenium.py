@@ -35,7 +35,7 @@ from bzt.modules.services import HavingInstallableTools
 from bzt.six import string_types, parse, iteritems
 from bzt.utils import RequiredTool, shell_exec, shutdown_process, JavaVM, TclLibrary, get_files_recursive, \
     PythonGenerator
-from bzt.utils import dehumanize_time, MirrorsManager, is_windows, BetterDict, get_full_path
+from bzt.utils import dehumanize_time, MirrorsManager, is_windows, BetterDict, get_full_path, get_file_follower
 
 try:
     from pyvirtualdisplay.smartdisplay import SmartDisplay as Display
@@ -1458,15 +1458,20 @@ class LDJSONReader(object):
         self.fds = None
         self.partial_buffer = ""
         self.offset = 0
+        self.follower = get_file_follower()
 
     def read(self, last_pass=False):
         if not self.fds and not self.__open_fds():
             self.log.debug("No data to start reading yet")
             return
 
+        if not last_pass and not self.follower.get_new_range(self.filename, self.offset, self.__reset):
+            return
+
         self.fds.seek(self.offset)
         if last_pass:
             lines = self.fds.readlines()  # unlimited
+            self.follower.unfollow(self.filename)
         else:
             lines = self.fds.readlines(1024 * 1024)
         self.offset = self.fds.tell()
@@ -1479,6 +1484,12 @@ class LDJSONReader(object):
             self.partial_buffer = ""
             yield json.loads(line)
 
+    def __reset(self):
+        self.fds.close()
+        self.fds = None
+        self.offset = 0
+        self.partial_buffer = ""
+
     def __open_fds(self):
         if not os.path.isfile(self.filename):
             return False
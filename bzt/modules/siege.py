@@ -27,7 +27,7 @@ from bzt.modules.aggregator import ConsolidatingAggregator, ResultsReader
 from bzt.modules.console import WidgetProvider, ExecutorWidget
 from bzt.modules.services import HavingInstallableTools
 from bzt.six import iteritems
-from bzt.utils import shell_exec, shutdown_process, RequiredTool, dehumanize_time
+from bzt.utils import shell_exec, shutdown_process, RequiredTool, dehumanize_time, get_file_follower
 
 
 class SiegeExecutor(ScenarioExecutor, WidgetProvider, HavingInstallableTools, FileLister):
@@ -169,6 +169,7 @@ class DataLogReader(ResultsReader):
         self.filename = filename
         self.fds = None
         self.concurrency = None
+        self.follower = get_file_follower()
 
     def _calculate_datapoints(self, final_pass=False):  # FIXME: why override it?
         for point in super(DataLogReader, self)._calculate_datapoints(final_pass):
@@ -188,14 +189,22 @@ class DataLogReader(ResultsReader):
 
         return True
 
+    def __reset(self):
+        self.fds.close()
+        self.fds = None
+
     def _read(self, last_pass=False):
         while not self.fds and not self.__open_fds():
             self.log.debug("No data to start reading yet")
             yield None
 
+        if not last_pass and not self.follower.get_new_range(self.filename, self.fds.tell(), self.__reset):
+            return
+
         if last_pass:
             lines = self.fds.readlines()  # unlimited
             self.fds.close()
+            self.follower.unfollow(self.filename)
         else:
             lines = self.fds.readlines(1024 * 1024)  # 1MB limit to read    git
 
@@ -27,7 +27,7 @@ from bzt.modules.aggregator import ConsolidatingAggregator, ResultsReader
 from bzt.modules.console import WidgetProvider, ExecutorWidget
 from bzt.modules.services import HavingInstallableTools
 from bzt.six import etree, parse, iteritems
-from bzt.utils import shell_exec, shutdown_process, RequiredTool, dehumanize_time, which
+from bzt.utils import shell_exec, shutdown_process, RequiredTool, dehumanize_time, which, get_file_follower
 
 
 class TsungExecutor(ScenarioExecutor, WidgetProvider, FileLister, HavingInstallableTools):
@@ -162,6 +162,7 @@ class TsungStatsReader(ResultsReader):
         self.partial_buffer = ""
         self.skipped_header = False
         self.concurrency = 0
+        self.follower = get_file_follower()
 
     def _open_fds(self):
         if not self._locate_stats_file():
@@ -196,6 +197,15 @@ class TsungStatsReader(ResultsReader):
         self.log_filename = os.path.join(self.tsung_basedir, basedir_contents[0], "tsung.log")
         return True
 
+    def _reset_fds(self):
+        self.__del__()
+        self.stats_fds = None
+        self.stats_offset = 0
+        self.log_fds = None
+        self.log_offset = 0
+        self.partial_buffer = ""
+        self.skipped_header = False
+
     def __del__(self):
         if self.stats_fds:
             self.stats_fds.close()
@@ -222,10 +232,14 @@ class TsungStatsReader(ResultsReader):
             self.log.debug("No data to start reading yet")
             yield None
 
+        if not last_pass and not self.follower.get_new_range(self.stats_filename, self.stats_offset, self._reset_fds):
+            return
+
         self.log.debug("Reading Tsung results")
         self.stats_fds.seek(self.stats_offset)
         if last_pass:
             lines = self.stats_fds.readlines()
+            self.follower.unfollow(self.stats_filename)
         else:
             lines = self.stats_fds.readlines(1024 * 1024)
         self.stats_offset = self.stats_fds.tell()
@@ -0,0 +1,65 @@
+"""
+Console progress bars for downloads and other long operations
+
+Copyright 2017 BlazeMeter Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import logging
+import sys
+
+from progressbar import ProgressBar, Percentage, Bar, ETA
+
+
+class ProgressBarContext(ProgressBar):
+    def __init__(self, maxval=0):
+        widgets = [Percentage(), ' ', Bar(marker='=', left='[', right=']'), ' ', ETA()]
+        super(ProgressBarContext, self).__init__(widgets=widgets, maxval=maxval, fd=sys.stdout)
+
+    def __enter__(self):
+        if not sys.stdout.isatty():
+            logging.debug("No progressbar for non-tty output: %s", sys.stdout)
+
+        self.start()
+        return self
+
+    def update(self, value=None):
+        if sys.stdout.isatty():
+            super(ProgressBarContext, self).update(value)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        del exc_type, exc_val, exc_tb
+        if sys.stdout.isatty():
+            self.finish()
+
+    def download_callback(self, block_count, blocksize, totalsize):
+        self.maxval = totalsize
+        progress = block_count * blocksize
+        self.update(progress if progress <= totalsize else totalsize)
+
+
+class IncrementableProgressBar(ProgressBarContext):
+    def __init__(self, maxval):
+        super(IncrementableProgressBar, self).__init__(maxval=maxval)
+
+    def increment(self):
+        incremented = self.currval + 1
+        if incremented < self.maxval:
+            super(IncrementableProgressBar, self).update(incremented)
+
+    def catchup(self, started_time=None, current_value=None):
+        super(IncrementableProgressBar, self).start()
+        if started_time:
+            self.start_time = started_time
+        if current_value and current_value < self.maxval:
+            self.update(current_value)
@@ -26,11 +26,33 @@ if PY2:
 else:
     from bzt.six.py3 import *
 
-try:
-    from lxml import etree
-except ImportError:
+
+class LazyModule(object):
+    """
+    Proxy that imports module on first access to its attributes,
+    for heavy modules that aren't needed on every run
+    """
+
+    def __init__(self, loader):
+        self.__loader = loader
+        self.__module = None
+
+    def __getattr__(self, name):
+        if self.__module is None:
+            self.__module = self.__loader()
+        return getattr(self.__module, name)
+
+
+def _load_etree():
     try:
-        import cElementTree as etree
+        from lxml import etree
     except ImportError:
-        import elementtree.ElementTree as etree
+        try:
+            import cElementTree as etree
+        except ImportError:
+            import elementtree.ElementTree as etree
+    return etree
+
+
+etree = LazyModule(_load_etree)
 
@@ -17,8 +17,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import bisect
 import csv
+import ctypes
+import ctypes.util
+import errno
 import fnmatch
+import hashlib
 import itertools
 import json
 import logging
@@ -28,28 +33,26 @@ import platform
 import random
 import re
 import shlex
+import shutil
 import signal
 import socket
 import stat
+import struct
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-import webbrowser
+import types
 import zipfile
 from abc import abstractmethod
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, namedtuple
+from math import ceil
 from subprocess import CalledProcessError
 from subprocess import PIPE
-from webbrowser import GenericBrowser
-
-import psutil
-from progressbar import ProgressBar, Percentage, Bar, ETA
-from psutil import Popen
-from urwid import BaseScreen
 
 from bzt import TaurusInternalException, TaurusNetworkError, ToolError
-from bzt.six import string_types, iteritems, binary_type, text_type, b, integer_types, request, file_type, etree
+from bzt.six import string_types, iteritems, binary_type, text_type, b, integer_types, request, file_type, etree, PY2
 
 
 def get_full_path(path, step_up=0):
@@ -292,6 +295,8 @@ def shell_exec(args, cwd=None, stdout=PIPE, stderr=PIPE, stdin=PIPE, shell=False
     if env:
         env = {k: str(v) for k, v in iteritems(env)}
 
+    from psutil import Popen  # heavy imports are deferred to keep CLI startup fast
+
     if is_windows():
         return Popen(args, stdout=stdout, stderr=stderr, stdin=stdin, bufsize=0, cwd=cwd, shell=shell, env=env)
     else:
@@ -543,6 +548,55 @@ def guess_csv_dialect(header):
     return csv.Sniffer().sniff(header, delimiters=possible_delims)
 
 
+def get_jvm_settings(concurrency, samplers, log, instances=1):
+    """
+    Pick JVM heap size, GC and thread stack size for load tool running `concurrency` threads
+    over scenario with `samplers` requests, limited by host memory shared between `instances` JVMs
+
+    :type concurrency: int
+    :type samplers: int
+    :type log: logging.Logger
+    :type instances: int
+    :return: dict with `heap`, `gc` and `thread-stack` values, None for JVM defaults
+    """
+    concurrency = concurrency or 0
+    thread_kb = 1024 + 64 * min(max(samplers, 1), 100)  # thread state grows with count of samplers
+    heap_mb = 512 + concurrency * thread_kb // 1024
+    heap_mb = int(ceil(heap_mb / 256.0)) * 256
+
+    import psutil
+
+    host_mb = psutil.virtual_memory().total // (1024 * 1024)
+    limit_mb = max(host_mb * 3 // 4 // instances, 256)
+    if heap_mb > limit_mb:
+        log.warning("Concurrency %s needs about %sm of heap, limiting it to %sm of host memory for %s JVM(s)",
+                    concurrency, heap_mb, limit_mb, instances)
+        heap_mb = limit_mb
+
+    cpu_count = psutil.cpu_count() or 1
+    settings = {
+        "heap": "%sm" % heap_mb,
+        "gc": "G1" if heap_mb >= 1024 and cpu_count > 1 else None,
+        "thread-stack": "256k" if concurrency >= 500 else None,
+    }
+    log.debug("JVM settings for concurrency %s, %s samplers, %sm RAM, %s CPUs: %s",
+              concurrency, samplers, host_mb, cpu_count, settings)
+    return settings
+
+
+def get_jvm_args(jvm_settings):
+    """
+    :param jvm_settings: dict from get_jvm_settings
+    :rtype: list[str]
+    """
+    args = ["-Xms%s" % jvm_settings["heap"], "-Xmx%s" % jvm_settings["heap"]]
+    if jvm_settings.get("gc"):
+        args.append("-XX:+Use%sGC" % jvm_settings["gc"])
+    if jvm_settings.get("thread-stack"):
+        args.append("-Xss%s" % jvm_settings["thread-stack"])
+    return args
+
+
 def load_class(full_name):
     """
     Load class by its full name like bzt.cli.CLI
@@ -634,6 +688,7 @@ def shutdown_process(process_obj, log_obj):
         log_obj.info("Terminating process PID %s with signal %s (%s tries left)", process_obj.pid, kill_signal, count)
         try:
             if is_windows():
+                import psutil
                 cur_pids = psutil.pids()
                 if process_obj.pid in cur_pids:
                     jm_proc = psutil.Process(process_obj.pid)
@@ -669,6 +724,234 @@ class ExceptionalDownloader(request.FancyURLopener, object):
         return response
 
 
+def is_valid_download(filename):
+    """
+    Check that downloaded file is complete: archives must pass CRC check
+
+    :type filename: str
+    :rtype: bool
+    """
+    if not os.path.getsize(filename):
+        return False
+
+    if filename.lower().endswith((".zip", ".jar")):
+        try:
+            with zipfile.ZipFile(filename) as archive:
+                return archive.testzip() is None
+        except (zipfile.BadZipfile, IOError, OSError):
+            return False
+
+    return True
+
+
+def file_digest(filename):
+    """
+    :return: hex SHA-256 of file content
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fds:
+        for chunk in iter(lambda: fds.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DownloadCache(object):
+    """
+    Cache of downloaded files: each file is stored under SHA-256 of its content,
+    index maps full URLs to content hashes, so files of different versions or origins
+    that share the name never replace each other. Files put into cache directory under
+    their original names (offline copies) are verified and picked up too.
+    Cached files beyond `max_size` bytes are removed, least recently used first.
+
+    :type directory: str
+    :type max_size: int
+    """
+    MAX_SIZE = 1024 * 1024 * 1024
+
+    def __init__(self, directory, parent_logger, max_size=MAX_SIZE):
+        self.directory = get_full_path(directory)
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.max_size = max_size
+        self.blobs_dir = os.path.join(self.directory, "blobs")
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.lock = threading.Lock()
+
+    def __load_index(self):
+        if not os.path.isfile(self.index_file):
+            return {}
+
+        with open(self.index_file) as fds:
+            try:
+                return json.load(fds)
+            except ValueError:
+                self.log.warning("Download cache index is broken, ignoring it: %s", self.index_file)
+                return {}
+
+    def __save_index(self, index):
+        fds, tmp_name = tempfile.mkstemp(".json", "index", self.directory)
+        with os.fdopen(fds, 'w') as tmp_file:
+            json.dump(index, tmp_file, indent=True, sort_keys=True)
+        if is_windows() and os.path.exists(self.index_file):  # windows can't rename over existing file
+            os.remove(self.index_file)
+        os.rename(tmp_name, self.index_file)
+
+    def get(self, url):
+        """
+        :return: path of cached file for that URL, or None
+        """
+        name = os.path.basename(url)
+        with self.lock:
+            digest = self.__load_index().get(url)
+
+        if digest:
+            blob = os.path.join(self.blobs_dir, digest)
+            if os.path.isfile(blob) and file_digest(blob) == digest:
+                self.log.debug("Found %s in download cache: %s", url, blob)
+                os.utime(blob, None)  # mark as recently used
+                return blob
+            self.log.warning("Cached %s is missing or corrupted, will download it again", url)
+
+        offline = os.path.join(self.directory, name)
+        if os.path.isfile(offline):
+            if is_valid_download(offline):
+                self.log.info("Using offline copy of %s", name)
+                return self.put(url, offline, keep_source=True)
+            self.log.warning("Offline copy of %s is broken, ignoring it", offline)
+
+        return None
+
+    def put(self, url, filename, keep_source=False):
+        """
+        Store complete downloaded file into cache
+
+        :return: path of cached file
+        """
+        if not os.path.isdir(self.blobs_dir):
+            os.makedirs(self.blobs_dir)
+
+        digest = file_digest(filename)
+        blob = os.path.join(self.blobs_dir, digest)
+        if not os.path.exists(blob):
+            fds, tmp_name = tempfile.mkstemp(".part", digest, self.blobs_dir)
+            os.close(fds)
+            shutil.copyfile(filename, tmp_name)
+            if os.path.exists(blob):
+                os.remove(tmp_name)
+            else:
+                os.rename(tmp_name, blob)
+        else:
+            os.utime(blob, None)
+
+        if not keep_source:
+            os.remove(filename)
+
+        with self.lock:
+            index = self.__load_index()
+            index[url] = digest
+            if self.max_size:
+                self.__evict(index, digest)
+            self.__save_index(index)
+
+        self.log.debug("Cached %s as %s", url, blob)
+        return blob
+
+    def __evict(self, index, keep):
+        """
+        Remove least recently used files beyond max_size, except the one just stored, and their index entries
+        """
+        entries = []
+        for fname in os.listdir(self.blobs_dir):
+            path = os.path.join(self.blobs_dir, fname)
+            if fname != keep and not fname.endswith(".part"):
+                entries.append((os.path.getmtime(path), os.path.getsize(path), fname))
+
+        total = sum(size for _, size, _ in entries) + os.path.getsize(os.path.join(self.blobs_dir, keep))
+        entries.sort()
+        for _, size, fname in entries:
+            if total <= self.max_size:
+                break
+            self.log.debug("Removing %s from download cache", fname)
+            os.remove(os.path.join(self.blobs_dir, fname))
+            total -= size
+            for url in [url for url, digest in iteritems(index) if digest == fname]:
+                del index[url]
+
+
+def download_file(links, parent_logger, suffix="", cache=None, parallel=3):
+    """
+    Download file from first of `links` that responds. Several links (mirrors)
+    are tried concurrently, when one of them succeeds the rest are cancelled.
+    Incomplete or broken files are never returned or cached.
+
+    :type links: collections.Iterable[str]
+    :type cache: DownloadCache
+    :return: name of temporary file, caller owns it
+    """
+    links = list(links)
+    if cache:
+        for link in links:
+            cached = cache.get(link)
+            if cached:
+                fds, filename = tempfile.mkstemp(suffix)
+                os.close(fds)
+                shutil.copyfile(cached, filename)
+                return filename
+
+    pending = iter(links)
+    lock = threading.Lock()
+    done = threading.Event()
+    result = []
+
+    def cancel_hook(*_):
+        if done.is_set():
+            raise TaurusNetworkError("Download cancelled")
+
+    def worker():
+        while not done.is_set():
+            with lock:
+                link = next(pending, None)
+            if link is None:
+                return
+
+            parent_logger.info("Downloading: %s", link)
+            try:
+                filename = ExceptionalDownloader().get(link, reporthook=cancel_hook, suffix=suffix)[0]
+            except BaseException as exc:
+                if not done.is_set():
+                    parent_logger.warning("Error while downloading %s: %s", link, exc)
+                continue
+
+            if not is_valid_download(filename):
+                parent_logger.warning("Downloaded file is broken: %s", link)
+                os.remove(filename)
+                continue
+
+            with lock:
+                if not done.is_set():
+                    done.set()
+                    result.append((link, filename))
+                    return
+            os.remove(filename)
+
+    threads = [threading.Thread(target=worker) for _ in range(min(parallel, len(links)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(0.1)  # short joins keep main thread responsive to Ctrl+C
+
+    if not result:
+        raise TaurusNetworkError("Failed to download from any of %s" % links)
+
+    link, filename = result[0]
+    parent_logger.debug("Downloaded %s into %s", link, filename)
+    if cache:
+        cached = cache.put(link, filename, keep_source=True)
+        parent_logger.debug("Stored %s in download cache: %s", link, cached)
+    return filename
+
+
 class RequiredTool(object):
     """
     Abstract required tool
@@ -680,6 +963,7 @@ class RequiredTool(object):
         self.download_link = download_link
         self.already_installed = False
         self.mirror_manager = None
+        self.download_cache = None
         self.log = None
 
     def check_if_installed(self):
@@ -689,6 +973,8 @@ class RequiredTool(object):
         return False
 
     def install(self):
+        from bzt.progress import ProgressBarContext
+
         with ProgressBarContext() as pbar:
             if not os.path.exists(os.path.dirname(self.tool_path)):
                 os.makedirs(os.path.dirname(self.tool_path))
@@ -706,21 +992,15 @@ class RequiredTool(object):
         else:
             links = self.mirror_manager.mirrors()
 
-        downloader = ExceptionalDownloader()
         sock_timeout = socket.getdefaulttimeout()
         socket.setdefaulttimeout(5)
-        for link in links:
-            self.log.info("Downloading: %s", link)
-            with ProgressBarContext() as pbar:
-                try:
-                    return downloader.get(link, reporthook=pbar.download_callback, suffix=suffix)[0]
-                except KeyboardInterrupt:
-                    raise
-                except BaseException as exc:
-                    self.log.error("Error while downloading %s: %s" % (link, exc))
-                finally:
-                    socket.setdefaulttimeout(sock_timeout)
-        raise TaurusInternalException("%s download failed: No more links to try" % self.tool_name)
+        try:
+            return download_file(links, self.log, suffix, self.download_cache)
+        except TaurusNetworkError as exc:
+            self.log.error("%s", exc)
+            raise TaurusInternalException("%s download failed: No more links to try" % self.tool_name)
+        finally:
+            socket.setdefaulttimeout(sock_timeout)
 
 
 class JavaVM(RequiredTool):
@@ -743,50 +1023,6 @@ class JavaVM(RequiredTool):
         raise ToolError("The %s is not operable or not available. Consider installing it" % self.tool_name)
 
 
-class ProgressBarContext(ProgressBar):
-    def __init__(self, maxval=0):
-        widgets = [Percentage(), ' ', Bar(marker='=', left='[', right=']'), ' ', ETA()]
-        super(ProgressBarContext, self).__init__(widgets=widgets, maxval=maxval, fd=sys.stdout)
-
-    def __enter__(self):
-        if not sys.stdout.isatty():
-            logging.debug("No progressbar for non-tty output: %s", sys.stdout)
-
-        self.start()
-        return self
-
-    def update(self, value=None):
-        if sys.stdout.isatty():
-            super(ProgressBarContext, self).update(value)
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        del exc_type, exc_val, exc_tb
-        if sys.stdout.isatty():
-            self.finish()
-
-    def download_callback(self, block_count, blocksize, totalsize):
-        self.maxval = totalsize
-        progress = block_count * blocksize
-        self.update(progress if progress <= totalsize else totalsize)
-
-
-class IncrementableProgressBar(ProgressBarContext):
-    def __init__(self, maxval):
-        super(IncrementableProgressBar, self).__init__(maxval=maxval)
-
-    def increment(self):
-        incremented = self.currval + 1
-        if incremented < self.maxval:
-            super(IncrementableProgressBar, self).update(incremented)
-
-    def catchup(self, started_time=None, current_value=None):
-        super(IncrementableProgressBar, self).start()
-        if started_time:
-            self.start_time = started_time
-        if current_value and current_value < self.maxval:
-            self.update(current_value)
-
-
 class TclLibrary(RequiredTool):
     ENV_NAME = "TCL_LIBRARY"
     INIT_TCL = "init.tcl"
@@ -864,9 +1100,11 @@ class MirrorsManager(object):
 
 
 def open_browser(url):
+    import webbrowser
+
     try:
         browser = webbrowser.get()
-        if type(browser) != GenericBrowser:  # pylint: disable=unidiomatic-typecheck
+        if type(browser) != webbrowser.GenericBrowser:  # pylint: disable=unidiomatic-typecheck
             saved_out = os.dup(1)
             os.close(1)
             os.open(os.devnull, os.O_RDWR)
@@ -885,43 +1123,6 @@ def is_windows():
 EXE_SUFFIX = ".bat" if is_windows() else ".sh"
 
 
-class DummyScreen(BaseScreen):
-    """
-    Null-object for Screen on non-tty output
-    """
-
-    def __init__(self, rows=120, cols=40):
-        super(DummyScreen, self).__init__()
-        self.size = (rows, cols)
-        self.ansi_escape = re.compile(r'\x1b[^m]*m')
-
-    def get_cols_rows(self):
-        """
-        Dummy cols and rows
-
-        :return:
-        """
-        return self.size
-
-    def draw_screen(self, size, canvas):
-        """
-
-        :param size:
-        :type canvas: urwid.Canvas
-        """
-        data = ""
-        for char in canvas.content():
-            line = ""
-            for part in char:
-                if isinstance(part[2], str):
-                    line += part[2]
-                else:
-                    line += part[2].decode()
-            data += "%s│\n" % line
-        data = self.ansi_escape.sub('', data)
-        logging.info("Screen %sx%s chars:\n%s", size[0], size[1], data)
-
-
 def which(filename):
     """unix-style `which` implementation"""
     locations = os.environ.get("PATH").split(os.pathsep)
@@ -996,3 +1197,426 @@ class PythonGenerator(object):
 
     def gen_new_line(self, indent=8):
         return self.gen_statement("", indent=indent)
+
+
+FileRange = namedtuple("FileRange", "start end reset")
+
+
+class FileFollower(object):
+    """
+    Tells results readers which files have new data. On Linux file sizes are refreshed
+    only when inotify reports changes in their directories, elsewhere (or when inotify
+    isn't available) files are polled with single `os.stat` per check.
+
+    Files on network and FUSE file systems (NFS, SMB, Docker Desktop bind mounts), which don't
+    deliver inotify events for changes made elsewhere, are polled on every check. So is any file
+    whose change was found by periodic recheck without inotify event.
+
+    Replaced (rotated) or truncated file is reported once with `reset` flag set,
+    so one reader per file is expected. Readers unfollow their files when they're done,
+    inotify descriptor is closed once no files are followed and reopened on demand.
+    """
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    RECHECK_INTERVAL = 5  # seconds, to find watched files that don't get inotify events
+    POLLED_FS_TYPES = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "vboxsf", "virtiofs", "fakeowner", "fuse")
+
+    def __init__(self, use_inotify=True):
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.dirs = {}
+        self.watches = {}
+        self.libc = None
+        self.inotify_fd = None
+        self.use_inotify = use_inotify
+
+    def __init_inotify(self):
+        if not self.use_inotify or not sys.platform.startswith("linux"):
+            return
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fds = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        except (OSError, AttributeError) as exc:
+            self.log.debug("Inotify isn't available: %s", exc)
+            return
+
+        if fds < 0:
+            self.log.debug("Failed to init inotify: %s", os.strerror(ctypes.get_errno()))
+            self.use_inotify = False
+            return
+
+        self.libc = libc
+        self.inotify_fd = fds
+        self.log.debug("Following files with inotify")
+
+    def close(self):
+        """
+        Stop following all files and release inotify descriptor
+        """
+        with self.lock:
+            self.files.clear()
+            self.__close_inotify()
+
+    def __close_inotify(self):
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)  # watches are removed along with descriptor
+            self.inotify_fd = None
+        self.dirs.clear()
+        self.watches.clear()
+
+    def unfollow(self, filename):
+        """
+        Stop following file, called by reader once it has read the file completely
+
+        :type filename: str
+        """
+        with self.lock:
+            state = self.files.pop(filename, None)
+            if state is not None and not state["polled"]:
+                self.__unwatch(filename)
+
+            if not self.files:
+                self.__close_inotify()
+
+    def __unwatch(self, filename):
+        dirname, basename = os.path.split(os.path.abspath(filename))
+        wdesc = self.dirs[dirname]
+        dir_files = self.watches[wdesc][1]
+        dir_files.pop(basename, None)
+        if not dir_files:
+            self.libc.inotify_rm_watch(self.inotify_fd, wdesc)
+            del self.dirs[dirname]
+            del self.watches[wdesc]
+
+    def get_range(self, filename, offset):
+        """
+        New data range of file for reader that has read it up to `offset`
+
+        :type filename: str
+        :type offset: int
+        :return: FileRange, or None if file has no new data; `end` is None when file is missing,
+                 reader may still have it opened
+        """
+        with self.lock:
+            self.__process_events()
+            state = self.files.get(filename)
+            if state is None:
+                state = self.__follow(filename)
+
+            if state["dirty"] or state["polled"]:
+                self.__check_file(filename, state)
+            elif time.time() - state["checked"] > self.RECHECK_INTERVAL:
+                old_stat = state["size"], state["inode"]
+                self.__check_file(filename, state)
+                if (state["size"], state["inode"]) != old_stat:
+                    self.log.debug("File changed without inotify event, polling it: %s", filename)
+                    self.__unwatch(filename)
+                    state["polled"] = True
+
+            if state["size"] is None:
+                return FileRange(offset, None, False)
+
+            if state["reset"] or state["size"] < offset:
+                state["reset"] = False
+                return FileRange(0, state["size"], True)
+
+            if state["size"] > offset:
+                return FileRange(offset, state["size"], False)
+
+            return None
+
+    def get_new_range(self, filename, offset, reset):
+        """
+        Same as get_range(), but truncated or replaced file is handled here: it's logged,
+        `reset` is called to make reader drop its descriptor and position, and None is returned,
+        so reader starts over with next read
+
+        :type filename: str
+        :type offset: int
+        :type reset: callable
+        :rtype: FileRange
+        """
+        data_range = self.get_range(filename, offset)
+        if data_range is None:
+            self.log.debug("No new data in %s", filename)
+            return None
+
+        if data_range.reset:
+            self.log.warning("File was truncated or replaced, reading from start: %s", filename)
+            reset()
+            return None
+
+        return data_range
+
+    def __follow(self, filename):
+        state = {"size": None, "inode": None, "checked": 0, "dirty": True, "polled": True, "reset": False}
+        self.files[filename] = state
+        if self.inotify_fd is None:
+            self.__init_inotify()
+            if self.inotify_fd is None:
+                return state
+
+        dirname, basename = os.path.split(os.path.abspath(filename))
+        if dirname not in self.dirs:
+            fs_type = self.__fs_type(dirname)
+            if fs_type.split(".")[0] in self.POLLED_FS_TYPES:
+                self.log.debug("Polling %s, file system is %s", dirname, fs_type)
+                return state
+
+            wdesc = self.libc.inotify_add_watch(self.inotify_fd, dirname.encode(sys.getfilesystemencoding()),
+                                                self.WATCH_MASK)
+            if wdesc < 0:
+                self.log.debug("Can't watch %s, polling: %s", dirname, os.strerror(ctypes.get_errno()))
+                return state
+            self.dirs[dirname] = wdesc
+            self.watches[wdesc] = (dirname, {})
+
+        self.watches[self.dirs[dirname]][1][basename] = state
+        state["polled"] = False
+        return state
+
+    def __process_events(self):
+        if self.inotify_fd is None:
+            return
+
+        while True:
+            try:
+                data = os.read(self.inotify_fd, 64 * 1024)
+            except OSError as exc:
+                if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+
+            offset = 0
+            while offset < len(data):
+                wdesc, mask, _, length = self.EVENT.unpack_from(data, offset)
+                name = data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b"\0")
+                offset += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    self.log.debug("Inotify queue overflow, checking all files")
+                    for state in self.files.values():
+                        state["dirty"] = True
+                elif wdesc in self.watches:
+                    state = self.watches[wdesc][1].get(name.decode(sys.getfilesystemencoding()))
+                    if state is not None:
+                        state["dirty"] = True
+
+    @staticmethod
+    def __fs_type(dirname):
+        """
+        Type of file system that holds directory, taken from the longest matching mount point
+
+        :type dirname: str
+        :rtype: str
+        """
+        dirname = os.path.realpath(dirname)
+        fs_type, mount_len = "", -1
+        try:
+            with open("/proc/self/mounts") as mounts:
+                for line in mounts:
+                    fields = line.split()
+                    if len(fields) < 3:
+                        continue
+                    mount_point = fields[1].replace("\\040", " ")
+                    prefix = mount_point.rstrip(os.sep) + os.sep
+                    if (dirname == mount_point or dirname.startswith(prefix)) and len(mount_point) > mount_len:
+                        fs_type, mount_len = fields[2], len(mount_point)
+        except IOError:
+            pass
+        return fs_type
+
+    @staticmethod
+    def __check_file(filename, state):
+        state["dirty"] = False
+        state["checked"] = time.time()
+        try:
+            fstat = os.stat(filename)
+        except OSError:
+            state["size"] = None
+            return
+
+        if state["inode"] is not None and state["inode"] != fstat.st_ino:
+            state["reset"] = True
+        state["inode"] = fstat.st_ino
+        state["size"] = fstat.st_size
+
+
+def get_file_follower():
+    """
+    File follower shared by all results readers
+
+    :rtype: FileFollower
+    """
+    if get_file_follower.instance is None:
+        get_file_follower.instance = FileFollower()
+    return get_file_follower.instance
+
+
+get_file_follower.instance = None
+
+
+class BackgroundFileWriter(object):
+    """
+    Writes files in background thread, through temporary file and rename, so readers
+    never see partially written file. Content is produced by callables in the writer thread,
+    if file is queued again before it was written, only the latest content is written.
+    Producer may return None to leave file as is.
+    """
+
+    def __init__(self, parent_logger):
+        self.log = parent_logger.getChild(self.__class__.__name__)
+        self.pending = {}
+        self.order = []
+        self.busy = False
+        self.thread = None
+        self.condition = threading.Condition()
+
+    def write(self, filename, producer):
+        """
+        :type filename: str
+        :type producer: callable
+        """
+        with self.condition:
+            if filename not in self.pending:
+                self.order.append(filename)
+            self.pending[filename] = producer
+            if not self.thread:
+                self.thread = threading.Thread(target=self.__run, name=self.__class__.__name__)
+                self.thread.daemon = True
+                self.thread.start()
+
+    def flush(self):
+        """
+        Wait until all queued files are written
+        """
+        with self.condition:
+            while self.order or self.busy:
+                self.condition.wait(0.1)
+
+    def __run(self):
+        while True:
+            with self.condition:
+                if not self.order:
+                    self.thread = None
+                    self.condition.notify_all()
+                    return
+                filename = self.order.pop(0)
+                producer = self.pending.pop(filename)
+                self.busy = True
+
+            try:
+                content = producer()
+                if content is not None:
+                    self.__write(filename, content)
+            except BaseException as exc:
+                self.log.warning("Failed to write %s: %s", filename, exc)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    @staticmethod
+    def __write(filename, content):
+        dirname, basename = os.path.split(filename)
+        fds, tmp_name = tempfile.mkstemp(".tmp", "." + basename, dirname)
+        with os.fdopen(fds, 'wb') as tmp_file:
+            tmp_file.write(content.encode('utf-8') if isinstance(content, text_type) else content)
+        if is_windows() and os.path.exists(filename):  # windows can't rename over existing file
+            os.remove(filename)
+        os.rename(tmp_name, filename)
+
+
+class TimingHistogram(object):
+    """
+    Durations counted into buckets with exponentially growing bounds,
+    so adding is cheap and memory doesn't grow with count of measurements
+    """
+    BOUNDS = [0.0001 * 2 ** power for power in range(24)]  # 0.1ms to ~14min
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.buckets[bisect.bisect_left(self.BOUNDS, duration)] += 1
+
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, perc):
+        """
+        :param perc: percentile level, 0..100
+        :return: upper bound of bucket holding that percentile, but not more than max
+        """
+        threshold = self.count * perc / 100.0
+        passed = 0
+        for index, count in enumerate(self.buckets):
+            passed += count
+            if count and passed >= threshold:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "avg": self.average(),
+            "max": self.max,
+            "perc_50": self.percentile(50),
+            "perc_90": self.percentile(90),
+            "perc_99": self.percentile(99),
+            "buckets": {"%g" % bound: count for bound, count in zip(self.BOUNDS + [float("inf")], self.buckets)
+                        if count},
+        }
+
+
+# moved to modules that need heavy dependencies, kept importable from here for compatibility
+MOVED_NAMES = {
+    "DummyScreen": "bzt.modules.console",
+    "ProgressBarContext": "bzt.progress",
+    "IncrementableProgressBar": "bzt.progress",
+}
+
+
+def __getattr__(name):  # module attributes lookup fallback, Python 3.7+
+    if name in MOVED_NAMES:
+        module = __import__(MOVED_NAMES[name], fromlist=[name])
+        return getattr(module, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+class _MovedNamesModule(types.ModuleType):
+    """
+    Stand-in for this module on Python < 3.7, which has no module __getattr__:
+    same attributes, moved names are imported on first access
+    """
+
+    def __init__(self, module):
+        super(_MovedNamesModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self._original = module  # python 2 clears globals of collected module
+
+    def __getattr__(self, name):
+        return __getattr__(name)
+
+
+if sys.version_info < (3, 7):
+    sys.modules[__name__] = _MovedNamesModule(sys.modules[__name__])
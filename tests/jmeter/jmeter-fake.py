@@ -26,6 +26,17 @@ def udp_server():
     print("UDP Server stopped.")
 
 
+def rmi_server():
+    port = [int(arg.split('=')[1]) for arg in sys.argv if arg.startswith('-Jserver_port=')][0]
+    tcp_sock = socket.socket()
+    tcp_sock.bind(('127.0.0.1', port))
+    tcp_sock.listen(5)
+    print("Created remote object")
+    while True:
+        conn, _ = tcp_sock.accept()
+        conn.close()
+
+
 def files():
     artifacts_dir = get_artifacts_dir()
     jmeter_path = os.path.dirname(__file__)
@@ -40,7 +51,9 @@ def files():
 mode = get_mode()
 
 # mode is gotten via environment variable $TEST_MODE
-if mode == 'files':     # test_engine
+if '-s' in sys.argv:    # test_JMeterExecutor.test_warm_worker
+    rmi_server()
+elif mode == 'files':     # test_engine
     files()
 elif mode == 'server':  # test_JMeterExecutor.test_shutdown_soft
     udp_server()
@@ -4,8 +4,7 @@ from unittest import TestCase, skipIf
 from urwid.canvas import Canvas
 
 from bzt.engine import ManualShutdown
-from bzt.modules.console import TaurusConsole
-from bzt.utils import DummyScreen
+from bzt.modules.console import TaurusConsole, DummyScreen
 
 try:
     from bzt.modules.screen import GUIScreen as Screen
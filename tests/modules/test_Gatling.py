@@ -135,6 +135,17 @@ class TestGatlingExecutor(BZTestCase):
             lines = fds.readlines()
         self.assertIn('throughput', lines[-1])
 
+    def test_jvm_heap_auto(self):
+        obj = self.getGatling()
+        obj.settings.merge({"memory-xmx": "auto"})
+        obj.execution.merge({
+            "concurrency": 1000,
+            "hold-for": 60,
+            "scenario": {"script": __dir__() + "/../gatling/LocalBasicSimulation.scala"}})
+        obj.prepare()
+        heap = obj.execution["jvm-settings"]["heap"]
+        self.assertEqual(["-Xms" + heap, "-Xmx" + heap, "-Xss256k"], obj.jvm_args)
+
     def test_warning_for_throughput_without_duration(self):
         obj = self.getGatling()
         script = "LocalBasicSimulation.scala"
@@ -4,7 +4,9 @@ import json
 import logging
 import os
 import shutil
+import socket
 import sys
+import tempfile
 import time
 from math import ceil
 
@@ -12,13 +14,16 @@ import yaml
 
 from bzt import ToolError, TaurusConfigError, TaurusInternalException
 from bzt.jmx import JMX
-from bzt.modules.aggregator import ConsolidatingAggregator, DataPoint
+from bzt.modules.aggregator import ConsolidatingAggregator, DataPoint, KPISet
+from bzt.modules.binresults import BinaryResultsReader
 from bzt.modules.blazemeter import CloudProvisioning
-from bzt.modules.jmeter import JMeterExecutor, JTLErrorsReader, JTLReader, FuncJTLReader
+from bzt.modules.jmeter import JMeterExecutor, JTLErrorsReader, JTLReader, FuncJTLReader, StreamedCSVReader
+from bzt.modules.jmeter import KPIStreamServer
+from bzt.modules.jmeter import JMXResourceIndex, PlanCache
 from bzt.modules.jmeter import JMeterScenarioBuilder
 from bzt.modules.provisioning import Local
 from bzt.six import etree, u
-from bzt.utils import EXE_SUFFIX, get_full_path
+from bzt.utils import EXE_SUFFIX, get_full_path, get_jvm_settings
 from tests import BZTestCase, __dir__
 from tests.mocks import EngineEmul, RecordingHandler
 
@@ -362,6 +367,20 @@ class TestJMeterExecutor(BZTestCase):
         self.assertIn('files', self.obj.execution)
         self.assertEqual(4, len(self.obj.execution['files']))
 
+    def test_resource_index(self):
+        index = JMXResourceIndex(__dir__() + "/../jmeter/jmx/files.jmx")
+        self.assertEqual(['tests/json/grinder.json', 'tests/json/merge1.json',
+                          'tests/json/jmx.json', 'tests/json/merge2.json'], index.get_resource_files())
+        self.assertIn('tests/json/jmx.json', index)
+        self.assertNotIn('tests/json/not-found.json', index)
+
+        jmx = JMX(__dir__() + "/../jmeter/jmx/files.jmx")
+        replaced = JMXResourceIndex.rewrite(jmx, {'tests/json/jmx.json': 'jmx.json'})
+        self.assertEqual(1, replaced)
+        texts = [elem.text for elem in jmx.tree.iter("stringProp")]
+        self.assertIn('jmx.json', texts)
+        self.assertNotIn('tests/json/jmx.json', texts)
+
     def test_resource_files_paths(self):
         """
         Check whether JMeter.resource_files() modifies filenames in JMX carefully
@@ -567,11 +586,195 @@ class TestJMeterExecutor(BZTestCase):
         values = obj.get_data(sys.maxsize)
         self.assertEquals(3, len(values))
 
+    def test_errors_jtl_over_limit(self):
+        fds, kpi_jtl = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        fds, errors_jtl = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        self.addCleanup(os.remove, kpi_jtl)
+        self.addCleanup(os.remove, errors_jtl)
+        with open(kpi_jtl, 'w') as jtl, open(errors_jtl, 'w') as xml:
+            jtl.write("timeStamp,elapsed,label,responseCode,responseMessage,success,allThreads,Latency\n")
+            xml.write('<?xml version="1.0" encoding="UTF-8"?>\n<testResults version="1.2">\n')
+            for num in range(20):
+                jtl.write('1431534938725,264,label,500,error %s,false,1,10\n' % num)
+                xml.write('<httpSample t="264" ts="1431534938725" s="false" lb="label" rc="500" rm="error %s"/>\n'
+                          % num)
+            xml.write('</testResults>\n')
+
+        obj = ConsolidatingAggregator()
+        obj.settings['errors-len'] = 10
+        obj.prepare()
+        obj.add_underling(JTLReader(kpi_jtl, logging.getLogger(''), errors_jtl))
+        points = list(obj.datapoints(True))
+        self.assertEqual(1, len(points))
+        for label in ('', 'label'):
+            cumul = points[-1][DataPoint.CUMULATIVE][label]
+            self.assertEqual(10, len(cumul[KPISet.ERRORS]))
+            self.assertEqual(10, cumul[KPISet.OTHER_ERRORS])
+
+    def test_errors_buffer_lightweight(self):
+        obj = JTLErrorsReader(__dir__() + "/../jmeter/jtl/standard-errors.jtl", logging.getLogger(''))
+        obj.read_file()
+        for labels in obj.buffer.values():
+            for label_errors in labels.values():
+                self.assertNotIsInstance(label_errors, KPISet)
+
+        buffered = sum(err['cnt'] for labels in obj.buffer.values() for err in labels[''].values())
+        values = obj.get_data(sys.maxsize)
+        self.assertEqual(buffered, sum(err['cnt'] for err in values['']))
+        self.assertEqual(buffered, sum(err['cnt'] for label in values if label for err in values[label]))
+
+    def test_errors_jtl_growing(self):
+        with open(__dir__() + "/../jmeter/jtl/standard-errors.jtl", 'rb') as fds:
+            data = fds.read()
+
+        def count_errors(values):
+            return sum(err['cnt'] for err in values[''])
+
+        full = JTLErrorsReader(__dir__() + "/../jmeter/jtl/standard-errors.jtl", logging.getLogger(''))
+        full.read_file()
+        total = count_errors(full.get_data(sys.maxsize))
+
+        fds, fname = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        with open(fname, 'wb') as jtl:
+            jtl.write(data[:len(data) // 2])  # cut in the middle of sample
+
+        obj = JTLErrorsReader(fname, logging.getLogger(''))
+        obj.read_size = 1024  # to force adaptive reading
+        obj.read_file()
+        first = count_errors(obj.get_data(sys.maxsize))
+        self.assertGreater(first, 0)
+        self.assertLess(first, total)
+        self.assertGreater(obj.read_size, 1024)
+
+        with open(fname, 'ab') as jtl:
+            jtl.write(data[len(data) // 2:])
+        obj.read_file()
+        os.remove(fname)
+        self.assertEqual(total, first + count_errors(obj.get_data(sys.maxsize)))
+
+    def test_errors_jtl_call_limit(self):
+        def count_errors(values):
+            return sum(err['cnt'] for err in values['']) if values else 0
+
+        full = JTLErrorsReader(__dir__() + "/../jmeter/jtl/standard-errors.jtl", logging.getLogger(''))
+        full.read_file(True)
+        total = count_errors(full.get_data(sys.maxsize))
+
+        obj = JTLErrorsReader(__dir__() + "/../jmeter/jtl/standard-errors.jtl", logging.getLogger(''))
+        obj.MAX_CALL_BYTES = 256 * 1024
+        obj.read_file()
+        self.assertLess(obj.offset, os.path.getsize(obj.filename))
+        first = count_errors(obj.get_data(sys.maxsize))
+        self.assertLess(first, total)
+
+        obj.read_file(True)  # last pass isn't limited
+        self.assertEqual(os.path.getsize(obj.filename), obj.offset)
+        self.assertEqual(total, first + count_errors(obj.get_data(sys.maxsize)))
+
     def test_tranctl_jtl(self):
         obj = JTLReader(__dir__() + "/../jmeter/jtl/tranctl.jtl", logging.getLogger(''), None)
         values = [x for x in obj.datapoints(True)]
         self.assertEquals(1, len(values))
 
+    def test_jtl_columnar_buffer(self):
+        fds, fname = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        with open(fname, 'w') as jtl:
+            jtl.write("timeStamp,elapsed,label,responseCode,responseMessage,success,bytes,allThreads,Latency,Connect\n")
+            jtl.write('1431534938725,264,first,200,OK,true,100,1,30,10\n')
+            jtl.write('1431534938734,998,second,500,Error,false,200,2,20,0\n')
+            jtl.write('1431534938800,100,ignored,200,OK,true,300,2,10,0\n')
+            jtl.write('1431534939734,100,first,java.net.SocketException,Reset,false,0,2,0,0\n')
+            jtl.write('1431534938900,200,second,200,OK,true,400,2,10,5\n')
+            jtl.write('1431534940734,300,first,200,OK,true,500,1,10,5\n')
+
+        results = []
+        for columnar in (False, True):
+            obj = JTLReader(fname, logging.getLogger(''), None)
+            obj.columnar_buffer = columnar
+            obj.ignored_labels = ["ignored"]
+            points = list(obj.datapoints(True))
+            results.append([(point[DataPoint.TIMESTAMP], point[DataPoint.CURRENT]) for point in points])
+        os.remove(fname)
+
+        self.assertEqual([1431534938, 1431534939, 1431534940], [point[0] for point in results[0]])
+        self.assertNotIn("ignored", results[0][0][1])
+        self.assertEqual(results[0], results[1])
+
+    def test_jtl_quoted_values(self):
+        fds, fname = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        with open(fname, 'w') as jtl:
+            jtl.write("timeStamp,elapsed,label,responseCode,responseMessage,success,allThreads,Latency\n")
+            jtl.write('1431534938725,264,"label, with comma",500,"message, with comma",false,1,10\n')
+            jtl.write('1431534938734,998,simple,500,"multiline\nmessage",false,1,20\n')
+            jtl.write('1431534939734,100,simple,200,OK,true,1,30')
+
+        obj = JTLReader(fname, logging.getLogger(''), None)
+        values = list(obj._read())
+        self.assertEqual(2, len(values))
+        self.assertEqual("label, with comma", values[0][1])
+        self.assertEqual("message, with comma", values[0][7])
+        self.assertEqual("multiline\nmessage", values[1][7])
+        self.assertEqual(0.02, values[1][5])
+
+        with open(fname, 'a') as jtl:
+            jtl.write(',4\n')  # incomplete row should be completed on next read
+
+        values = list(obj._read(True))
+        os.remove(fname)
+        self.assertEqual(1, len(values))
+        self.assertEqual(1431534939, values[0][0])
+        self.assertEqual(None, values[0][7])
+
+    def test_jtl_quoted_multiline_split(self):
+        fds, fname = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        with open(fname, 'w') as jtl:
+            jtl.write("timeStamp,elapsed,label,responseCode,responseMessage,success,allThreads,Latency\n")
+            jtl.write('1431534938725,264,first,200,OK,true,1,10\n')
+            jtl.write('1431534938734,998,second,500,"multi\nline\n')  # quoted value continues in next read
+
+        obj = JTLReader(fname, logging.getLogger(''), None)
+        values = list(obj._read())
+        self.assertEqual(1, len(values))
+        self.assertEqual("first", values[0][1])
+
+        with open(fname, 'a') as jtl:
+            jtl.write('message",false,1,20\n')
+
+        values = list(obj._read(True))
+        os.remove(fname)
+        self.assertEqual(1, len(values))
+        self.assertEqual("second", values[0][1])
+        self.assertEqual("multi\nline\nmessage", values[0][7])
+
+    def test_jtl_truncated(self):
+        fds, fname = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        header = "timeStamp,elapsed,label,responseCode,responseMessage,success,allThreads,Latency\n"
+        with open(fname, 'w') as jtl:
+            jtl.write(header)
+            jtl.write('1431534938725,264,first,200,OK,true,1,10\n')
+            jtl.write('1431534938734,998,first,200,OK,true,1,20\n')
+
+        obj = JTLReader(fname, logging.getLogger(''), None)
+        self.assertEqual(2, len(list(obj._read())))
+        self.assertEqual([], list(obj._read()))
+
+        with open(fname, 'w') as jtl:
+            jtl.write(header)
+            jtl.write('1431534939734,100,second,200,OK,true,1,30\n')
+
+        self.assertEqual([], list(obj._read()))  # reader notices truncation and starts over
+        values = list(obj._read())
+        os.remove(fname)
+        self.assertEqual(1, len(values))
+        self.assertEqual("second", values[0][1])
+
     def test_distributed_th_hostnames(self):
         self.obj.execution.merge({"scenario": {"script": __dir__() + "/../jmeter/jmx/http.jmx"}})
         self.obj.distributed_servers = ["127.0.0.1", "127.0.0.1"]
@@ -1105,6 +1308,250 @@ class TestJMeterExecutor(BZTestCase):
         self.assertEqual(jmx.get('ResultCollector[testname="Trace Writer"]'), [])
         self.assertEqual(jmx.get('ResultCollector[testname="Errors Writer"]'), [])
 
+    def test_results_stream(self):
+        self.obj.engine.aggregator = ConsolidatingAggregator()
+        self.obj.settings.merge({"results-transport": "socket"})
+        self.obj.execution.merge({
+            "scenario": {
+                "requests": [{
+                    "url": "http://blazedemo.com"}]}})
+        self.obj.prepare()
+        jmx = JMX(self.obj.modified_jmx)
+        self.assertEqual(jmx.get('ResultCollector[testname="KPI Writer"]'), [])
+        listeners = jmx.get('JSR223Listener[testname="KPI Stream Writer"]')
+        self.assertEqual(1, len(listeners))
+        params = listeners[0].find('stringProp[@name="parameters"]').text
+        stream = self.obj.results_stream
+        self.assertEqual("127.0.0.1 %s %s" % (stream.port, stream.token), params)
+        self.assertIsNone(self.obj.kpi_jtl)
+        self.assertIs(self.obj.results_stream, self.obj.reader.csvreader)
+        self.obj.results_stream.close()
+
+    def test_results_binary(self):
+        self.obj.engine.aggregator = ConsolidatingAggregator()
+        self.obj.settings.merge({"results-transport": "binary"})
+        self.obj.execution.merge({
+            "scenario": {
+                "requests": [{
+                    "url": "http://blazedemo.com"}]}})
+        self.obj.prepare()
+        jmx = JMX(self.obj.modified_jmx)
+        self.assertEqual(jmx.get('ResultCollector[testname="KPI Writer"]'), [])
+        listeners = jmx.get('JSR223Listener[testname="KPI Binary Writer"]')
+        self.assertEqual(1, len(listeners))
+        params = listeners[0].find('stringProp[@name="parameters"]').text
+        self.assertEqual("local %s" % self.obj.kpi_bin, params)
+        self.assertIsNone(self.obj.kpi_jtl)
+        self.assertIsInstance(self.obj.reader, BinaryResultsReader)
+        self.assertEqual(self.obj.kpi_bin, self.obj.reader.filename)
+        self.assertIsNotNone(self.obj.reader.errors_reader)
+
+    def test_results_binary_distributed(self):
+        self.obj.engine.aggregator = ConsolidatingAggregator()
+        self.obj.settings.merge({"results-transport": "binary"})
+        self.obj.execution.merge({
+            "distributed": ["127.0.0.1"],
+            "scenario": {
+                "requests": [{
+                    "url": "http://blazedemo.com"}]}})
+        self.assertRaises(TaurusConfigError, self.obj.prepare)
+
+    def test_local_instances(self):
+        self.obj.engine.aggregator = ConsolidatingAggregator()
+        self.obj.execution.merge({
+            "local-instances": 3,
+            "concurrency": 10,
+            "throughput": 100,
+            "hold-for": "1m",
+            "scenario": {"script": __dir__() + "/../jmeter/jmx/http.jmx"}})
+        self.obj.prepare()
+        self.assertEqual(2, len(self.obj.shards))
+        instances = [self.obj] + self.obj.shards
+        self.assertEqual(3, len(set(instance.management_port for instance in instances)))
+        self.assertEqual(3, len(set(instance.kpi_jtl for instance in instances)))
+        self.assertEqual(3, len(self.obj.engine.aggregator.underlings))
+
+        threads = []
+        for instance in instances:
+            jmx = JMX(instance.modified_jmx)
+            threads.append(sum(int(group.find(".//stringProp[@name='ThreadGroup.num_threads']").text)
+                               for group in jmx.enabled_thread_groups()))
+            os.remove(instance.modified_jmx)
+        self.assertEqual([4, 3, 3], threads)
+
+    def test_local_instances_distributed(self):
+        self.obj.execution.merge({
+            "local-instances": 3,
+            "concurrency": 10,
+            "distributed": ["127.0.0.1"],
+            "scenario": {"script": __dir__() + "/../jmeter/jmx/http.jmx"}})
+        self.obj.prepare()
+        self.assertEqual([], self.obj.shards)
+
+    def test_plan_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        config = {
+            "concurrency": 10,
+            "hold-for": "1m",
+            "scenario": {"script": __dir__() + "/../jmeter/jmx/http.jmx"}}
+        self.obj.settings.merge({"plan-cache": cache_dir})
+        self.obj.execution.merge(config)
+        self.obj.prepare()
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+        with open(self.obj.modified_jmx) as fds:
+            modified = fds.read()
+
+        cached = get_jmeter()
+        cached.settings.merge({"plan-cache": cache_dir})
+        cached.execution.merge(config)
+        cached.prepare()
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+        self.assertNotEqual(self.obj.kpi_jtl, cached.kpi_jtl)
+        with open(cached.modified_jmx) as fds:
+            from_cache = fds.read()
+        os.remove(cached.modified_jmx)
+        self.assertIn(cached.kpi_jtl, from_cache)
+        self.assertIn(cached.log_jtl, from_cache)
+        expected = modified.replace(self.obj.kpi_jtl, cached.kpi_jtl).replace(self.obj.log_jtl, cached.log_jtl)
+        self.assertEqual(expected, from_cache)
+
+        other_load = get_jmeter()
+        other_load.settings.merge({"plan-cache": cache_dir})
+        other_load.execution.merge(config)
+        other_load.execution.merge({"concurrency": 5})
+        other_load.prepare()
+        os.remove(other_load.modified_jmx)
+        self.assertEqual(2, len(os.listdir(cache_dir)))
+        shutil.rmtree(cache_dir)
+
+    def test_plan_cache_eviction(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = PlanCache(cache_dir, logging.getLogger(''))
+            cache.MAX_FILES = 2
+            keys = [PlanCache.key("plan", num) for num in range(3)]
+            for num, key in enumerate(keys[:2]):
+                cache.put(key, ".jmx", b"<plan/>")
+                os.utime(os.path.join(cache_dir, key + ".jmx"), (num, num))
+
+            self.assertIsNotNone(cache.get(keys[0], ".jmx"))  # now it's recently used
+            cache.put(keys[2], ".jmx", b"<plan/>")
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+            self.assertIsNone(cache.get(keys[1], ".jmx"))
+            self.assertIsNotNone(cache.get(keys[0], ".jmx"))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_plan_cache_requests(self):
+        cache_dir = tempfile.mkdtemp()
+        config = {"scenario": {"requests": ["http://example.com/"]}}
+        self.obj.settings.merge({"plan-cache": cache_dir})
+        self.obj.execution.merge(config)
+        self.obj.prepare()
+        self.assertEqual(3, len(os.listdir(cache_dir)))
+
+        cached = get_jmeter()
+        cached.settings.merge({"plan-cache": cache_dir})
+        cached.execution.merge(config)
+        cached.prepare()
+        self.assertEqual(3, len(os.listdir(cache_dir)))
+        with open(self.obj.original_jmx) as generated, open(cached.original_jmx) as from_cache:
+            self.assertEqual(generated.read(), from_cache.read())
+        shutil.rmtree(cache_dir)
+
+    def test_results_stream_reading(self):
+        stream = StreamedCSVReader(logging.getLogger(''))
+        obj = JTLReader(None, logging.getLogger(''), None)
+        obj.csvreader = stream
+        self.assertEqual([], list(obj._read()))
+
+        client = socket.create_connection((stream.host, stream.port))
+        line = u("1431534938725\t264\tlabel\t500\tInternal error\tThread Group 1-1\tfalse\t100\t1\t1\t10\t4\thost\n")
+        client.sendall(stream.token.encode('ascii') + b"\n" + line.encode('utf-8') + line.encode('utf-8')[:20])
+        time.sleep(0.1)
+        values = list(obj._read())
+        self.assertEqual(1, len(values))
+        self.assertEqual((1431534938, "label", 1, 0.264, 0.004, 0.006, "500", "Internal error", '', 100), values[0])
+
+        client.sendall(line.encode('utf-8')[20:])
+        client.close()
+        time.sleep(0.1)
+        values = list(obj._read(True))
+        self.assertEqual(1, len(values))
+        self.assertEqual(2, obj.read_records)
+        self.assertEqual([], stream.connections)
+
+    def test_results_stream_token(self):
+        stream = StreamedCSVReader(logging.getLogger(''))
+        line = b"1431534938725\t264\tlabel\t200\tOK\tThread Group 1-1\ttrue\t100\t1\t1\t10\t4\thost\n"
+        intruder = socket.create_connection((stream.host, stream.port))
+        intruder.sendall(b"wrong-token\n" + line)
+        client = socket.create_connection((stream.host, stream.port))
+        client.sendall(stream.token.encode('ascii')[:10])  # token may arrive in pieces
+        time.sleep(0.1)
+        self.assertEqual([], list(stream.read()))
+        self.assertEqual(1, len(stream.server.pending))
+
+        client.sendall(stream.token.encode('ascii')[10:] + b"\n" + line)
+        time.sleep(0.1)
+        self.assertEqual(1, len(list(stream.read())))
+        self.assertEqual(1, len(stream.connections))
+        self.assertEqual({}, stream.server.pending)
+        self.assertEqual(b"", intruder.recv(1024))  # closed by server
+        intruder.close()
+        client.close()
+        stream.close()
+
+    def test_results_stream_distributed(self):
+        self.obj.engine.aggregator = ConsolidatingAggregator()
+        self.obj.settings.merge({"results-transport": "socket", "results-host": "127.0.0.1"})
+        self.obj.execution.merge({
+            "distributed": ["127.0.0.1", "127.0.0.2", "127.0.0.3"],
+            "scenario": {
+                "requests": [{
+                    "url": "http://blazedemo.com"}]}})
+        self.obj.prepare()
+        jmx = JMX(self.obj.modified_jmx)
+        listeners = jmx.get('JSR223Listener[testname="KPI Stream Writer"]')
+        params = listeners[0].find('stringProp[@name="parameters"]').text
+        stream = self.obj.results_stream
+        self.assertEqual("127.0.0.1 %s %s" % (stream.port, stream.token), params)
+        self.assertEqual(("127.0.0.1", stream.port), stream.server.server.getsockname())
+        self.assertEqual(2, len(self.obj.engine_readers))
+        self.assertEqual(3, len(self.obj.engine.aggregator.underlings))
+        self.assertEqual(3, len(self.obj.results_stream.server.readers))
+        self.assertTrue(all(reader.errors_elsewhere for reader in self.obj.engine_readers))
+        self.obj.results_stream.close()
+
+    def test_results_stream_engines(self):
+        obj = ConsolidatingAggregator()
+        obj.prepare()
+        server = KPIStreamServer(logging.getLogger(''))
+        for _ in range(2):
+            reader = JTLReader(None, logging.getLogger(''), None)
+            reader.is_distributed = True
+            reader.csvreader = StreamedCSVReader(logging.getLogger(''), server=server)
+            obj.add_underling(reader)
+
+        clients = []
+        for host, threads in (("host1", 5), ("host2", 7)):
+            client = socket.create_connection((server.host, server.port))
+            line = "%s\n1431534938725\t264\tlabel\t200\tOK\t%s-Thread Group 1-1\ttrue\t100\t%s\t%s\t10\t4\t%s\n"
+            client.sendall((line % (server.token, host, threads, threads, host)).encode('utf-8'))
+            clients.append(client)
+        time.sleep(0.1)
+
+        obj.check()
+        self.assertEqual([1, 1], [len(reader.csvreader.connections) for reader in obj.underlings])
+        for client in clients:
+            client.close()
+        time.sleep(0.1)
+
+        points = list(obj.datapoints(True))
+        self.assertEqual(1, len(points))
+        self.assertEqual(12, points[0][DataPoint.CURRENT][''][KPISet.CONCURRENCY])
+        self.assertEqual(2, points[0][DataPoint.CURRENT][''][KPISet.SAMPLE_COUNT])
+
     def test_jtl_flags(self):
         self.obj.execution.merge({
             "write-xml-jtl": "error",
@@ -1218,6 +1665,125 @@ class TestJMeterExecutor(BZTestCase):
         self.obj.post_process()
         self.assertIn("-Xmx2G", str(stdout))
 
+    def test_jvm_heap_auto(self):
+        self.configure({
+            'execution': {
+                'concurrency': 1000,
+                'hold-for': '1m',
+                'scenario': {
+                    'script': __dir__() + '/../jmeter/jmx/http.jmx'}},
+            'modules': {
+                'jmeter': {
+                    'memory-xmx': 'auto'}}})
+        self.obj.prepare()
+        jvm_settings = self.obj.execution['jvm-settings']
+        self.assertEqual("256k", jvm_settings["thread-stack"])
+        self.assertIn("-Xmx%s" % jvm_settings["heap"], self.obj._env["JVM_ARGS"])
+        self.assertIn("-Xss256k", self.obj._env["JVM_ARGS"])
+
+    def test_jvm_heap_auto_shards(self):
+        self.configure({
+            'execution': {
+                'concurrency': 1000,
+                'local-instances': 2,
+                'hold-for': '1m',
+                'scenario': {
+                    'script': __dir__() + '/../jmeter/jmx/http.jmx'}},
+            'modules': {
+                'jmeter': {
+                    'memory-xmx': 'auto'}}})
+        self.obj.prepare()
+        shard = self.obj.shards[0]
+        self.assertIsNot(self.obj.jvm_settings, shard.jvm_settings)
+        self.assertIs(self.obj.jvm_settings, self.obj.execution['jvm-settings'])
+        self.assertIn("-Xmx%s" % shard.jvm_settings["heap"], shard._env["JVM_ARGS"])
+
+    def test_jvm_heap_limit_instances(self):
+        single = get_jvm_settings(10 ** 7, 1, logging.getLogger(''))
+        shared = get_jvm_settings(10 ** 7, 1, logging.getLogger(''), instances=4)
+        single_mb = int(single["heap"][:-1])
+        self.assertEqual("%sm" % max(single_mb // 4, 256), shared["heap"])
+
+    def test_warm_worker(self):
+        self.configure({
+            'execution': [
+                {'iterations': 1, 'scenario': {'script': __dir__() + '/../jmeter/jmx/dummy.jmx'}},
+                {'iterations': 1, 'scenario': {'script': __dir__() + '/../jmeter/jmx/http.jmx'}}],
+            'modules': {
+                'jmeter': {
+                    'warm-worker': True}}})
+        self.obj.engine.provisioning.settings.merge({"sequential": True})
+        second = get_jmeter()
+        second.engine = self.obj.engine
+        second.settings = self.obj.settings
+        second.execution = self.obj.engine.config['execution'][1]
+
+        self.obj.prepare()
+        second.prepare()
+        pool = self.obj.warm_pool
+        self.assertIs(pool, second.warm_pool)
+        self.assertIn(pool, self.obj.engine.services)
+        self.assertEqual(1, len(pool.servers))  # second one starts after first, so it reuses server
+        with open(self.obj.properties_file) as fds:
+            self.assertIn("server.rmi.ssl.disable=true", fds.read())
+
+        self.obj.startup()
+        server = self.obj.warm_server
+        self.assertTrue(server.busy)
+        while not self.obj.check():
+            time.sleep(self.obj.engine.check_interval)
+        self.assertFalse(server.busy)
+
+        second.startup()
+        self.assertIs(server, second.warm_server)
+        while not second.check():
+            time.sleep(second.engine.check_interval)
+        self.assertEqual(2, server.runs)
+
+        self.obj.post_process()
+        second.post_process()
+        self.assertTrue(server.is_alive())  # servers belong to engine, not to executions
+        pool.shutdown()
+        self.assertFalse(server.is_alive())
+        self.assertEqual([], pool.servers)
+
+    def test_warm_worker_restart(self):
+        self.configure({
+            'execution': [
+                {'iterations': 1, 'scenario': {'script': __dir__() + '/../jmeter/jmx/dummy.jmx'}},
+                {'iterations': 1, 'scenario': {'script': __dir__() + '/../jmeter/jmx/http.jmx'}}],
+            'modules': {
+                'jmeter': {
+                    'warm-worker': True,
+                    'warm-worker-runs': 1}}})
+        self.obj.engine.provisioning.settings.merge({"sequential": True})
+        second = get_jmeter()
+        second.engine = self.obj.engine
+        second.settings = self.obj.settings
+        second.execution = self.obj.engine.config['execution'][1]
+
+        self.obj.prepare()
+        second.prepare()
+        pool = self.obj.warm_pool
+        self.assertEqual(1, pool.max_runs)
+
+        self.obj.startup()
+        first_server = self.obj.warm_server
+        while not self.obj.check():
+            time.sleep(self.obj.engine.check_interval)
+        self.assertFalse(first_server.is_alive())  # it ran its only plan
+        self.assertNotIn(first_server, pool.servers)
+
+        second.startup()
+        self.assertIsNot(first_server, second.warm_server)
+        while not second.check():
+            time.sleep(second.engine.check_interval)
+
+        self.obj.post_process()
+        second.post_process()
+        pool.shutdown()
+        self.assertEqual([], pool.servers)
+
     def test_data_sources_in_artifacts(self):
         self.configure({
             'execution': {
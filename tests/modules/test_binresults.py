@@ -0,0 +1,90 @@
+import logging
+import os
+import tempfile
+
+from bzt import TaurusInternalException
+from bzt.modules.aggregator import DataPoint, KPISet
+from bzt.modules.binresults import BinaryResultsWriter, BinaryResultsReader, convert_jtl, MAGIC
+from bzt.modules.jmeter import JTLReader
+from tests import BZTestCase, __dir__
+
+
+class TestBinaryResults(BZTestCase):
+    def setUp(self):
+        super(TestBinaryResults, self).setUp()
+        fds, self.fname = tempfile.mkstemp(".bin")
+        os.close(fds)
+
+    def tearDown(self):
+        os.remove(self.fname)
+        super(TestBinaryResults, self).tearDown()
+
+    def test_converted_same_as_jtl(self):
+        jtl = __dir__() + "/../jmeter/jtl/unicode.jtl"
+        count = convert_jtl(jtl, self.fname, logging.getLogger(''))
+        self.assertEqual(13, count)
+
+        jtl_samples = list(JTLReader(jtl, logging.getLogger(''), None)._read(True))
+        bin_samples = list(BinaryResultsReader(self.fname, logging.getLogger(''))._read(True))
+        self.assertEqual(jtl_samples, bin_samples)
+
+        jtl_points = list(JTLReader(jtl, logging.getLogger(''), None).datapoints(True))
+        bin_points = list(BinaryResultsReader(self.fname, logging.getLogger('')).datapoints(True))
+        self.assertEqual(len(jtl_points), len(bin_points))
+        for jtl_point, bin_point in zip(jtl_points, bin_points):
+            self.assertEqual(jtl_point[DataPoint.TIMESTAMP], bin_point[DataPoint.TIMESTAMP])
+            jtl_cumul = jtl_point[DataPoint.CUMULATIVE]
+            bin_cumul = bin_point[DataPoint.CUMULATIVE]
+            self.assertEqual(set(jtl_cumul.keys()), set(bin_cumul.keys()))
+            for label in jtl_cumul:
+                self.assertEqual(jtl_cumul[label][KPISet.SAMPLE_COUNT], bin_cumul[label][KPISet.SAMPLE_COUNT])
+                self.assertEqual(jtl_cumul[label][KPISet.AVG_RESP_TIME], bin_cumul[label][KPISet.AVG_RESP_TIME])
+
+    def test_incremental(self):
+        writer = BinaryResultsWriter(self.fname)
+        reader = BinaryResultsReader(self.fname, logging.getLogger(''))
+        self.assertEqual([], list(reader._read()))
+
+        writer.add((1, "first", 1, 0.5, None, 0.2, "200", None, '', 100))
+        writer.add((1, "second", 2, 0.7, 0.1, 0.3, "500", "Internal error", '', None))
+        writer.flush()
+
+        # cut file in the middle of the record, rest must be read on next pass
+        with open(self.fname, 'rb') as fds:
+            data = fds.read()
+        with open(self.fname, 'wb') as fds:
+            fds.write(data[:-10])
+
+        samples = list(reader._read())
+        self.assertEqual([(1, "first", 1, 0.5, None, 0.2, "200", None, '', 100)], samples)
+
+        with open(self.fname, 'wb') as fds:
+            fds.write(data)
+
+        samples = list(reader._read(True))
+        self.assertEqual([(1, "second", 2, 0.7, 0.1, 0.3, "500", "Internal error", '', None)], samples)
+        self.assertEqual(2, reader.read_records)
+        writer.close()
+
+    def test_not_binary(self):
+        with open(self.fname, 'wb') as fds:
+            fds.write(b"timeStamp,elapsed,label\n")
+
+        reader = BinaryResultsReader(self.fname, logging.getLogger(''))
+        self.assertRaises(TaurusInternalException, list, reader._read(True))
+
+    def test_magic(self):
+        with BinaryResultsWriter(self.fname) as writer:
+            writer.add((1, "label", 1, 0.5, None, 0.2, "200", None, '', 100))
+
+        with open(self.fname, 'rb') as fds:
+            self.assertEqual(MAGIC, fds.read(len(MAGIC)))
+
+    def test_errors_jtl(self):
+        with BinaryResultsWriter(self.fname) as writer:
+            writer.add((1, "label", 1, 0.5, None, 0.2, "200", None, '', 100))
+
+        errors_jtl = __dir__() + "/../jmeter/jtl/standard-errors.jtl"
+        reader = BinaryResultsReader(self.fname, logging.getLogger(''), errors_jtl)
+        self.assertEqual(1, len(list(reader._read(True))))
+        self.assertTrue(reader.errors_reader.buffer)
@@ -2,9 +2,9 @@ import os
 import sys
 import time
 
-from bzt.engine import Provisioning, ScenarioExecutor
+from bzt.engine import Provisioning, ScenarioExecutor, ModuleTimings
 from bzt.modules.aggregator import DataPoint, KPISet
-from bzt.modules.console import ConsoleStatusReporter
+from bzt.modules.console import ConsoleStatusReporter, EngineTimingsWidget
 from bzt.modules.jmeter import JMeterExecutor
 from bzt.modules.provisioning import Local
 from bzt.utils import is_windows, EXE_SUFFIX
@@ -162,3 +162,19 @@ class TestConsoleStatusReporter(BZTestCase):
             self.assertEqual(obj._get_screen(), "gui")
         else:
             self.assertEqual(obj._get_screen_type(), "console")
+
+    def test_engine_timings_widget(self):
+        engine = EngineEmul()
+        timings = ModuleTimings()
+        reporter = ConsoleStatusReporter()
+        timings.aliases[reporter] = "console"
+        timings.add(reporter, "prepare", 1.5)
+        timings.add(reporter, "check", 0.2)
+        timings.add(engine, "loop", 0.05)
+
+        widget = EngineTimingsWidget(timings)
+        widget.update()
+        text = widget.display.text
+        self.assertIn("console: 200.0 avg, 200.0 max ms", text)
+        self.assertIn("engine: 50.0 avg", text)
+        self.assertNotIn("1500", text)
@@ -1,6 +1,9 @@
+import copy
 from random import random
+from collections import Counter
 
-from bzt.modules.aggregator import ConsolidatingAggregator, DataPoint, KPISet, AggregatorListener
+from bzt.modules.aggregator import ConsolidatingAggregator, DataPoint, KPISet, AggregatorListener, TopLabels
+from bzt.modules.aggregator import SampleColumns
 from tests import BZTestCase, r
 from tests.mocks import MockReader
 from bzt.modules.reporting import Reporter
@@ -42,6 +45,28 @@ class TestConsolidatingAggregator(BZTestCase):
         self.assertEquals(1.5, dst[DataPoint.CUMULATIVE][''].sum_rt)
         self.assertEquals(0.15, dst[DataPoint.CUMULATIVE][''][KPISet.AVG_RESP_TIME])
 
+    def test_lazy_recalculation(self):
+        dst = DataPoint(0, [50, 100])
+        for num in range(1, 4):
+            src = DataPoint(0)
+            kpiset = src[DataPoint.CURRENT].get('', KPISet([50, 100]))
+            kpiset.add_sample((1, num, 0, 0, 200, None, '', 0))
+            dst.merge_point(src)
+
+        current = dst[DataPoint.CURRENT]['']
+        self.assertEqual(3, current[KPISet.SAMPLE_COUNT])
+        self.assertEqual(2, current[KPISet.AVG_RESP_TIME])
+        self.assertEqual(3, current[KPISet.PERCENTILES]['100.0'])
+
+        src = KPISet()
+        src[KPISet.RESP_TIMES].update({0.5: 1, 0.1: 2})
+        current.merge_kpis(src)
+        current.merge_kpis(src)
+        current.recalculate_if_needed()
+        self.assertEqual(0.5, current[KPISet.PERCENTILES]['50.0'])
+        self.assertEqual(3, current[KPISet.PERCENTILES]['100.0'])
+        self.assertEqual([0.1, 0.5, 1, 2, 3], sorted(current[KPISet.RESP_TIMES].keys()))
+
     def test_two_executions(self):
         # check consolidator
         obj = ConsolidatingAggregator()
@@ -90,6 +115,28 @@ class TestConsolidatingAggregator(BZTestCase):
         mock.data.append((6 + offset, "second", 1, r(), r(), r(), 200, 'unique FAIL', '', 0))
         return mock
 
+    def test_cumulative_from_current(self):
+        obj = ConsolidatingAggregator()
+        obj.prepare()
+        obj.add_underling(self.get_fail_reader())
+        obj.add_underling(self.get_fail_reader(offset=1))
+        points = list(obj._calculate_datapoints(True))
+        for point in points:
+            self.assertEqual({}, point[DataPoint.CUMULATIVE])
+
+        obj = ConsolidatingAggregator()
+        obj.prepare()
+        obj.add_underling(self.get_fail_reader())
+        obj.add_underling(self.get_fail_reader(offset=1))
+        listener = MockListener()
+        obj.add_listener(listener)
+        obj.post_process()
+        cumul = listener.results[-1][DataPoint.CUMULATIVE]
+        for label, count in (('', 12), ('first', 8), ('second', 4)):
+            self.assertEqual(count, cumul[label][KPISet.SAMPLE_COUNT])
+            underlings_count = sum(und.cumulative[label][KPISet.SAMPLE_COUNT] for und in obj.underlings)
+            self.assertEqual(underlings_count, cumul[label][KPISet.SAMPLE_COUNT])
+
     def test_errors_cumulative(self):
         aggregator = ConsolidatingAggregator()
         aggregator.track_percentiles = [50]
@@ -135,6 +182,177 @@ class TestConsolidatingAggregator(BZTestCase):
             dst.compact_times()
             self.assertEqual(100, len(dst[KPISet.RESP_TIMES]))
 
+    def test_rtimes_precision(self):
+        obj = ConsolidatingAggregator()
+        obj.settings['rtimes-precision'] = 2
+        obj.prepare()
+        reader = self.get_fail_reader()
+        obj.add_underling(reader)
+        listener = MockListener()
+        obj.add_listener(listener)
+        obj.post_process()
+        self.assertTrue(listener.results)
+        for dp in listener.results:
+            for kpiset in dp['cumulative'].values():
+                self.assertEqual(2, kpiset.rtimes_precision)
+                for r_time in kpiset[KPISet.RESP_TIMES]:
+                    self.assertEqual(r_time, KPISet.rt_bucket(r_time, 2))
+
+    def test_kpiset_histogram_merge(self):
+        vals = {round(random() * 20 + 0.001, 5): int(random() * 3 + 1) for _ in range(1000)}
+        src = KPISet()
+        src[KPISet.RESP_TIMES].update(vals)
+        dst = KPISet(rt_precision=2)
+        for _ in range(10):
+            dst.merge_kpis(src)
+        self.assertEqual(10 * sum(vals.values()), sum(dst[KPISet.RESP_TIMES].values()))
+        self.assertLessEqual(len(dst[KPISet.RESP_TIMES]), 90 * 4)
+        for r_time in vals:
+            bucket = KPISet.rt_bucket(r_time, 2)
+            self.assertLessEqual(abs(bucket - r_time), r_time * 0.05)
+
+    def test_merge_keeps_rtimes_settings(self):
+        src = DataPoint(0)
+        kpiset = src[DataPoint.CURRENT].get('', KPISet(rt_dist_maxlen=42, rt_precision=2))
+        kpiset.add_sample((1, 0.123456, 0, 0, 200, None, '', 0))
+        dst = DataPoint(0)
+        dst.merge_point(src)
+        merged = dst[DataPoint.CURRENT]['']
+        self.assertEqual(42, merged.rtimes_len)
+        self.assertEqual(2, merged.rtimes_precision)
+
+        mycopy = copy.deepcopy(merged)
+        self.assertEqual(42, mycopy.rtimes_len)
+        self.assertEqual(2, mycopy.rtimes_precision)
+        self.assertEqual([KPISet.rt_bucket(0.123456, 2)], list(mycopy[KPISet.RESP_TIMES].keys()))
+
+    def test_parallel_aggregation(self):
+        results = []
+        for parallel, columnar in ((False, False), (2, False), (2, True)):
+            obj = ConsolidatingAggregator()
+            obj.track_percentiles = [0, 50, 100]
+            obj.settings['parallel-aggregation'] = parallel
+            obj.settings['columnar-buffer'] = columnar
+            obj.settings['generalize-labels'] = True
+            obj.settings['errors-len'] = 2
+            obj.prepare()
+            listener = MockListener()
+            obj.add_listener(listener)
+            for num in range(4):
+                reader = self.get_fail_reader()
+                reader.data = [sample[:3] + (0.5 + num, 0.1, 0.2) + sample[6:] for sample in reader.data]
+                reader.data.append((2, "label %s" % (num * 100), 1, 0.5, 0.1, 0.2, 500, "error %s" % num, '', 10))
+                obj.add_underling(reader)
+            obj.check()
+            obj.shutdown()
+            obj.post_process()
+            results.append([(point[DataPoint.TIMESTAMP], point[DataPoint.CURRENT], point[DataPoint.CUMULATIVE])
+                            for point in listener.results])
+
+        self.assertTrue(results[0])
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_errors_variety(self):
+        obj = ConsolidatingAggregator()
+        obj.settings['errors-len'] = 10
+        obj.prepare()
+        reader = MockReader()
+        reader.data.append((1, "label", 1, r(), r(), r(), 404, "error 0", '', 0))
+        for num in range(100):
+            reader.data.append((1 + num % 3, "label", 1, r(), r(), r(), 500, "error %s" % (num % 20), '', 0))
+        obj.add_underling(reader)
+        listener = MockListener()
+        obj.add_listener(listener)
+        obj.post_process()
+
+        cumul = listener.results[-1][DataPoint.CUMULATIVE]['label']
+        self.assertEqual(10, len(cumul[KPISet.ERRORS]))
+        self.assertEqual(101, sum(err['cnt'] for err in cumul[KPISet.ERRORS]) + cumul[KPISet.OTHER_ERRORS])
+        self.assertEqual(2, len([err for err in cumul[KPISet.ERRORS] if err['msg'] == "error 0"]))
+
+    def test_merge_keeps_errors_len(self):
+        src = DataPoint(0)
+        kpiset = src[DataPoint.CURRENT].get('', KPISet(errors_maxlen=1))
+        kpiset.add_sample((1, 0.1, 0, 0, 500, "error 0", '', 0))
+        dst = DataPoint(0)
+        dst.merge_point(src)
+        merged = dst[DataPoint.CURRENT]['']
+        self.assertEqual(1, merged.errors_len)
+
+        mycopy = copy.deepcopy(merged)
+        self.assertEqual(1, mycopy.errors_len)
+        mycopy.inc_error(KPISet.error_item_skel("error 1", "500", 2, KPISet.ERRTYPE_ERROR, Counter()))
+        self.assertEqual(1, len(mycopy[KPISet.ERRORS]))
+        self.assertEqual(2, mycopy[KPISet.OTHER_ERRORS])
+
+    def test_max_labels(self):
+        obj = ConsolidatingAggregator()
+        obj.settings['max-labels'] = 3
+        obj.prepare()
+        reader = MockReader()
+        for num in range(1, 6):
+            for label in ("heavy%s" % num, "light%s" % num):
+                reader.data.append((num, label, 1, r(), r(), r(), 200, None, '', 0))
+            for _ in range(10):
+                reader.data.append((num, "heavy", 1, r(), r(), r(), 200, None, '', 0))
+        obj.add_underling(reader)
+        listener = MockListener()
+        obj.add_listener(listener)
+        obj.post_process()
+
+        for point in listener.results:
+            cumul = point[DataPoint.CUMULATIVE]
+            self.assertLessEqual(len(cumul), 5)  # 3 labels, other and overall
+            self.assertEqual(cumul[''][KPISet.SAMPLE_COUNT],
+                             sum(cumul[label][KPISet.SAMPLE_COUNT] for label in cumul if label))
+            for label in point[DataPoint.CURRENT]:
+                self.assertIn(label, cumul)
+
+        cumul = listener.results[-1][DataPoint.CUMULATIVE]
+        self.assertEqual(50, cumul['heavy'][KPISet.SAMPLE_COUNT])
+        self.assertIn(ConsolidatingAggregator.OTHER_LABEL, cumul)
+
+    def test_max_labels_keeps_kpiset_settings(self):
+        obj = ConsolidatingAggregator()
+        obj.settings['max-labels'] = 1
+        obj.settings['rtimes-precision'] = 2
+        obj.settings['errors-len'] = 1
+        obj.prepare()
+        reader = MockReader()
+        for _ in range(5):
+            reader.data.append((1, "heavy", 1, r(), r(), r(), 200, None, '', 0))
+        for num in range(3):
+            reader.data.append((1, "light", 1, 0.123456, r(), r(), 500, "error %s" % num, '', 0))
+        obj.add_underling(reader)
+        listener = MockListener()
+        obj.add_listener(listener)
+        obj.post_process()
+
+        other = reader.results[-1][DataPoint.CURRENT][ConsolidatingAggregator.OTHER_LABEL]
+        self.assertEqual(2, other.rtimes_precision)
+        self.assertEqual(1, len(other[KPISet.ERRORS]))
+        self.assertEqual(2, other[KPISet.OTHER_ERRORS])
+        self.assertEqual([KPISet.rt_bucket(0.123456, 2)], list(other[KPISet.RESP_TIMES].keys()))
+
+    def test_top_labels(self):
+        top = TopLabels(2)
+        self.assertEqual([], top.update({"a": 10, "b": 1}))
+        self.assertEqual([], top.update({"c": 1}))
+        self.assertNotIn("c", top)
+        self.assertEqual(["b"], top.update({"c": 5}))
+        self.assertIn("c", top)
+        self.assertIn("a", top)
+
+    def test_columns_byte_count_int(self):
+        columns = SampleColumns()
+        columns.extend([("label", 1, 0.5, 0.1, 0.2, "200", None, '', 1024),
+                        ("label", 1, 0.7, None, None, "200", None, '', None)])
+        kpiset = KPISet()
+        kpiset.add_columns(columns, [0, 1])
+        self.assertEqual(1024, kpiset[KPISet.BYTE_COUNT])
+        self.assertIsInstance(kpiset[KPISet.BYTE_COUNT], int)
+
 
 class MockListener(AggregatorListener):
     def __init__(self):
@@ -120,3 +120,39 @@ class TestDefaultAggregator(BZTestCase):
         points = list(mock.datapoints())
         points = list(mock.datapoints())
         self.assertTrue(mock.buffer_len < buffer_len)
+
+    def test_columnar_buffer(self):
+        samples = []
+        for num in range(1000):
+            samples.append((1 + num % 5, "label%s" % (num % 7), 1 + num % 3, r(), r(), r(), rc(), err(), 'tr', num))
+        samples.append((5, "", 1, r(), r(), r(), None, "No RC", 'tr', None))
+
+        results = []
+        for columnar in (False, True):
+            mock = MockReader()
+            mock.columnar_buffer = columnar
+            mock.track_percentiles = [50, 90, 100]
+            mock.data.extend(samples)
+            results.append(list(mock.datapoints(True)))
+
+        self.assertEqual(5, len(results[0]))
+        for row_point, col_point in zip(*results):
+            self.assertEqual(row_point[DataPoint.CURRENT], col_point[DataPoint.CURRENT])
+            self.assertEqual(row_point[DataPoint.CUMULATIVE], col_point[DataPoint.CUMULATIVE])
+
+    def test_cumulative_snapshots(self):
+        mock = MockReader()
+        mock.data.append((1, "first", 1, r(), r(), r(), 200, None, '', 0))
+        mock.data.append((1, "second", 1, r(), r(), r(), 200, None, '', 0))
+        mock.data.append((2, "first", 1, r(), r(), r(), 200, None, '', 0))
+        mock.data.append((3, "first", 1, r(), r(), r(), 200, None, '', 0))
+        points = list(mock.datapoints(True))
+        self.assertEqual(3, len(points))
+
+        first, second = points[0][DataPoint.CUMULATIVE], points[1][DataPoint.CUMULATIVE]
+        self.assertIs(first['second'], second['second'])
+        self.assertIsNot(first['first'], second['first'])
+        self.assertIsNot(mock.cumulative['first'], points[-1][DataPoint.CUMULATIVE]['first'])
+        self.assertEqual(1, first['first'][KPISet.SAMPLE_COUNT])
+        self.assertEqual(2, second['first'][KPISet.SAMPLE_COUNT])
+        self.assertEqual(mock.cumulative, points[-1][DataPoint.CUMULATIVE])
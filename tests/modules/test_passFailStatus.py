@@ -4,7 +4,7 @@ import time
 
 from bzt import AutomatedShutdown
 from bzt.modules.aggregator import DataPoint, KPISet
-from bzt.modules.passfail import PassFailStatus, DataCriterion
+from bzt.modules.passfail import PassFailStatus, DataCriterion, EngineTimingsCriterion
 from bzt.utils import BetterDict
 from tests import BZTestCase, __dir__, random_datapoint
 from tests.mocks import EngineEmul
@@ -241,3 +241,28 @@ class TestPassFailStatus(BZTestCase):
         for crit in obj.criteria:
             self.assertTrue(crit.is_triggered)
 
+    def test_engine_timings_criteria(self):
+        obj = PassFailStatus()
+        obj.engine = EngineEmul()
+        obj.parameters = {"criteria": [{
+            "class": EngineTimingsCriterion.__module__ + "." + EngineTimingsCriterion.__name__,
+            "subject": "passfail/check",
+            "condition": ">",
+            "threshold": "100ms",
+            "stop": False,
+        }]}
+        obj.engine.timings.aliases[obj] = "passfail"
+        obj.prepare()
+        crit = obj.criteria[0]
+        self.assertIsInstance(crit, EngineTimingsCriterion)
+
+        obj.engine.timings.add(obj, "check", 0.01)
+        obj.check()
+        self.assertFalse(crit.is_triggered)
+
+        obj.engine.timings.add(obj, "check", 0.5)
+        crit.last_tstmp = None  # next second
+        obj.check()
+        self.assertTrue(crit.is_triggered)
+        self.assertRaises(AutomatedShutdown, obj.post_process)
+
@@ -0,0 +1,55 @@
+"""
+Benchmark of errors JTL reading: replicates failed samples from test resources into file of given size,
+then measures how many read ticks `JTLErrorsReader` needs to catch up and time spent per failed sample.
+
+Usage: python -m tests.perf.errors_reading [size in MB, default 100]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from bzt.modules.jmeter import JTLErrorsReader
+from tests import __dir__
+
+HEADER = b'<testResults version="1.2">'
+
+
+def generate_errors_jtl(filename, size_mb):
+    with open(__dir__() + "/../jmeter/jtl/standard-errors.jtl", 'rb') as fds:
+        prefix, samples = fds.read().split(HEADER, 1)
+
+    with open(filename, 'wb') as fds:
+        fds.write(prefix + HEADER)
+        while fds.tell() < size_mb * 1024 * 1024:
+            fds.write(samples)
+        fds.write(b"</testResults>")
+
+    return samples.count(b"<httpSample ") * (os.path.getsize(filename) // len(samples))
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    fds, filename = tempfile.mkstemp(".jtl")
+    os.close(fds)
+    try:
+        samples = generate_errors_jtl(filename, size_mb)
+        reader = JTLErrorsReader(filename, logging.getLogger(''))
+        ticks = []
+        while reader.offset < os.path.getsize(filename):
+            start = time.time()
+            reader.read_file()
+            ticks.append(time.time() - start)
+
+        total = sum(ticks)
+        sys.stdout.write("Samples:         %d in %d MB\n" % (samples, size_mb))
+        sys.stdout.write("Ticks to finish: %d, longest %.2fs\n" % (len(ticks), max(ticks)))
+        sys.stdout.write("Per sample:      %.1f us\n" % (total / samples * 1000000))
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    logging.getLogger('').setLevel(logging.INFO)
+    main()
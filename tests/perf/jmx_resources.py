@@ -0,0 +1,53 @@
+"""
+Benchmark of resource files collection from JMX: generates test plan with given count of CSV data sets,
+each one under its own thread group, saves it to temporary file, then measures streaming collection of
+paths and rewriting them to basenames.
+
+Usage: python -m tests.perf.jmx_resources [count of data sets, default 2000]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from bzt.jmx import JMX
+from bzt.modules.jmeter import JMXResourceIndex
+from bzt.six import etree
+
+
+def generate_jmx(count):
+    jmx = JMX()
+    for num in range(count):
+        group = etree.Element("ThreadGroup", testname="Group %s" % num)
+        jmx.append(JMX.TEST_PLAN_SEL, group)
+        tree = etree.Element("hashTree")
+        tree.append(JMX._get_csv_config("/data/set-%s.csv" % num, ",", False, True))
+        tree.append(etree.Element("hashTree"))
+        jmx.append(JMX.TEST_PLAN_SEL, tree)
+    return jmx
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    handle, filename = tempfile.mkstemp(suffix=".jmx")
+    os.close(handle)
+    try:
+        generate_jmx(count).save(filename)
+
+        start = time.time()
+        index = JMXResourceIndex(filename)
+        files = index.get_resource_files()
+        indexed = time.time() - start
+
+        JMXResourceIndex.rewrite(JMX(filename), dict((path, path.rsplit("/", 1)[-1]) for path in files))
+        elapsed = time.time() - start
+    finally:
+        os.remove(filename)
+
+    sys.stdout.write("Data sets:  %d, paths %d\n" % (count, len(files)))
+    sys.stdout.write("Indexing:   %.3fs\n" % indexed)
+    sys.stdout.write("Total:      %.3fs\n" % elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark of CSV JTL reading: synthesizes JTL file of given size and measures rows per second
+of `JTLReader` against plain `csv.DictReader` based parsing, which was used before.
+
+Usage: python -m tests.perf.jtl_reading [size in MB, default 100] [file to keep JTL in]
+"""
+import csv
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bzt.modules.jmeter import JTLReader
+from bzt.utils import guess_csv_dialect
+
+HEADER = "timeStamp,elapsed,label,responseCode,responseMessage,threadName,dataType,success," \
+         "failureMessage,bytes,grpThreads,allThreads,Latency,IdleTime,Connect\n"
+
+
+def generate_jtl(filename, size_mb):
+    random.seed(1)
+    labels = ["http://blazedemo.com/page-%s" % num for num in range(20)]
+    tstmp = 1430825787000
+    with open(filename, 'w') as fds:
+        fds.write(HEADER)
+        while fds.tell() < size_mb * 1024 * 1024:
+            lines = []
+            for _ in range(10000):
+                tstmp += random.randint(0, 5)
+                if random.random() < 0.05:
+                    status = '500,"Internal error, retry later",Thread Group 1-1,text,false'
+                else:
+                    status = '200,OK,Thread Group 1-1,text,true'
+                lines.append("%s,%s,%s,%s,%s,%s,10,10,%s,0,%s\n" % (
+                    tstmp, random.randint(10, 1000), random.choice(labels), status, "",
+                    random.randint(100, 10000), random.randint(5, 500), random.randint(0, 5)))
+            fds.writelines(lines)
+
+
+def read_dict_reader(filename):
+    count = 0
+    with open(filename) as fds:
+        reader = csv.DictReader(fds, dialect=guess_csv_dialect(fds.readline()),
+                                fieldnames=HEADER.strip().split(','))
+        for row in reader:
+            int(row["timeStamp"]), int(row["elapsed"]), int(row["Latency"]), int(row["Connect"])
+            int(row["allThreads"]), int(row.get("bytes", 0)), row["label"], row["responseCode"]
+            count += 1
+    return count
+
+
+def read_jtl_reader(filename):
+    reader = JTLReader(filename, logging.getLogger(''), None)
+    count = 0
+    for _ in reader._read(True):
+        count += 1
+    return count
+
+
+def measure(title, func, filename):
+    start = time.time()
+    count = func(filename)
+    elapsed = time.time() - start
+    sys.stdout.write("%-20s %10d rows %8.2fs %12.0f rows/s\n" % (title, count, elapsed, count / elapsed))
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    if len(sys.argv) > 2:
+        filename = sys.argv[2]
+        keep = True
+    else:
+        fds, filename = tempfile.mkstemp(".jtl")
+        os.close(fds)
+        keep = False
+
+    try:
+        if not os.path.getsize(filename):
+            generate_jtl(filename, size_mb)
+        measure("csv.DictReader", read_dict_reader, filename)
+        measure("JTLReader", read_jtl_reader, filename)
+    finally:
+        if not keep:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """ test """
+import json
 import logging
 import os
 import shutil
@@ -16,6 +17,7 @@ class TestCLI(BZTestCase):
         self.verbose = True
         self.no_system_configs = True
         self.option = []
+        self.profile = False
         self.datadir = os.path.join(os.path.dirname(__file__), "..", "build", "acli")
         self.obj = CLI(self)
         self.aliases = []
@@ -25,6 +27,22 @@ class TestCLI(BZTestCase):
         ret = self.obj.perform([__dir__() + "/json/mock_normal.json"])
         self.assertEquals(0, ret)
 
+    def test_perform_profile(self):
+        self.profile = True
+        ret = self.obj.perform([__dir__() + "/json/mock_normal.json"])
+        self.assertEquals(0, ret)
+        artifacts = os.listdir(self.obj.engine.artifacts_dir)
+        self.assertIn("profile.prof", artifacts)
+        self.assertIn("profile.txt", artifacts)
+        self.assertIn("engine-timings.json", artifacts)
+
+        with open(os.path.join(self.obj.engine.artifacts_dir, "engine-timings.json")) as fds:
+            timings = json.load(fds)
+        self.assertIn("mock1", timings)
+        self.assertEqual(1, timings["mock1"]["prepare"]["count"])
+        self.assertGreater(timings["mock1"]["check"]["count"], 0)
+        self.assertGreater(timings["engine"]["loop"]["count"], 0)
+
     def test_perform_overrides(self):
         self.option.append("test.subkey5.-1=value")
         self.option.append("modules.mock=" + ModuleMock.__module__ + "." + ModuleMock.__name__)
@@ -0,0 +1,40 @@
+from bzt import TaurusConfigError
+from bzt.benchmark import AggregationBenchmark, SyntheticReader, parse_settings
+from bzt.modules.aggregator import DataPoint, KPISet
+
+from tests import BZTestCase
+
+
+class FakeOptions(object):
+    def __init__(self, duration=5, rate=100, executors=2, labels=5, errors=0.1, rt_mean=0.2, rt_sigma=0.5):
+        self.duration = duration
+        self.rate = rate
+        self.executors = executors
+        self.labels = labels
+        self.errors = errors
+        self.rt_mean = rt_mean
+        self.rt_sigma = rt_sigma
+
+
+class TestBenchmark(BZTestCase):
+    def test_synthetic_reader(self):
+        reader = SyntheticReader(labels=3, rate=50, error_ratio=1.0, seed=1)
+        points = list(reader.datapoints()) + list(reader.datapoints()) + list(reader.datapoints(True))
+        self.assertEqual([1, 2], [point[DataPoint.TIMESTAMP] for point in points])
+        self.assertEqual(50, points[0][DataPoint.CURRENT][''][KPISet.SAMPLE_COUNT])
+        self.assertEqual(50, points[0][DataPoint.CURRENT][''][KPISet.FAILURES])
+        self.assertEqual(3, len(points[0][DataPoint.CURRENT]) - 1)
+        self.assertEqual(100, reader.samples_count)
+
+    def test_run(self):
+        results = AggregationBenchmark(FakeOptions(), {"rtimes-precision": 3}).run()
+        self.assertEqual(1000, results["samples"])
+        self.assertEqual(5, results["datapoints"])
+        self.assertGreater(results["samples_per_second"], 0)
+        self.assertGreaterEqual(results["tick_max"], results["tick_avg"])
+        self.assertGreater(results["peak_rss"], 0)
+
+    def test_settings(self):
+        settings = parse_settings(["rtimes-precision=3", "columnar-buffer=true", "max-buffer-len=2s"])
+        self.assertEqual({"rtimes-precision": 3, "columnar-buffer": True, "max-buffer-len": "2s"}, settings)
+        self.assertRaises(TaurusConfigError, parse_settings, ["rtimes-precision"])
@@ -1,9 +1,12 @@
 # coding=utf-8
+import json
 import logging
+import os
+import shutil
 import tempfile
 
-from bzt import six
-from bzt.engine import Configuration
+from bzt import six, TaurusConfigError
+from bzt.engine import Configuration, ParsedConfigCache
 from bzt.utils import BetterDict
 from tests import BZTestCase, __dir__
 
@@ -96,4 +99,140 @@ class TestConfiguration(BZTestCase):
         self.assertEquals(obj["token"], "*" * 8)
         self.assertEquals(obj["my_password"], "*" * 8)
         self.assertEquals(obj["secret"], "*" * 8)
-        self.assertEquals(obj["secret_story"], "story")
\ No newline at end of file
+        self.assertEquals(obj["secret_story"], "story")
+
+    def test_dump_changed_only(self):
+        obj = Configuration()
+        obj.merge({"key": "value", "token": "my-precious"})
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        obj.set_dump_file(os.path.join(dirname, "effective"))
+
+        obj.dump(background=True)
+        obj.dump_writer.flush()
+        self.assertEqual(["effective.json", "effective.yml"], sorted(os.listdir(dirname)))
+        with open(os.path.join(dirname, "effective.json")) as fds:
+            self.assertEqual({"key": "value", "token": "*" * 8}, json.load(fds))
+
+        for fname in os.listdir(dirname):
+            os.remove(os.path.join(dirname, fname))
+        obj.dump()
+        self.assertEqual([], os.listdir(dirname))  # nothing changed, nothing written
+
+        obj["key"] = "other"
+        obj.dump()
+        with open(os.path.join(dirname, "effective.yml")) as fds:
+            self.assertIn("key: other", fds.read())
+        self.assertEqual("my-precious", obj["token"])
+
+    def test_dump_snapshot_on_call(self):
+        obj = Configuration()
+        obj.merge({"key": "value", "list": [1]})
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        obj.set_dump_file(os.path.join(dirname, "effective"))
+        obj.dump()
+
+        obj["key"] = "queued"
+        with obj.dump_writer.condition:  # writer thread waits until config is changed again
+            obj.dump(background=True)
+            obj["key"] = "changed"
+            obj["list"].append(2)
+        obj.dump_writer.flush()
+        with open(os.path.join(dirname, "effective.json")) as fds:
+            self.assertEqual({"key": "queued", "list": [1]}, json.load(fds))
+
+    def test_dump_keeps_types(self):
+        obj = Configuration()
+        obj.merge({"codes": {}, "timeout": 1.5})
+        obj["codes"][200] = "ok"
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        obj.set_dump_file(os.path.join(dirname, "effective"))
+        obj.dump()
+        with open(os.path.join(dirname, "effective.yml")) as fds:
+            text = fds.read()
+        self.assertIn("200: ok", text)
+        self.assertNotIn("'200'", text)
+        self.assertIn("timeout: 1.5", text)
+
+        obj["timeout"] = 2
+        obj.dump(background=True)
+        obj["codes"][404] = "not found"
+        obj.dump_writer.flush()
+        obj.dump()
+        with open(os.path.join(dirname, "effective.json")) as fds:
+            self.assertEqual({"200": "ok", "404": "not found"}, json.load(fds)["codes"])
+
+    def test_parsed_cache(self):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        fname = os.path.join(dirname, "config.yml")
+        with open(fname, "w") as fds:
+            fds.write("settings:\n  artifacts-dir: /tmp/one\n")
+
+        cache_dir = os.path.join(dirname, "cache")
+        obj = Configuration()
+        cache = ParsedConfigCache(cache_dir, logging.getLogger(''))
+        self.assertIsNone(cache.get(fname))
+        cache.put(fname, {"settings": {"artifacts-dir": "/tmp/one"}})
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+
+        ParsedConfigCache.memory.clear()
+        self.assertEqual({"settings": {"artifacts-dir": "/tmp/one"}}, cache.get(fname))  # from disk
+
+        with open(fname, "w") as fds:
+            fds.write("---\nsettings:\n  artifacts-dir: /tmp/other-one\n")
+        self.assertIsNone(cache.get(fname))  # changed file is parsed again
+        obj.load([fname])
+        self.assertEqual("/tmp/other-one", obj["settings"]["artifacts-dir"])
+
+        cache.put(fname, {1: "int key"})
+        self.assertIsNone(cache.get(fname))
+
+    def test_parsed_cache_eviction(self):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        cache_dir = os.path.join(dirname, "cache")
+        cache = ParsedConfigCache(cache_dir, logging.getLogger(''))
+        cache.MAX_FILES = 2
+        known = set()
+        for num in range(4):
+            fname = os.path.join(dirname, "config%s.yml" % num)
+            with open(fname, "w") as fds:
+                fds.write("---\nnum: %s\n" % num)
+            cache.put(fname, {"num": num})
+            for entry in set(os.listdir(cache_dir)) - known:  # make usage order certain
+                os.utime(os.path.join(cache_dir, entry), (num, num))
+                known.add(entry)
+        self.assertEqual(2, len(os.listdir(cache_dir)))
+
+        ParsedConfigCache.memory.clear()
+        self.assertEqual({"num": 3}, cache.get(os.path.join(dirname, "config3.yml")))
+        self.assertIsNone(cache.get(os.path.join(dirname, "config0.yml")))
+
+    def test_load_missing_file(self):
+        obj = Configuration()
+        self.assertRaises(TaurusConfigError, obj.load, [os.path.join(tempfile.gettempdir(), "missing-config.yml")])
+
+    def test_merge_converted_lists(self):
+        obj = Configuration()
+        obj.merge({"execution": [{"scenario": {"requests": ["http://localhost/"]}}]})
+        execution = obj["execution"][0]
+        obj.merge({"execution": [{"concurrency": 10}]})
+        self.assertIs(execution, obj["execution"][0])
+        self.assertEqual(2, len(obj["execution"]))
+
+    def test_merge_doesnt_share_list_items(self):
+        src = BetterDict()
+        src.merge({"execution": [{"scenario": {"requests": ["http://localhost/"]}}]})
+        first, second = BetterDict(), BetterDict()
+        first.merge(src)
+        second.merge(src)
+        first["execution"][0].get("concurrency", 10)
+        first["execution"][0]["scenario"]["requests"].append("http://localhost/other")
+        self.assertNotIn("concurrency", second["execution"][0])
+        self.assertEqual(["http://localhost/"], second["execution"][0]["scenario"]["requests"])
+        self.assertNotIn("concurrency", src["execution"][0])
+        second["execution"][0]["scenario"].get("think-time", "1s")
+        self.assertNotIn("think-time", first["execution"][0]["scenario"])
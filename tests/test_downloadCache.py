@@ -0,0 +1,82 @@
+import logging
+import os
+import shutil
+import tempfile
+
+from bzt import TaurusNetworkError
+from bzt.utils import DownloadCache, download_file, file_digest, is_valid_download
+from tests import BZTestCase, __dir__
+
+
+class TestDownloadCache(BZTestCase):
+    def setUp(self):
+        super(TestDownloadCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.jar = os.path.abspath(__dir__() + "/data/jmeter-plugins-manager.jar")
+        self.link = "file://" + self.jar
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        super(TestDownloadCache, self).tearDown()
+
+    def test_download_and_reuse(self):
+        cache = DownloadCache(self.cache_dir, logging.getLogger(''))
+        self.assertIsNone(cache.get(self.link))
+
+        filename = download_file([self.link], logging.getLogger(''), ".jar", cache)
+        self.assertEqual(file_digest(self.jar), file_digest(filename))
+        os.remove(filename)
+
+        cached = cache.get(self.link)
+        self.assertEqual(file_digest(self.jar), os.path.basename(cached))
+        self.assertIsNone(cache.get("http://other.example.com/jmeter-plugins-manager.jar"))  # same name only
+
+        filename = download_file(["http://unreachable.invalid/jmeter-plugins-manager.jar", self.link],
+                                 logging.getLogger(''), ".jar", cache)
+        self.assertEqual(file_digest(self.jar), file_digest(filename))
+        os.remove(filename)
+
+    def test_corrupted_blob(self):
+        cache = DownloadCache(self.cache_dir, logging.getLogger(''))
+        os.remove(download_file([self.link], logging.getLogger(''), ".jar", cache))
+        cached = cache.get(self.link)
+        with open(cached, 'r+b') as fds:
+            fds.truncate(100)
+        self.assertIsNone(cache.get(self.link))
+
+    def test_offline_copy(self):
+        shutil.copy(self.jar, self.cache_dir)
+        cache = DownloadCache(self.cache_dir, logging.getLogger(''))
+        cached = cache.get("http://unreachable.invalid/jmeter-plugins-manager.jar")
+        self.assertEqual(file_digest(self.jar), os.path.basename(cached))
+
+        broken = os.path.join(self.cache_dir, "broken.jar")
+        with open(self.jar, 'rb') as src, open(broken, 'wb') as dst:
+            dst.write(src.read()[:1000])
+        self.assertFalse(is_valid_download(broken))
+        self.assertIsNone(cache.get("http://unreachable.invalid/broken.jar"))
+
+    def test_size_limit(self):
+        size = os.path.getsize(self.jar)
+        cache = DownloadCache(self.cache_dir, logging.getLogger(''), max_size=2 * size + 10)
+        blobs = []
+        for num in range(3):
+            filename = os.path.join(self.cache_dir, "file-%s.jar" % num)
+            with open(self.jar, 'rb') as src, open(filename, 'wb') as dst:
+                dst.write(src.read() + b"." * num)  # distinct content of almost the same size
+            blobs.append(cache.put("http://example.com/file-%s.jar" % num, filename))
+            os.utime(blobs[-1], (num, num))
+
+        self.assertFalse(os.path.exists(blobs[0]))  # least recently used
+        self.assertTrue(os.path.exists(blobs[1]))
+        self.assertTrue(os.path.exists(blobs[2]))
+        self.assertIsNone(cache.get("http://example.com/file-0.jar"))
+        self.assertEqual(blobs[1], cache.get("http://example.com/file-1.jar"))
+
+    def test_first_working_mirror(self):
+        links = ["file:///not/existing/jmeter-plugins-manager.jar", self.link, self.link]
+        filename = download_file(links, logging.getLogger(''), ".jar")
+        self.assertEqual(file_digest(self.jar), file_digest(filename))
+        os.remove(filename)
+
+        self.assertRaises(TaurusNetworkError, download_file, links[:1], logging.getLogger(''), ".jar")
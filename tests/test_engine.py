@@ -1,7 +1,9 @@
 """ unit test """
+import logging
 import os
+import time
 
-from bzt.engine import ScenarioExecutor
+from bzt.engine import ScenarioExecutor, EngineModule, CheckSchedule
 from bzt.six import string_types
 from bzt.utils import BetterDict, EXE_SUFFIX, is_windows
 from tests import BZTestCase, __dir__, local_paths_config
@@ -189,3 +191,93 @@ class TestScenarioExecutor(BZTestCase):
         process = self.executor.execute(cmdline, shell=True)
         stdout, _ = process.communicate()
         self.assertEquals(self.engine.artifacts_dir, stdout.decode().strip())
+
+
+class CountingModule(EngineModule):
+    def __init__(self, checks, duration=None, pause=0):
+        super(CountingModule, self).__init__()
+        self.checks = checks
+        self.duration = duration
+        self.pause = pause
+        self.start_time = time.time()
+
+    def check(self):
+        self.checks.append(self)
+        time.sleep(self.pause)
+        return self.duration is not None and time.time() - self.start_time >= self.duration
+
+
+class TestCheckSchedule(BZTestCase):
+    def test_intervals(self):
+        checks = []
+        fast = CountingModule(checks, duration=1)
+        slow = CountingModule(checks)
+        schedule = CheckSchedule(logging.getLogger(''))
+        schedule.add(slow, 0.5)
+        schedule.add(fast, 0.1)
+
+        while not schedule.check_due(time.time()):
+            time.sleep(max(schedule.next_due() - time.time(), 0))
+
+        self.assertLessEqual(checks.count(slow), 3)
+        self.assertGreaterEqual(checks.count(fast), 8)
+
+    def test_priority(self):
+        checks = []
+        first = CountingModule(checks)
+        second = CountingModule(checks)
+        third = CountingModule(checks)
+        schedule = CheckSchedule(logging.getLogger(''))
+        schedule.add(second, 1)
+        schedule.add(third, 1, priority=1)
+        schedule.add(first, 1, priority=-1)
+        self.assertFalse(schedule.check_due(time.time()))
+        self.assertEqual([first, second, third], checks)
+        self.assertGreater(schedule.next_due(), time.time())
+
+    def test_module_settings(self):
+        engine = EngineEmul()
+        checks = []
+        module = CountingModule(checks, duration=0.5)
+        module.settings["check-interval"] = "100ms"
+        engine.check_interval = 10
+        engine.provisioning = module
+        engine.started = [module]
+        engine._wait()
+        self.assertGreater(len(checks), 2)
+
+    def test_same_interval_lockstep(self):
+        checks = []
+        first = CountingModule(checks, pause=0.03)
+        second = CountingModule(checks, duration=1, pause=0.03)
+        schedule = CheckSchedule(logging.getLogger(''))
+        schedule.add(first, 0.1)
+        schedule.add(second, 0.1)
+
+        ticks = []
+        finished = False
+        while not finished:
+            done = len(checks)
+            finished = schedule.check_due(time.time())
+            ticks.append(checks[done:])
+            time.sleep(max(schedule.next_due() - time.time(), 0))
+
+        self.assertGreater(len(ticks), 5)
+        for tick in ticks:
+            self.assertEqual([first, second], tick)
+
+    def test_final_check(self):
+        engine = EngineEmul()
+        checks = []
+        provisioning = CountingModule(checks, duration=0.3)
+        aggregator = CountingModule(checks)
+        reporter = CountingModule(checks)
+        reporter.settings["check-interval"] = "10s"  # isn't due when provisioning finishes
+        engine.check_interval = 0.1
+        engine.provisioning = provisioning
+        engine.aggregator = aggregator
+        engine.reporters = [reporter]
+        engine.started = [provisioning, aggregator, reporter]
+        engine._wait()
+        self.assertEqual([provisioning, aggregator, reporter], checks[-3:])
+        self.assertEqual(2, checks.count(reporter))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+
+from bzt.utils import FileFollower, FileRange
+from tests import BZTestCase
+
+
+class TestFileFollower(BZTestCase):
+    def setUp(self):
+        super(TestFileFollower, self).setUp()
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, "results.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+        super(TestFileFollower, self).tearDown()
+
+    def write(self, data, mode='a', filename=None):
+        with open(filename or self.filename, mode) as fds:
+            fds.write(data)
+
+    def check_follower(self, follower):
+        self.assertEqual(FileRange(0, None, False), follower.get_range(self.filename, 0))
+
+        self.write("first\n")
+        self.assertEqual(FileRange(0, 6, False), follower.get_range(self.filename, 0))
+        self.assertIsNone(follower.get_range(self.filename, 6))
+
+        self.write("second\n")
+        self.assertEqual(FileRange(6, 13, False), follower.get_range(self.filename, 6))
+
+        self.write("new\n", 'w')
+        self.assertEqual(FileRange(0, 4, True), follower.get_range(self.filename, 13))
+        self.assertIsNone(follower.get_range(self.filename, 4))
+
+        replacement = os.path.join(self.dirname, "replacement.log")
+        self.write("replaced\n", filename=replacement)
+        os.rename(replacement, self.filename)
+        self.assertEqual(FileRange(0, 9, True), follower.get_range(self.filename, 4))
+        self.assertEqual(FileRange(4, 9, False), follower.get_range(self.filename, 4))
+        follower.close()
+
+    def test_inotify(self):
+        self.check_follower(FileFollower())
+
+    def test_polling(self):
+        follower = FileFollower(use_inotify=False)
+        self.assertIsNone(follower.inotify_fd)
+        self.check_follower(follower)
+
+    def test_unfollow(self):
+        other = os.path.join(self.dirname, "other.log")
+        self.write("first\n")
+        self.write("other\n", filename=other)
+        follower = FileFollower()
+        follower.get_range(self.filename, 0)
+        follower.get_range(other, 0)
+        watched = follower.inotify_fd is not None
+        self.assertEqual(1 if watched else 0, len(follower.dirs))
+
+        follower.unfollow(self.filename)
+        self.assertEqual([other], list(follower.files))
+        self.assertEqual(1 if watched else 0, len(follower.dirs))
+
+        follower.unfollow(other)
+        self.assertEqual({}, follower.files)
+        self.assertEqual({}, follower.dirs)
+        self.assertIsNone(follower.inotify_fd)
+
+        self.assertEqual(FileRange(0, 6, False), follower.get_range(self.filename, 0))  # followed again
+        self.assertEqual(watched, follower.inotify_fd is not None)
+        follower.close()
+        self.assertIsNone(follower.inotify_fd)
+
+    def test_missed_events(self):
+        follower = FileFollower()
+        follower.RECHECK_INTERVAL = 0
+        self.write("first\n")
+        self.assertEqual(FileRange(0, 6, False), follower.get_range(self.filename, 0))
+        if follower.inotify_fd is None:
+            return
+
+        follower._FileFollower__process_events = lambda: None  # events are lost, like on NFS
+        self.write("second\n")
+        self.assertEqual(FileRange(6, 13, False), follower.get_range(self.filename, 6))
+        self.assertTrue(follower.files[self.filename]["polled"])
+        self.assertEqual({}, follower.dirs)
+        self.write("third\n")
+        self.assertEqual(FileRange(13, 19, False), follower.get_range(self.filename, 13))
+        follower.close()
+
+    def test_polled_fs(self):
+        follower = FileFollower()
+        follower.POLLED_FS_TYPES = (follower._FileFollower__fs_type(self.dirname).split(".")[0],)
+        self.write("first\n")
+        self.assertEqual(FileRange(0, 6, False), follower.get_range(self.filename, 0))
+        self.assertTrue(follower.files[self.filename]["polled"])
+        self.assertEqual({}, follower.dirs)
+        follower.close()
+
+    def test_new_range_reset(self):
+        follower = FileFollower()
+        resets = []
+        self.write("first\n")
+        self.assertEqual(FileRange(0, 6, False), follower.get_new_range(self.filename, 0, lambda: resets.append(1)))
+        self.assertIsNone(follower.get_new_range(self.filename, 6, lambda: resets.append(1)))
+        self.write("new\n", 'w')
+        self.assertIsNone(follower.get_new_range(self.filename, 6, lambda: resets.append(1)))
+        self.assertEqual([1], resets)
+        self.assertEqual(FileRange(0, 4, False), follower.get_new_range(self.filename, 0, lambda: resets.append(1)))
+        follower.close()
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+from tests import BZTestCase
+
+HEAVY_MODULES = ["urwid", "psutil", "progressbar", "webbrowser", "lxml", "distutils", "bzt.modules.jmeter"]
+
+PROBE = """
+import json, sys, time
+start = time.time()
+import bzt.cli
+elapsed = time.time() - start
+print(json.dumps({"elapsed": elapsed, "modules": [name for name in %r if name in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+class TestStartupTime(BZTestCase):
+    def probe(self):
+        root = os.path.join(os.path.dirname(__file__), "..")
+        out = subprocess.check_output([sys.executable, "-c", PROBE], cwd=root)
+        return json.loads(out.decode().strip().splitlines()[-1])
+
+    def test_heavy_modules_deferred(self):
+        self.assertEqual([], self.probe()["modules"])
+
+    def test_import_time(self):
+        elapsed = min(self.probe()["elapsed"] for _ in range(3))
+        self.assertLess(elapsed, 1.0)  # generous bound for slow CI hosts
+
+    def test_utils_import_light(self):
+        heavy = ["bzt.engine", "bzt.modules.console", "bzt.progress", "urwid", "progressbar"]
+        probe = "import sys, bzt.utils; print([name for name in %r if name in sys.modules])" % heavy
+        out = subprocess.check_output([sys.executable, "-c", probe], cwd=os.path.join(os.path.dirname(__file__), ".."))
+        self.assertEqual("[]", out.decode().strip().splitlines()[-1])
+
+    def test_moved_names_importable(self):
+        from bzt.utils import DummyScreen, ProgressBarContext, IncrementableProgressBar
+        from bzt.modules.console import DummyScreen as ConsoleDummyScreen
+        self.assertIs(ConsoleDummyScreen, DummyScreen)
+        self.assertTrue(issubclass(IncrementableProgressBar, ProgressBarContext))
+
+    def test_etree_lazy(self):
+        from bzt.six import etree
+        self.assertEqual("root", etree.Element("root").tag)